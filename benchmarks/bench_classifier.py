@@ -0,0 +1,133 @@
+"""Benchmark: local mood/tag suggestions, cost per entry and agreement with held-out labels.
+
+Trains ``EntryClassifier`` (journal_store/classifier.py) on the first part
+of a synthetic journal and suggests a mood and tags for the held-out rest
+as if they had been added without them. Reports microseconds per
+suggestion, tag precision and recall, and how often a mood is suggested
+and how often it matches. Synthetic moods are drawn independently of the
+text, so mood suggestions only come from the lexicons there; tags follow
+the topic of the text (except "weekend", which comes from the timestamp
+and is left out of the scores). Also times training the classifier from
+the database, as the first ``add_entry`` of a session does, and adding a
+batch of unlabelled entries with and without suggestions.
+
+    python -m benchmarks.bench_classifier
+    python -m benchmarks.bench_classifier --sizes 10000 100000 --holdout 0.2 --output classifier.json
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from journal_store import EntryStore
+from journal_store.classifier import EntryClassifier
+
+from .common import time_call, write_results
+from .synthetic import BENCH_USER, build_journal, generate_entries
+
+# Tags that cannot be told from the entry text
+UNSCORED_TAGS = {"weekend"}
+IMPORT_BATCH = 2000
+
+
+def score(classifier: EntryClassifier, entries: list) -> dict:
+    """Suggest metadata for each held-out entry and compare it with its real labels."""
+    started = time.perf_counter()
+    suggestions = [classifier.suggest(entry["text"]) for entry in entries]
+    elapsed = time.perf_counter() - started
+    moods = correct_moods = true_tags = suggested_tags = correct_tags = 0
+    for entry, (mood, tags) in zip(entries, suggestions):
+        if mood:
+            moods += 1
+            correct_moods += mood == entry["mood"]
+        expected = set(entry["tags"]) - UNSCORED_TAGS
+        tags = set(tags) - UNSCORED_TAGS
+        true_tags += len(expected)
+        suggested_tags += len(tags)
+        correct_tags += len(expected & tags)
+    return {
+        "us_per_entry": round(elapsed / len(entries) * 1e6, 2),
+        "mood_coverage": round(moods / len(entries), 3),
+        "mood_accuracy": round(correct_moods / moods, 3) if moods else None,
+        "tag_precision": round(correct_tags / suggested_tags, 3) if suggested_tags else None,
+        "tag_recall": round(correct_tags / true_tags, 3) if true_tags else None,
+    }
+
+
+def time_import(workdir: str, entries: list, suggest: bool) -> float:
+    """Entries per second added in one batch without mood or tags."""
+    path = os.path.join(workdir, f"import-{'suggest' if suggest else 'plain'}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    store = EntryStore(path)
+    store.add_entries(BENCH_USER, entries[:IMPORT_BATCH])  # labelled history to learn from
+    unlabelled = [{"text": entry["text"], "timestamp": entry["timestamp"]} for entry in entries[IMPORT_BATCH:]]
+    started = time.perf_counter()
+    store.add_entries(BENCH_USER, unlabelled, suggest=suggest)
+    elapsed = time.perf_counter() - started
+    store.close()
+    return round(len(unlabelled) / elapsed, 1)
+
+
+def run_case(size: int, holdout: float, workdir: str) -> dict:
+    entries = list(generate_entries(size))
+    split = int(size * (1 - holdout))
+    lexicon_only = score(EntryClassifier(), entries[split:])
+
+    classifier = EntryClassifier()
+    started = time.perf_counter()
+    for entry in entries[:split]:
+        classifier.learn(entry["text"], entry["mood"], entry["tags"])
+    learn_us = (time.perf_counter() - started) / split * 1e6
+    learned = score(classifier, entries[split:])
+
+    store = build_journal(os.path.join(workdir, f"journal-{size}.db"), size)
+
+    def load():
+        store._classifiers.clear()
+        store.classifier(BENCH_USER)
+
+    training = time_call(load, 3)
+    store.close()
+    import_sample = entries[:IMPORT_BATCH + min(size, 20000)]
+    return {
+        "entries": size,
+        "holdout": size - split,
+        "learn_us_per_entry": round(learn_us, 2),
+        "lexicon_only": lexicon_only,
+        "learned": learned,
+        "train_from_db": training,
+        "import_per_second": {"plain": time_import(workdir, import_sample, False),
+                              "suggest": time_import(workdir, import_sample, True)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of entries held out for scoring")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'entries':>8} {'model':<13} {'us/entry':>9} {'mood cov':>9} {'mood acc':>9} "
+          f"{'tag prec':>9} {'tag rec':>8}")
+    results = []
+    for size in args.sizes:
+        result = run_case(size, args.holdout, args.workdir)
+        results.append(result)
+        for kind in ("lexicon_only", "learned"):
+            row = result[kind]
+            print(f"{size:>8} {kind:<13} {row['us_per_entry']:>9.1f} {row['mood_coverage']:>9.3f} "
+                  f"{row['mood_accuracy'] or 0:>9.3f} {row['tag_precision'] or 0:>9.3f} {row['tag_recall'] or 0:>8.3f}")
+        imports = result["import_per_second"]
+        print(f"{'':>8} learn {result['learn_us_per_entry']:.1f}us/entry, "
+              f"train from DB {result['train_from_db']['median_ms']:.0f}ms, "
+              f"import {imports['plain']:.0f}/s plain vs {imports['suggest']:.0f}/s with suggestions")
+    if args.output:
+        write_results(args.output, "bench_classifier", results, holdout=args.holdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark: session load time and database size before and after compaction.
+
+Builds one long-lived session per size the way the app accumulates it
+(four events per turn). With ``--legacy``, every third turn's state delta
+carries the whole entry list, as ``add_entry`` did before entries moved to
+the entry store, so storage grows quadratically. Then measures a cold
+``get_session``, compacts with the given retention and measures again.
+
+    python -m benchmarks.bench_compaction
+    python -m benchmarks.bench_compaction --turns 250 1000 4000 --legacy --output compaction.json
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from journal_store import compaction, configure_entry_store
+from journal_store.session_service import JournalSessionService
+
+from .common import write_results
+
+APP_NAME = "Journal Benchmark"
+USER_ID = "bench-compaction"
+
+
+def _event(author: str, text: str, timestamp: float, state_delta=None) -> Event:
+    return Event(
+        author=author,
+        invocation_id=f"turn-{int(timestamp)}",
+        timestamp=timestamp,
+        content=types.Content(role="user" if author == "user" else "model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+def build_session(service, turns: int, legacy: bool) -> str:
+    session = service.create_session(app_name=APP_NAME, user_id=USER_ID,
+                                     state={"user_name": "Bench", "entries_version": 0})
+    # One turn per day, ending today
+    start = time.time() - turns * 86400
+    entries = []
+    for turn in range(turns):
+        timestamp = start + turn * 86400
+        text = f"Day {turn}: walked by the river, worked on the report and cooked dinner"
+        delta = {"entries_version": turn}
+        if legacy and turn % 3 == 0:
+            entries.append({"text": text, "timestamp": str(timestamp), "mood": "calm", "tags": ["walk"]})
+            delta["entries"] = list(entries)
+        for number, event in enumerate([
+            _event("user", text, timestamp),
+            _event("memory_agent", "transfer_to_agent journal_agent", timestamp + 1),
+            _event("journal_agent", "add_entry", timestamp + 2, delta),
+            _event("journal_agent", "Added your entry.", timestamp + 3),
+        ]):
+            service.append_event(session, event)
+    service.flush()
+    return session.id
+
+
+def measure(db_path: str, session_id: str) -> dict:
+    service = JournalSessionService(db_url=f"sqlite:///{db_path}")
+    started = time.perf_counter()
+    session = service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    elapsed = time.perf_counter() - started
+    service.close()
+    size = sum(os.path.getsize(db_path + suffix) for suffix in ("", "-wal") if os.path.exists(db_path + suffix))
+    return {"events": len(session.events), "load_ms": round(elapsed * 1000, 2), "db_mb": round(size / 1e6, 2)}
+
+
+def run_case(turns: int, legacy: bool, keep_events: int, keep_days: float, workdir: str) -> dict:
+    db_path = os.path.join(workdir, f"compaction-{turns}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    shutil.rmtree(compaction.archive_dir(db_path), ignore_errors=True)
+    store = configure_entry_store(db_path)
+    service = JournalSessionService(db_url=f"sqlite:///{db_path}")
+    session_id = build_session(service, turns, legacy)
+    service.close()
+    before = measure(db_path, session_id)
+
+    service = JournalSessionService(db_url=f"sqlite:///{db_path}")
+    started = time.perf_counter()
+    result = compaction.compact_session(service, store, APP_NAME, USER_ID, session_id,
+                                        keep_events=keep_events, keep_days=keep_days,
+                                        archive_path=compaction.archive_dir(db_path))
+    service.close()
+    compaction.vacuum(service)
+    compact_seconds = time.perf_counter() - started
+    after = measure(db_path, session_id)
+    configure_entry_store(":memory:")
+    return {
+        "turns": turns,
+        "legacy_deltas": legacy,
+        "before": before,
+        "after": after,
+        "pruned": result["pruned"],
+        "compact_seconds": round(compact_seconds, 2),
+        "archive_mb": round(os.path.getsize(result["archive"]) / 1e6, 2) if result["archive"] else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[250, 1000])
+    parser.add_argument("--legacy", action="store_true", help="include full entry lists in state deltas")
+    parser.add_argument("--keep-events", type=int, default=compaction.DEFAULT_KEEP_EVENTS)
+    parser.add_argument("--keep-days", type=float, default=compaction.DEFAULT_KEEP_DAYS)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'turns':>6} {'events':>7} {'load ms':>8} {'db MB':>7}   {'events':>7} {'load ms':>8} {'db MB':>7} "
+          f"{'compact s':>9}")
+    results = []
+    for turns in args.turns:
+        result = run_case(turns, args.legacy, args.keep_events, args.keep_days, args.workdir)
+        results.append(result)
+        before, after = result["before"], result["after"]
+        print(f"{turns:>6} {before['events']:>7} {before['load_ms']:>8.1f} {before['db_mb']:>7.2f} -> "
+              f"{after['events']:>7} {after['load_ms']:>8.1f} {after['db_mb']:>7.2f} {result['compact_seconds']:>9.2f}")
+    if args.output:
+        write_results(args.output, "bench_compaction", results, legacy=args.legacy,
+                      keep_events=args.keep_events, keep_days=args.keep_days)
+
+
+if __name__ == "__main__":
+    main()
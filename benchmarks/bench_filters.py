@@ -0,0 +1,96 @@
+"""Benchmark: boolean tag/mood filters on the bitmap index vs. scanning every entry.
+
+For each filter, times counting the matches and fetching the first page
+through ``EntryStore.count_entries`` / ``page_entries`` (bitmap index plus
+time index, see journal_store/bitmap_index.py), and the same filter as
+list comprehensions over the whole journal loaded as compact records, the
+way ``view_entries`` used to filter. The plan of each filter is printed.
+
+    python -m benchmarks.bench_filters
+    python -m benchmarks.bench_filters --sizes 100000 1000000 --output filters.json
+"""
+import argparse
+import os
+import tempfile
+
+from journal_store.bitmap_index import And, Not, Or, Term
+from journal_store.entries import filter_node
+from journal_store.time_index import parse_date_range, to_epoch
+
+from .common import time_call, write_results
+from .synthetic import BENCH_USER, build_journal
+
+# name -> (mood, tags, query, start, end)
+FILTERS = {
+    "tag": (None, "travel", None, None, None),
+    "rare_tag_and_mood": (None, None, "career AND mood:sad", None, None),
+    "and_not": (None, None, "work AND NOT stressed", None, None),
+    "or_and": (None, None, "(travel OR friends) AND happy", None, None),
+    "not_only": (None, None, "NOT happy", None, None),
+    "month_and_not": (None, None, "work AND NOT stressed", "2023-03-01", "2023-03-31"),
+}
+
+
+def _matches(node, records, record) -> bool:
+    if isinstance(node, Term):
+        return ((node.kind != "mood" and node.name in records.tag_names(record))
+                or (node.kind != "tag" and records.mood(record) == node.name))
+    if isinstance(node, Not):
+        return not _matches(node.child, records, record)
+    if isinstance(node, And):
+        return all(_matches(child, records, record) for child in node.children)
+    if isinstance(node, Or):
+        return any(_matches(child, records, record) for child in node.children)
+    raise TypeError(node)
+
+
+def scan(records, node, since, until):
+    """Filter the loaded journal one criterion after another."""
+    matched = list(records)
+    if since:
+        matched = [record for record in matched if record.epoch >= to_epoch(since)]
+    if until:
+        matched = [record for record in matched if record.epoch < to_epoch(until)]
+    return [record for record in matched if _matches(node, records, record)]
+
+
+def run(sizes, repeat: int, workdir: str):
+    results = []
+    print(f"{'entries':>8} {'filter':<18} {'matches':>8} {'count ms':>9} {'page ms':>9} {'scan ms':>9}")
+    for size in sizes:
+        store = build_journal(os.path.join(workdir, f"journal-{size}.db"), size)
+        records = store.load_records(BENCH_USER)
+        store.count_entries(BENCH_USER, tags="work")  # load the indexes
+        for name, (mood, tags, query, start, end) in FILTERS.items():
+            since, until = parse_date_range(start, end)
+            options = dict(mood=mood, tags=tags, query=query, since=since, until=until)
+            matches = store.count_entries(BENCH_USER, **options)
+            count = time_call(lambda: store.count_entries(BENCH_USER, **options), repeat)
+            page = time_call(lambda: store.page_entries(BENCH_USER, limit=20, **options), repeat)
+            node = filter_node(mood, tags, query)
+            scanned = time_call(lambda: scan(records, node, since, until), max(1, repeat // 10))
+            plan = store.explain_filter(BENCH_USER, **options)
+            results.append({"entries": size, "filter": name, "matches": matches, "plan": plan,
+                            "count": count, "page": page, "scan": scanned})
+            print(f"{size:>8} {name:<18} {matches:>8} {count['median_ms']:>9.2f} "
+                  f"{page['median_ms']:>9.2f} {scanned['median_ms']:>9.1f}")
+            print(f"{'':>8}   plan: {'; '.join(plan)}")
+        store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+    results = run(args.sizes, args.repeat, args.workdir)
+    if args.output:
+        write_results(args.output, "bench_filters", results, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: memory and serialized size of a loaded journal, as dicts and as compact records.
+
+Loads the whole synthetic journal once with ``get_entries`` (one dict per
+entry) and once with ``load_records`` (``EntryRecord`` objects with interned
+tags and moods, see journal_store/records.py), and reports the memory each
+holds (traced with ``tracemalloc``), the load time and the size of the
+JSON each serializes to. Also times converting records back to dicts.
+
+    python -m benchmarks.bench_records
+    python -m benchmarks.bench_records --sizes 10000 100000 --output records.json
+"""
+import argparse
+import gc
+import gzip
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from journal_store.records import RecordSet
+
+from .common import write_results
+from .synthetic import BENCH_USER, build_journal
+
+
+def _traced(load):
+    """Run ``load`` and return its result, the memory it still holds in MB and its wall time."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, round(held / 1e6, 2), round(elapsed * 1000, 1)
+
+
+def _sizes(text: str) -> dict:
+    data = text.encode("utf-8")
+    return {"json_mb": round(len(data) / 1e6, 2), "gzip_mb": round(len(gzip.compress(data, 6)) / 1e6, 2)}
+
+
+def run_case(size: int, workdir: str) -> dict:
+    store = build_journal(os.path.join(workdir, f"journal-{size}.db"), size)
+
+    entries, dict_mb, dict_ms = _traced(lambda: store.get_entries(BENCH_USER))
+    dict_sizes = _sizes(json.dumps(entries, ensure_ascii=False))
+    del entries
+
+    records, record_mb, record_ms = _traced(lambda: store.load_records(BENCH_USER))
+    serialized = records.dumps()
+    record_sizes = _sizes(serialized)
+
+    started = time.perf_counter()
+    records.to_dicts()
+    to_dicts_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    RecordSet.loads(serialized)
+    loads_ms = (time.perf_counter() - started) * 1000
+    store.close()
+    return {
+        "entries": size,
+        "dicts": {"memory_mb": dict_mb, "load_ms": dict_ms, **dict_sizes},
+        "records": {"memory_mb": record_mb, "load_ms": record_ms, **record_sizes,
+                    "tags": len(records.tags), "moods": len(records.moods)},
+        "to_dicts_ms": round(to_dicts_ms, 1),
+        "loads_ms": round(loads_ms, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'entries':>8} {'':<8} {'memory MB':>10} {'load ms':>8} {'JSON MB':>8} {'gzip MB':>8}")
+    results = []
+    for size in args.sizes:
+        result = run_case(size, args.workdir)
+        results.append(result)
+        for kind in ("dicts", "records"):
+            row = result[kind]
+            print(f"{size:>8} {kind:<8} {row['memory_mb']:>10.2f} {row['load_ms']:>8.0f} "
+                  f"{row['json_mb']:>8.2f} {row['gzip_mb']:>8.2f}")
+        print(f"{'':>8} to_dicts {result['to_dicts_ms']:.0f}ms, loads {result['loads_ms']:.0f}ms")
+    if args.output:
+        write_results(args.output, "bench_records", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: year-end report wall time, one prompt over every entry vs. parallel map-reduce.
+
+Uses ``FakeTextModel`` (benchmarks/fakes.py), whose latency grows with the
+prompt size like a remote model's. The baseline sends every entry of the
+year in one prompt, as a report built from ``analyze_all_entries`` would.
+``ReportBuilder`` (memory_agent/sub_agents/summarizer_agent/reports.py)
+splits the year by month or by theme and summarizes the chunks with at
+most ``--concurrency`` model calls at once. The period summary cache is
+cleared before each cold run; the warm run reuses it.
+
+    python -m benchmarks.bench_reports
+    python -m benchmarks.bench_reports --sizes 10000 100000 --concurrency 1 8 32 --output reports.json
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+from memory_agent.sub_agents.summarizer_agent.period_summaries import entry_line
+from memory_agent.sub_agents.summarizer_agent.reports import ReportBuilder
+
+from .common import write_results
+from .fakes import FakeTextModel
+from .synthetic import BENCH_USER, build_journal
+
+PERIOD = "2024"
+
+
+def _clear_summaries(path: str):
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM journal_period_summaries WHERE user_id = ?", (BENCH_USER,))
+
+
+async def _single_prompt(store, model: FakeTextModel) -> dict:
+    started = time.perf_counter()
+    lines = [entry_line(entry) for entry in store.iter_entries(BENCH_USER, since=f"{PERIOD}-01-01",
+                                                               until=f"{int(PERIOD) + 1}-01-01")]
+    await model("Write a year-end report from these journal entries.\n" + "\n".join(lines))
+    return {"seconds": round(time.perf_counter() - started, 2), "model_calls": 1}
+
+
+async def _map_reduce(store, model: FakeTextModel, by: str, concurrency: int) -> dict:
+    builder = ReportBuilder(store, generate=model, concurrency=concurrency)
+    result = await builder.build(BENCH_USER, PERIOD, by=by, user_name="Bench User")
+    return {"seconds": result["elapsed_seconds"], "model_calls": result["model_calls"],
+            "sections": len(result["sections"])}
+
+
+def run_case(size: int, concurrency_levels, latency: float, per_kchar: float, workdir: str) -> list:
+    path = os.path.join(workdir, f"journal-{size}.db")
+    store = build_journal(path, size)
+    cases = [("single prompt", None, None)]
+    cases += [("time map-reduce", "time", level) for level in concurrency_levels]
+    cases.append(("time map-reduce (cached)", "time", concurrency_levels[-1]))
+    cases += [("theme map-reduce", "theme", level) for level in concurrency_levels]
+    results = []
+    for name, by, concurrency in cases:
+        model = FakeTextModel(latency, per_kchar)
+        if by is None:
+            result = asyncio.run(_single_prompt(store, model))
+        else:
+            if "cached" not in name:
+                _clear_summaries(path)
+            result = asyncio.run(_map_reduce(store, model, by, concurrency))
+        result.update({"entries": size, "case": name, "concurrency": concurrency,
+                       "max_prompt_chars": model.max_prompt_chars, "peak_concurrency": model.peak_concurrency})
+        results.append(result)
+        print(f"{size:>8} {name:<26} {concurrency or 1:>5} {result['model_calls']:>6} "
+              f"{model.max_prompt_chars:>11} {result['seconds']:>8.2f}")
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--model-latency", type=float, default=0.2, help="seconds per model call")
+    parser.add_argument("--seconds-per-kchar", type=float, default=0.005,
+                        help="extra model seconds per 1000 prompt characters")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'entries':>8} {'case':<26} {'slots':>5} {'calls':>6} {'max prompt':>11} {'seconds':>8}")
+    results = []
+    for size in args.sizes:
+        results.extend(run_case(size, args.concurrency, args.model_latency, args.seconds_per_kchar, args.workdir))
+    if args.output:
+        write_results(args.output, "bench_reports", results, model_latency=args.model_latency,
+                      seconds_per_kchar=args.seconds_per_kchar)
+
+
+if __name__ == "__main__":
+    main()
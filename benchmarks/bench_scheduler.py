@@ -0,0 +1,159 @@
+"""Benchmark: conversation turns against a failing model, with and without the scheduler.
+
+Many users send their turns at once: a series of new entries each, plus
+the same "Show me my entries" request sent twice at the same time. Every
+agent's model is a ``FlakyLlm`` that fails ``--failure-rate`` of its calls
+with 503/429 before answering, and ``--mid-turn-failure-rate`` of its
+answers after a tool call once the answer was sent.
+
+"direct" runs turns as before the scheduler: one at a time per user
+through ``call_agent_async``, and a model error ends the turn. "scheduled"
+runs them through ``TurnScheduler`` with the agents' models behind a
+``ModelScheduler``. Reports completed and failed turns, entries stored
+against entries asked for (duplicates come from a turn retried after its
+``add_entry`` ran), retries, coalesced requests and wall time.
+
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --users 100 --adds 5 --failure-rate 0.2 --output scheduler.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from google.adk.runners import Runner
+
+from journal_store import configure_entry_store, get_entry_store
+from journal_store.session_service import JournalSessionService
+from memory_agent.agent import memory_agent
+from memory_agent.llm import schedule_model_calls
+from memory_agent.scheduler import ModelScheduler, RetryPolicy, TurnScheduler
+from utils import call_agent_async
+
+from .common import write_results
+from .fakes import use_flaky_models
+
+APP_NAME = "Journal Benchmark"
+VIEW = "Show me my entries"
+
+
+def user_turns(user: int, adds: int) -> list:
+    """The turns of one user in order; the paired view requests are sent together."""
+    return [(VIEW, VIEW)] + [f"I had a long walk by the river this morning (walk {walk} of user {user})"
+                             for walk in range(adds)]
+
+
+async def run_mode(mode: str, path: str, args) -> dict:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    configure_entry_store(path)
+    models = use_flaky_models(memory_agent, args.failure_rate, args.mid_turn_failure_rate,
+                              args.model_latency, args.seed)
+    session_service = JournalSessionService(db_url=f"sqlite:///{path}")
+    runner = Runner(agent=memory_agent, app_name=APP_NAME, session_service=session_service)
+    users = [f"bench-user-{user}" for user in range(args.users)]
+    sessions = {
+        user_id: session_service.create_session(
+            app_name=APP_NAME, user_id=user_id, state={"user_name": "Bench User", "entries_version": 0},
+        ).id
+        for user_id in users
+    }
+
+    model_scheduler = turns = None
+    if mode == "scheduled":
+        rng = random.Random(args.seed)
+        model_scheduler = schedule_model_calls(memory_agent, ModelScheduler(
+            max_concurrent=args.max_model_calls, retry=RetryPolicy(base_delay=args.base_delay, rng=rng),
+        ))
+        turns = TurnScheduler(runner, retry=RetryPolicy(base_delay=args.base_delay, rng=rng), log=lambda message: None)
+    user_locks = {user_id: asyncio.Lock() for user_id in users}
+    outcomes = {"completed": 0, "failed": 0}
+
+    async def direct_turn(user_id: str, query: str):
+        async with user_locks[user_id]:
+            try:
+                await call_agent_async(runner, user_id, sessions[user_id], query, display=False, raise_errors=True)
+            except Exception:
+                return None
+            return True
+
+    async def one_turn(user_id: str, query: str):
+        if turns is None:
+            result = await direct_turn(user_id, query)
+        else:
+            result = await turns.run_turn(user_id, sessions[user_id], query, display=False)
+        outcomes["completed" if result is not None else "failed"] += 1
+
+    async def conversation(user: int, user_id: str):
+        for turn in user_turns(user, args.adds):
+            if isinstance(turn, tuple):
+                await asyncio.gather(*(one_turn(user_id, query) for query in turn))
+            else:
+                await one_turn(user_id, turn)
+
+    started = time.perf_counter()
+    # The console output of the tools is not part of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(conversation(user, user_id) for user, user_id in enumerate(users)))
+    elapsed = time.perf_counter() - started
+
+    store = get_entry_store()
+    texts = [entry["text"] for user_id in users for entry in store.iter_entries(user_id)]
+    session_service.close()
+    configure_entry_store(":memory:")
+    return {
+        "mode": mode,
+        "turns": outcomes["completed"] + outcomes["failed"],
+        **outcomes,
+        "entries_expected": args.users * args.adds,
+        "entries_stored": len(texts),
+        "duplicate_entries": len(texts) - len(set(texts)),
+        "missing_entries": args.users * args.adds - len(set(texts)),
+        "model_calls": sum(model.calls for model in models.values()),
+        "injected_failures": sum(model.failures for model in models.values()),
+        "model_retries": model_scheduler.retries if model_scheduler else 0,
+        "turn_retries": turns.retried if turns else 0,
+        "coalesced": turns.coalesced if turns else 0,
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--adds", type=int, default=4, help="entries each user adds, one turn each")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="model calls failing before answering")
+    parser.add_argument("--mid-turn-failure-rate", type=float, default=0.05,
+                        help="answers after a tool call failing once sent")
+    parser.add_argument("--model-latency", type=float, default=0.02, help="seconds awaited per fake model call")
+    parser.add_argument("--max-model-calls", type=int, default=8, help="concurrent model calls when scheduled")
+    parser.add_argument("--base-delay", type=float, default=0.02, help="backoff base delay in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'mode':<10} {'done':>6} {'failed':>6} {'stored':>7} {'expected':>8} {'dupes':>6} {'missing':>7} "
+          f"{'calls':>6} {'retries':>8} {'turn ret':>8} {'merged':>6} {'seconds':>8}")
+    results = []
+    for mode in ("direct", "scheduled"):
+        result = asyncio.run(run_mode(mode, os.path.join(args.workdir, f"bench_scheduler_{mode}.db"), args))
+        results.append(result)
+        print(f"{mode:<10} {result['completed']:>6} {result['failed']:>6} {result['entries_stored']:>7} "
+              f"{result['entries_expected']:>8} {result['duplicate_entries']:>6} {result['missing_entries']:>7} "
+              f"{result['model_calls']:>6} {result['model_retries']:>8} {result['turn_retries']:>8} "
+              f"{result['coalesced']:>6} {result['seconds']:>8.2f}")
+    if args.output:
+        write_results(args.output, "bench_scheduler", results, users=args.users, adds=args.adds,
+                      failure_rate=args.failure_rate, mid_turn_failure_rate=args.mid_turn_failure_rate,
+                      model_latency=args.model_latency, max_model_calls=args.max_model_calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Benchmark: session service calls under concurrent sessions, and how long they stall the event loop.
+
+Each simulated session runs turns the way the ``Runner`` drives the
+session service: ``get_session`` at the start, then a user event, model
+and tool events with state deltas and a final response, with
+``--model-latency`` of awaited "model time" in between. A probe task
+sleeps 1ms in a loop and records how late it wakes up; since the session
+services are called synchronously on the event loop, that lag is the time
+every other user waited on session storage.
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --sessions 10 100 --history 200 --output sessions.json
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from journal_store.session_service import JournalSessionService
+
+from .common import summarize_timings, write_results
+
+APP_NAME = "Journal Benchmark"
+
+SERVICES = {
+    "database": DatabaseSessionService,
+    "journal": JournalSessionService,
+}
+
+
+def _event(author: str, text: str, state_delta=None) -> Event:
+    return Event(
+        author=author,
+        invocation_id="bench",
+        content=types.Content(role="user" if author == "user" else "model", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+async def _probe_loop_lag(lags: list, stop: asyncio.Event, interval: float = 0.001):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval) * 1000)
+
+
+async def _session(service, user_id: str, session_id: str, turns: int, latency: float, timings: dict):
+    prefetch = getattr(service, "get_session_async", None)
+    for turn in range(turns):
+        if prefetch is not None:
+            # As utils.call_agent_async does before handing the turn to the Runner
+            await prefetch(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        started = time.perf_counter()
+        session = service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        timings["get_session"].append((time.perf_counter() - started) * 1000)
+        events = [
+            _event("user", f"Turn {turn}: show me my entries"),
+            _event("memory_agent", "transfer_to_agent journal_agent"),
+            _event("journal_agent", "view_entries", {"entries_version": turn, "last_query": "view"}),
+            _event("journal_agent", "Here are your most recent entries ..." * 4),
+        ]
+        for number, event in enumerate(events):
+            started = time.perf_counter()
+            service.append_event(session, event)
+            timings["append_event"].append((time.perf_counter() - started) * 1000)
+            if number in (0, 2):
+                await asyncio.sleep(latency)
+
+
+def _populate(service, sessions: int, history: int):
+    ids = []
+    for number in range(sessions):
+        user_id = f"bench-{number}"
+        session = service.create_session(app_name=APP_NAME, user_id=user_id,
+                                         state={"user_name": user_id, "entries_version": 0})
+        for turn in range(history):
+            service.append_event(session, _event("user" if turn % 2 == 0 else "journal_agent", f"history {turn}"))
+        ids.append((user_id, session.id))
+    if hasattr(service, "flush"):
+        service.flush()
+    return ids
+
+
+async def run_case(kind: str, sessions: int, turns: int, history: int, latency: float, workdir: str) -> dict:
+    path = os.path.join(workdir, f"sessions-{kind}-{sessions}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    # Sessions with existing history, created outside the measurement
+    ids = _populate(SERVICES[kind](db_url=f"sqlite:///{path}"), sessions, history)
+    service = SERVICES[kind](db_url=f"sqlite:///{path}")
+
+    timings = {"get_session": [], "append_event": []}
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_loop_lag(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(_session(service, user_id, session_id, turns, latency, timings)
+                           for user_id, session_id in ids))
+    if hasattr(service, "flush_async"):
+        # Count the time to make everything durable
+        await service.flush_async()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    ordered_lags = sorted(lags)
+    result = {
+        "service": kind,
+        "sessions": sessions,
+        "turns_per_session": turns,
+        "history_events": history,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(len(timings["append_event"]) / elapsed, 1),
+        "get_session": summarize_timings(timings["get_session"]),
+        "append_event": summarize_timings(timings["append_event"]),
+        "loop_lag_ms": {
+            "p50": round(ordered_lags[len(ordered_lags) // 2], 3),
+            "p99": round(ordered_lags[min(len(ordered_lags) - 1, int(len(ordered_lags) * 0.99))], 3),
+            "max": round(ordered_lags[-1], 3),
+        },
+    }
+    if hasattr(service, "stats"):
+        result["writer"] = service.stats()
+        service.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--turns", type=int, default=10, help="turns per session")
+    parser.add_argument("--history", type=int, default=100, help="events already in each session")
+    parser.add_argument("--model-latency", type=float, default=0.02, help="awaited seconds per model call")
+    parser.add_argument("--services", nargs="+", choices=sorted(SERVICES), default=sorted(SERVICES))
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print(f"{'service':<10} {'sessions':>8} {'events/s':>9} {'get p50':>8} {'get p95':>8} "
+          f"{'append p50':>10} {'append p95':>10} {'lag p99':>8} {'lag max':>8}")
+    results = []
+    for sessions in args.sessions:
+        for kind in args.services:
+            result = asyncio.run(run_case(kind, sessions, args.turns, args.history, args.model_latency, args.workdir))
+            results.append(result)
+            print(f"{kind:<10} {sessions:>8} {result['events_per_second']:>9.0f} "
+                  f"{result['get_session']['median_ms']:>8.2f} {result['get_session']['p95_ms']:>8.2f} "
+                  f"{result['append_event']['median_ms']:>10.3f} {result['append_event']['p95_ms']:>10.3f} "
+                  f"{result['loop_lag_ms']['p99']:>8.2f} {result['loop_lag_ms']['max']:>8.2f}")
+    if args.output:
+        write_results(args.output, "bench_sessions", results, turns=args.turns, history=args.history,
+                      model_latency=args.model_latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark: how long ``main.py`` takes to import and to show its first prompt.
+
+Runs ``python -X importtime -c "import main"`` and reports the cumulative
+import time of ``main`` with its slowest direct imports, then starts
+``main.py`` itself, times the first "You:" prompt, types "exit" right away
+and times the exit, which waits for storage, agents and the session to be
+ready. Each run happens in a fresh process in ``--workdir``, so the
+journal database there is created on the first run and reused after.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --output startup.json
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .common import write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORT_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _environment() -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONUNBUFFERED="1")
+    env.pop("JOURNAL_TRACE_DIR", None)
+    return env
+
+
+def import_times(workdir: str) -> dict:
+    """Cumulative import time of ``main`` and of each module it imports directly, in ms."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=workdir,
+                            env=_environment(), capture_output=True, text=True, check=True)
+    total = 0.0
+    direct = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if name == "main":
+            total = int(cumulative) / 1000
+        elif len(indent) == 3:
+            direct[name] = int(cumulative) / 1000
+    return {"main_ms": round(total, 1),
+            "slowest": dict(sorted(direct.items(), key=lambda item: -item[1])[:5])}
+
+
+def prompt_times(workdir: str, args) -> dict:
+    """Seconds until the first prompt and until ``main.py`` has exited after "exit"."""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), *args], cwd=workdir,
+                               env=_environment(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    output = b""
+    while b"You:" not in output:
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            raise RuntimeError(f"main.py exited before its prompt:\n{output.decode(errors='replace')}")
+        output += chunk
+    prompt = time.perf_counter() - started
+    process.communicate(b"exit\n", timeout=120)
+    return {"prompt_seconds": round(prompt, 3), "exit_seconds": round(time.perf_counter() - started, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench", "startup"))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    prompt_times(args.workdir, [])  # create the database and session once
+    imports = [import_times(args.workdir) for _ in range(args.repeat)]
+    runs = [prompt_times(args.workdir, []) for _ in range(args.repeat)]
+    result = {
+        "import_main_ms": statistics.median(run["main_ms"] for run in imports),
+        "slowest_imports_ms": imports[-1]["slowest"],
+        "prompt_seconds": statistics.median(run["prompt_seconds"] for run in runs),
+        "exit_seconds": statistics.median(run["exit_seconds"] for run in runs),
+    }
+    print(f"import main      {result['import_main_ms']:>9.1f} ms")
+    for name, milliseconds in result["slowest_imports_ms"].items():
+        print(f"  {name:<30} {milliseconds:>9.1f} ms")
+    print(f"first prompt     {result['prompt_seconds'] * 1000:>9.1f} ms")
+    print(f"ready and exited {result['exit_seconds'] * 1000:>9.1f} ms")
+    if args.output:
+        write_results(args.output, "bench_startup", [result], repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Micro-benchmark: date-range filters over the sorted timestamp index.
+
+Compares ``TimeIndex`` (binary search + slice over integer epochs) with the
+old approach of calling ``datetime.fromisoformat`` on every entry.
+
+    python -m benchmarks.bench_time_index
+    python -m benchmarks.bench_time_index --sizes 10000 100000 --repeat 50
+"""
+import argparse
+import datetime
+import random
+import time
+
+from journal_store.time_index import TimeIndex, to_epoch
+
+START = datetime.datetime(2015, 1, 1)
+
+
+def make_timestamps(size: int, seed: int = 7):
+    """``size`` sorted ISO timestamps spread over ten years."""
+    rng = random.Random(seed)
+    span = 10 * 365 * 24 * 3600
+    seconds = sorted(rng.randrange(span) for _ in range(size))
+    return [(START + datetime.timedelta(seconds=s)).isoformat() for s in seconds]
+
+
+def scan_range(timestamps, since, until):
+    """The pre-index filter: parse and compare every timestamp."""
+    return [t for t in timestamps
+            if since <= datetime.datetime.fromisoformat(t) < until]
+
+
+def time_call(func, repeat: int) -> float:
+    """Median wall time of ``func`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def run(sizes, repeat: int, scan_limit: int):
+    results = []
+    for size in sizes:
+        timestamps = make_timestamps(size)
+        index = TimeIndex((to_epoch(t), i) for i, t in enumerate(timestamps, 1))
+        # A 30-day window in the middle of the journal
+        since = START + datetime.timedelta(days=5 * 365)
+        until = since + datetime.timedelta(days=30)
+        since_epoch, until_epoch = to_epoch(since.isoformat()), to_epoch(until.isoformat())
+
+        def indexed():
+            low, high = index.span(since_epoch, until_epoch)
+            return index.ids[low:high]
+
+        row = {
+            "entries": size,
+            "matches": len(indexed()),
+            "index_ms": round(time_call(indexed, repeat), 4),
+            "scan_ms": None,
+        }
+        if size <= scan_limit:
+            row["scan_ms"] = round(time_call(lambda: scan_range(timestamps, since, until), max(1, repeat // 10)), 2)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scan-limit", type=int, default=1_000_000,
+                        help="skip the full-scan baseline above this many entries")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'matches':>8} {'index (ms)':>11} {'scan (ms)':>10}")
+    for row in run(args.sizes, args.repeat, args.scan_limit):
+        scan = "-" if row["scan_ms"] is None else f"{row['scan_ms']:.2f}"
+        print(f"{row['entries']:>10} {row['matches']:>8} {row['index_ms']:>11.4f} {scan:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: agent tool functions against synthetic journals of growing size.
+
+Each tool is called directly with a stub ``ToolContext`` (no model, no
+runner), so the numbers are the storage and indexing cost of a tool call.
+
+    python -m benchmarks.bench_tools
+    python -m benchmarks.bench_tools --sizes 1000 10000 100000 1000000 --output tools.json
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+from journal_store import configure_entry_store
+
+from memory_agent.sub_agents.journal_agent.agent import (
+    add_entry, search_entries, semantic_search, view_entries,
+)
+from memory_agent.sub_agents.summarizer_agent.agent import get_mood_trends, get_tag_stats
+
+from .common import time_call, write_results
+from .fakes import StubToolContext
+from .synthetic import BENCH_USER, build_journal
+
+# name -> call(tool_context); every tool gets all of its arguments, as from the model
+CASES = {
+    "view_entries.latest": lambda ctx: view_entries(ctx, None, None, None, None, None, None, 20, None),
+    "view_entries.mood": lambda ctx: view_entries(ctx, "stressed", None, None, None, None, None, 20, None),
+    "view_entries.tag": lambda ctx: view_entries(ctx, None, "travel", None, None, None, None, 20, None),
+    "view_entries.month": lambda ctx: view_entries(ctx, None, None, None, None, "2023-03-01", "2023-03-31", 20, None),
+    "view_entries.query": lambda ctx: view_entries(ctx, None, None, "work AND NOT stressed", None, None, None, 20, None),
+    "view_entries.query_month": lambda ctx: view_entries(ctx, None, None, "(travel OR friends) AND happy", None,
+                                                         "2023-03-01", "2023-03-31", 20, None),
+    "search_entries.term": lambda ctx: search_entries("sourdough", ctx, None, None, None),
+    "search_entries.phrase": lambda ctx: search_entries('"data pipeline"', ctx, None, None, None),
+    "semantic_search": lambda ctx: semantic_search("burned out after long meetings", ctx, None),
+    "get_mood_trends.month": lambda ctx: get_mood_trends(ctx, "month", None, None),
+    "get_tag_stats": lambda ctx: get_tag_stats(ctx, None, None, None),
+    "add_entry": lambda ctx: add_entry("Benchmark entry about coffee", ctx, "calm", "bench"),
+}
+
+
+def run(sizes, repeat: int, workdir: str, cases):
+    results = []
+    for size in sizes:
+        path = os.path.join(workdir, f"bench_{size}.db")
+        print(f"Preparing {size} entries in {path}...")
+        build_journal(path, size).close()
+        configure_entry_store(path)
+        context = StubToolContext(BENCH_USER)
+        for name in cases:
+            call = CASES[name]
+            # Tools log every call; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                call(context)  # warm caches and lazily built indexes
+                timing = time_call(lambda: call(context), repeat)
+            results.append({"entries": size, "tool": name, **timing})
+            print(f"{size:>10} {name:<24} {timing['median_ms']:>10.3f} {timing['p95_ms']:>10.3f}")
+        # add_entry grew the journal; rebuild it next time
+        configure_entry_store(":memory:")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--tools", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"),
+                        help="where synthetic journals are kept between runs")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'entries':>10} {'tool':<24} {'median ms':>10} {'p95 ms':>10}")
+    results = run(args.sizes, args.repeat, args.workdir, args.tools)
+    if args.output:
+        write_results(args.output, "tools", results, sizes=args.sizes, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark: full conversation turns through the ADK ``Runner`` with a fake model.
+
+Turns go through ``call_agent_async`` exactly as in ``main.py`` (manager,
+hand-off, sub-agent, tool calls, session events in SQLite), with every
+agent's model replaced by a deterministic local ``FakeLlm``. Timings are
+the framework and storage overhead per turn, plus ``--model-latency`` per
+model call if set.
+
+    python -m benchmarks.bench_turns
+    python -m benchmarks.bench_turns --sizes 1000 100000 --router --output turns.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+
+from journal_store import configure_entry_store
+from journal_store.session_service import JournalSessionService
+from memory_agent.agent import memory_agent
+from memory_agent.router import IntentRouter
+from utils import LatencyStats, call_agent_async
+
+from .common import summarize_timings, write_results
+from .fakes import use_fake_models
+from .synthetic import BENCH_USER, build_journal
+
+APP_NAME = "Journal Benchmark"
+
+TURNS = {
+    "view": "Show me my entries",
+    "search": "Find entries about sourdough",
+    "add": "I had a long walk by the river this morning",
+    "analyze": "Summarize my mood trends",
+    "set_name": "Call me Bench",
+}
+
+SESSION_SERVICES = {
+    "database": DatabaseSessionService,
+    "journal": JournalSessionService,
+}
+
+
+async def run_size(path: str, repeat: int, latency: float, use_router: bool, turns,
+                   session_service_name: str = "journal", stream: bool = False, answer_words: int = 0):
+    configure_entry_store(path)
+    models = use_fake_models(memory_agent, latency, answer_words)
+    session_service = SESSION_SERVICES[session_service_name](db_url=f"sqlite:///{path}")
+    session = session_service.create_session(
+        app_name=APP_NAME, user_id=BENCH_USER, state={"user_name": "Bench User", "entries_version": 0},
+    )
+    runner = Runner(agent=memory_agent, app_name=APP_NAME, session_service=session_service)
+    router = IntentRouter(session_service, APP_NAME, log=lambda message: None) if use_router else None
+
+    results = {}
+    for name in turns:
+        timings = []
+        latency_stats = LatencyStats()
+        calls_before = sum(model.calls for model in models.values())
+        chars_before = sum(model.prompt_chars for model in models.values())
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # The console output of a turn is not part of the measurement
+            with contextlib.redirect_stdout(io.StringIO()):
+                await call_agent_async(runner, BENCH_USER, session.id, TURNS[name], router=router,
+                                       stream=stream, latency=latency_stats)
+            timings.append((time.perf_counter() - started) * 1000)
+        first_text = sorted(latency_stats.first_text)
+        results[name] = {
+            **summarize_timings(timings),
+            "first_text_median_ms": round(first_text[len(first_text) // 2] * 1000, 2) if first_text else None,
+            "model_calls_per_turn": round((sum(m.calls for m in models.values()) - calls_before) / repeat, 2),
+            "prompt_chars_per_turn": round((sum(m.prompt_chars for m in models.values()) - chars_before) / repeat),
+        }
+    if hasattr(session_service, "close"):
+        session_service.close()
+    return results
+
+
+def run(sizes, repeat: int, latency: float, use_router: bool, workdir: str, turns,
+        session_service_name: str = "journal", stream: bool = False, answer_words: int = 0):
+    results = []
+    for size in sizes:
+        path = os.path.join(workdir, f"bench_turns_{size}.db")
+        print(f"Preparing {size} entries in {path}...")
+        build_journal(path, size).close()
+        per_turn = asyncio.run(run_size(path, repeat, latency, use_router, turns, session_service_name,
+                                        stream, answer_words))
+        for name, timing in per_turn.items():
+            results.append({"entries": size, "turn": name, "router": use_router, "stream": stream, **timing})
+            first_text = timing["first_text_median_ms"]
+            print(f"{size:>10} {name:<10} {timing['median_ms']:>10.2f} {timing['p95_ms']:>10.2f} "
+                  f"{first_text if first_text is not None else '-':>10} "
+                  f"{timing['model_calls_per_turn']:>6} {timing['prompt_chars_per_turn']:>8}")
+        configure_entry_store(":memory:")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--turns", nargs="+", choices=sorted(TURNS), default=list(TURNS))
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds awaited per fake model call")
+    parser.add_argument("--router", action="store_true", help="route turns through the intent router")
+    parser.add_argument("--stream", action="store_true", help="stream answers (SSE mode) as main.py does")
+    parser.add_argument("--answer-words", type=int, default=0, help="pad fake answers to this many words")
+    parser.add_argument("--session-service", choices=sorted(SESSION_SERVICES), default="journal",
+                        help="ADK's DatabaseSessionService or the WAL/write-behind JournalSessionService")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "journal-bench"),
+                        help="where synthetic journals are kept between runs")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    print(f"{'entries':>10} {'turn':<10} {'median ms':>10} {'p95 ms':>10} {'first ms':>10} {'calls':>6} {'chars':>8}")
+    results = run(args.sizes, args.repeat, args.model_latency, args.router, args.workdir, args.turns,
+                  args.session_service, args.stream, args.answer_words)
+    if args.output:
+        write_results(args.output, "turns", results, sizes=args.sizes, repeat=args.repeat,
+                      model_latency=args.model_latency, router=args.router,
+                      session_service=args.session_service, stream=args.stream,
+                      answer_words=args.answer_words)
+
+
+if __name__ == "__main__":
+    main()
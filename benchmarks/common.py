@@ -0,0 +1,49 @@
+"""Timing and reporting helpers shared by the benchmarks."""
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Callable, Iterable
+
+
+def time_call(func: Callable, repeat: int) -> dict:
+    """Wall time of ``func`` over ``repeat`` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarize_timings(timings)
+
+
+def summarize_timings(timings: Iterable[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "min_ms": round(timings[0], 4),
+    }
+
+
+def run_metadata() -> dict:
+    """Where and on which commit results were produced, so runs can be compared."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def write_results(path: str, benchmark: str, results: list, **settings):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": benchmark, **run_metadata(), "settings": settings, "results": results}, f, indent=2)
+    print(f"Results written to {path}")
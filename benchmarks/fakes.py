@@ -0,0 +1,228 @@
+"""Stand-ins for ADK pieces so benchmarks run offline and deterministically."""
+import asyncio
+import inspect
+import random
+import re
+from types import SimpleNamespace
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors, types
+
+from memory_agent.router import MANAGER, SUMMARIZER, UPDATE_USER_NAME, classify
+
+
+class StubToolContext:
+    """The parts of ``ToolContext`` the tools use: ``state`` and the invocation's user."""
+
+    def __init__(self, user_id: str, state: Optional[dict] = None):
+        self.state = state if state is not None else {"user_name": "Bench User", "entries_version": 0}
+        self._invocation_context = SimpleNamespace(user_id=user_id)
+
+
+class FakeLlm(BaseLlm):
+    """Deterministic local model that drives the real agents and tools.
+
+    The manager transfers to the sub-agent the intent router would pick; a
+    sub-agent calls one tool matching the request and then answers with a
+    short text. ``latency`` seconds are awaited per call to mimic a remote
+    model, and prompt sizes are recorded as a proxy for token usage.
+
+    When streamed, text answers arrive in eight-word chunks: the first after
+    ``first_chunk_share`` of the latency, the rest spread over the remainder,
+    then the merged text, as Gemini does in SSE mode. ``answer_words`` pads
+    answers to a report-like length.
+    """
+
+    latency: float = 0.0
+    first_chunk_share: float = 0.2
+    answer_words: int = 0
+    calls: int = 0
+    prompt_chars: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        self.prompt_chars += _prompt_chars(llm_request)
+        last = llm_request.contents[-1] if llm_request.contents else None
+        if last and any(part.function_response for part in last.parts or []):
+            response = last.parts[-1].function_response
+            text = f"Done: {response.name} ({_describe(response.response)})."
+            words = text.split()
+            filler = ["and", "the", "entries", "show", "a", "steady", "pattern"]
+            while len(words) < self.answer_words:
+                words.append(filler[len(words) % len(filler)])
+            part = types.Part(text=" ".join(words))
+        else:
+            part = self._next_step(llm_request, _last_user_text(llm_request))
+
+        if not (stream and part.text):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            yield LlmResponse(content=types.Content(role="model", parts=[part]))
+            return
+        words = part.text.split(" ")
+        chunks = [" ".join(words[i:i + 8]) + " " for i in range(0, len(words), 8)]
+        if self.latency:
+            await asyncio.sleep(self.latency * self.first_chunk_share)
+        for chunk in chunks:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+            if self.latency:
+                await asyncio.sleep(self.latency * (1 - self.first_chunk_share) / len(chunks))
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    def _next_step(self, llm_request: LlmRequest, text: str) -> types.Part:
+        tools = llm_request.tools_dict or {}
+        route = classify(text)
+        if route.target == UPDATE_USER_NAME and UPDATE_USER_NAME in tools:
+            return _call(tools, UPDATE_USER_NAME, name=route.argument)
+        if "transfer_to_agent" in tools and self.model == MANAGER:
+            target = SUMMARIZER if route.target == SUMMARIZER else "journal_agent"
+            return _call(tools, "transfer_to_agent", agent_name=target)
+        if route.intent == "add_entry" and "add_entry" in tools:
+            return _call(tools, "add_entry", entry=text)
+        if route.intent == "search_entries" and "search_entries" in tools:
+            query = re.sub(r"^(?:find|search|look for|look up)( entries)?( about| for)?\s+", "", text, flags=re.I)
+            return _call(tools, "search_entries", query=query)
+        if "view_entries" in tools:
+            return _call(tools, "view_entries", limit=20)
+        if "get_mood_trends" in tools:
+            return _call(tools, "get_mood_trends", granularity="month")
+        return types.Part(text="Okay.")
+
+
+class FlakyLlm(FakeLlm):
+    """``FakeLlm`` that fails like an overloaded remote model, reproducibly.
+
+    A call fails with 503 or 429 before answering with probability
+    ``failure_rate``. With probability ``mid_turn_failure_rate`` the answer
+    that follows a tool result is sent and then the call fails, as when a
+    connection drops at the end of a response: the tool's writes are done
+    and only a retry of the whole turn can finish it.
+    """
+
+    failure_rate: float = 0.0
+    mid_turn_failure_rate: float = 0.0
+    rng: random.Random
+    failures: int = 0
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        if self.rng.random() < self.failure_rate:
+            self.failures += 1
+            if self.latency:
+                await asyncio.sleep(self.latency / 4)
+            if self.rng.random() < 0.5:
+                raise errors.ServerError(503, {"error": {"code": 503, "message": "The model is overloaded.",
+                                                         "status": "UNAVAILABLE"}})
+            raise errors.ClientError(429, {"error": {"code": 429, "message": "Resource exhausted.",
+                                                     "status": "RESOURCE_EXHAUSTED"}})
+        last = llm_request.contents[-1] if llm_request.contents else None
+        after_tool = bool(last and any(part.function_response for part in last.parts or []))
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+        if after_tool and self.rng.random() < self.mid_turn_failure_rate:
+            self.failures += 1
+            raise errors.ServerError(502, {"error": {"code": 502, "message": "Connection reset.",
+                                                     "status": "UNAVAILABLE"}})
+
+
+class FakeTextModel:
+    """Deterministic local stand-in for ``memory_agent.llm.generate_text``.
+
+    Each call awaits ``latency`` seconds plus ``seconds_per_kchar`` per 1000
+    prompt characters, since a remote model takes longer on longer prompts,
+    and answers with a short summary naming the prompt's first line. Calls,
+    prompt sizes and the peak number of concurrent calls are recorded.
+    """
+
+    def __init__(self, latency: float = 0.0, seconds_per_kchar: float = 0.0, answer_words: int = 80):
+        self.latency = latency
+        self.seconds_per_kchar = seconds_per_kchar
+        self.answer_words = answer_words
+        self.calls = 0
+        self.prompt_chars = 0
+        self.max_prompt_chars = 0
+        self.active = 0
+        self.peak_concurrency = 0
+
+    async def __call__(self, prompt: str, model: Optional[str] = None) -> str:
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        self.max_prompt_chars = max(self.max_prompt_chars, len(prompt))
+        self.active += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.active)
+        try:
+            delay = self.latency + self.seconds_per_kchar * len(prompt) / 1000
+            if delay:
+                await asyncio.sleep(delay)
+        finally:
+            self.active -= 1
+        words = f"Summary {self.calls} of: {prompt.splitlines()[0][:80]}".split()
+        filler = ["the", "entries", "describe", "steady", "progress", "and", "a", "calm", "mood"]
+        while len(words) < self.answer_words:
+            words.append(filler[len(words) % len(filler)])
+        return " ".join(words)
+
+
+def _call(tools: dict, name: str, **args) -> types.Part:
+    """Function call with every parameter present, as the model would send it."""
+    func = getattr(tools[name], "func", None)
+    if func is not None:
+        for parameter in inspect.signature(func).parameters:
+            if parameter != "tool_context":
+                args.setdefault(parameter, None)
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents):
+        if content.role == "user":
+            texts = [part.text for part in content.parts or [] if part.text]
+            if texts:
+                return " ".join(texts)
+    return ""
+
+
+def _prompt_chars(llm_request: LlmRequest) -> int:
+    size = len(str(llm_request.config.system_instruction or "")) if llm_request.config else 0
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            size += len(part.text or "")
+            if part.function_response:
+                size += len(str(part.function_response.response))
+    return size
+
+
+def _describe(response: dict) -> str:
+    for key in ("count", "matching_count", "total_entries"):
+        if key in (response or {}):
+            return f"{key}={response[key]}"
+    return "ok"
+
+
+def use_fake_models(agent, latency: float = 0.0, answer_words: int = 0) -> dict:
+    """Swap every agent in the tree to a ``FakeLlm``; returns them by agent name."""
+    models = {agent.name: FakeLlm(model=agent.name, latency=latency, answer_words=answer_words)}
+    agent.model = models[agent.name]
+    for sub_agent in agent.sub_agents:
+        models.update(use_fake_models(sub_agent, latency, answer_words))
+    return models
+
+
+def use_flaky_models(agent, failure_rate: float, mid_turn_failure_rate: float = 0.0,
+                     latency: float = 0.0, seed: int = 7) -> dict:
+    """Swap every agent in the tree to a ``FlakyLlm`` sharing one seeded random generator."""
+    rng = random.Random(seed)
+
+    def swap(agent):
+        models = {agent.name: FlakyLlm(model=agent.name, latency=latency, failure_rate=failure_rate,
+                                       mid_turn_failure_rate=mid_turn_failure_rate, rng=rng)}
+        agent.model = models[agent.name]
+        for sub_agent in agent.sub_agents:
+            models.update(swap(sub_agent))
+        return models
+
+    return swap(agent)
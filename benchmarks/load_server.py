@@ -0,0 +1,132 @@
+"""Load generator for ``server.py``: many simulated users sending turns concurrently.
+
+Each user keeps one HTTP connection and its own session and sends turns
+back to back (optionally with think time). Reports throughput, rejections
+and latency percentiles.
+
+    python server.py --fake-model 0.2 &
+    python -m benchmarks.load_server --users 100 --turns 10
+    python -m benchmarks.load_server --users 500 --turns 5 --output load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from urllib.parse import urlparse
+
+from .common import summarize_timings, write_results
+
+MESSAGES = [
+    "Show me my entries",
+    "Find entries about coffee",
+    "I had a long walk by the river this morning",
+    "Summarize my mood trends",
+    "What did I write about work?",
+    "Today I finished the quarterly report and felt relieved",
+]
+
+
+async def post(reader, writer, host: str, path: str, payload: dict):
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length) or b"{}")
+
+
+async def simulate_user(user: int, args, host: str, port: int, stats: dict):
+    rng = random.Random(user)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        user_id = f"load-{user}"
+        status, created = await post(reader, writer, host, "/sessions", {"user_id": user_id})
+        session_id = created.get("session_id")
+        for _ in range(args.turns):
+            if args.think_time:
+                await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+            started = time.perf_counter()
+            try:
+                status, _ = await post(reader, writer, host, "/turn", {
+                    "user_id": user_id, "session_id": session_id, "message": rng.choice(MESSAGES),
+                })
+            except (ConnectionError, asyncio.IncompleteReadError):
+                stats["errors"] += 1
+                break
+            elapsed = (time.perf_counter() - started) * 1000
+            if status == 200:
+                stats["latencies"].append(elapsed)
+            elif status == 429:
+                stats["rejected"] += 1
+            else:
+                stats["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run(args) -> dict:
+    url = urlparse(args.url)
+    stats = {"latencies": [], "rejected": 0, "errors": 0}
+    started = time.perf_counter()
+    # Ramp users up gradually so connection setup is not the bottleneck
+    users = []
+    for user, delay in zip(range(args.users), itertools.count(0, args.ramp / max(1, args.users))):
+        users.append(asyncio.create_task(_delayed(delay, simulate_user(user, args, url.hostname, url.port, stats))))
+    await asyncio.gather(*users)
+    elapsed = time.perf_counter() - started
+    completed = len(stats["latencies"])
+    result = {
+        "users": args.users,
+        "turns_per_user": args.turns,
+        "completed": completed,
+        "rejected": stats["rejected"],
+        "errors": stats["errors"],
+        "seconds": round(elapsed, 2),
+        "turns_per_second": round(completed / elapsed, 2) if elapsed else 0.0,
+    }
+    if completed:
+        timings = summarize_timings(stats["latencies"])
+        ordered = sorted(stats["latencies"])
+        result.update(timings, p99_ms=round(ordered[min(completed - 1, int(completed * 0.99))], 2))
+    return result
+
+
+async def _delayed(delay: float, coroutine):
+    await asyncio.sleep(delay)
+    return await coroutine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10, help="turns per user")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between a user's turns")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which users start")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+    if args.output:
+        write_results(args.output, "load_server", [result], url=args.url)
+
+
+if __name__ == "__main__":
+    main()
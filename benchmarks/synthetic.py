@@ -0,0 +1,95 @@
+"""Synthetic journals for benchmarks.
+
+Entries are spread over several years in timestamp order, with a skewed
+mood distribution and topic-specific text and tags, so index selectivity,
+rollups and search behave roughly like a real journal.
+"""
+import datetime
+import os
+import random
+from typing import Iterator, List
+
+from journal_store import EntryStore
+
+BENCH_USER = "bench"
+
+MOODS = [
+    ("happy", 18), ("grateful", 12), ("tired", 12), ("calm", 10), ("stressed", 10),
+    ("excited", 8), ("anxious", 7), ("sad", 5), ("frustrated", 5), ("energetic", 5),
+    (None, 8),
+]
+
+# (tags, sentence templates) per topic
+TOPICS = [
+    (["work"], ["Long meeting about the {project} roadmap.", "Shipped the {project} release today.",
+                "Spent the afternoon debugging {project}.", "One-on-one with my manager went well."]),
+    (["work", "career"], ["Interviewed for the senior role.", "Asked for feedback on my {project} proposal."]),
+    (["family"], ["Dinner with mom and dad.", "Helped my sister move apartments.", "Kids had a school play."]),
+    (["health", "exercise"], ["Ran {distance} km along the river.", "Yoga class in the morning.",
+                              "Gym session, legs and back."]),
+    (["health"], ["Slept badly again.", "Doctor appointment, all fine.", "Cooked a healthy lunch."]),
+    (["friends"], ["Coffee with {friend} downtown.", "Board games at {friend}'s place."]),
+    (["travel"], ["Flight to {city} was delayed.", "Walked around the old town in {city}."]),
+    (["learning"], ["Finished a chapter of the {course} course.", "Practiced Spanish for half an hour."]),
+    (["food"], ["Tried the new ramen place.", "Baked sourdough bread."]),
+    ([], ["Quiet day at home.", "Rainy afternoon, read a book.", "Cleaned the apartment."]),
+]
+
+FILLERS = {
+    "project": ["search", "billing", "mobile app", "data pipeline", "onboarding"],
+    "distance": ["5", "8", "10", "12"],
+    "friend": ["Sam", "Alex", "Priya", "Jordan", "Mia"],
+    "city": ["Lisbon", "Tokyo", "Chicago", "Berlin"],
+    "course": ["machine learning", "statistics", "design"],
+}
+
+REFLECTIONS = [
+    "Feeling good about it.", "Need to rest more.", "Not sure how I feel.",
+    "Grateful for small things.", "Tomorrow should be better.", "",
+]
+
+
+def generate_entries(size: int, seed: int = 7, years: int = 5,
+                     end: datetime.datetime = datetime.datetime(2025, 1, 1)) -> Iterator[dict]:
+    """Yield ``size`` entries in timestamp order, ending at ``end``."""
+    rng = random.Random(seed)
+    moods, mood_weights = zip(*MOODS)
+    start = end - datetime.timedelta(days=365 * years)
+    step = (end - start) / size
+    for i in range(size):
+        tags, templates = rng.choice(TOPICS)
+        text = rng.choice(templates).format(**{key: rng.choice(values) for key, values in FILLERS.items()})
+        text = f"{text} {rng.choice(REFLECTIONS)}".strip()
+        timestamp = start + step * i + datetime.timedelta(seconds=rng.randrange(max(1, int(step.total_seconds()))))
+        yield {
+            "text": text,
+            "timestamp": timestamp.replace(microsecond=0).isoformat(),
+            "mood": rng.choices(moods, mood_weights)[0],
+            "tags": list(tags) + (["weekend"] if timestamp.weekday() >= 5 else []),
+        }
+
+
+def build_journal(path: str, size: int, user_id: str = BENCH_USER, seed: int = 7,
+                  batch_size: int = 5000) -> EntryStore:
+    """Open (or create and fill) a benchmark database holding ``size`` entries.
+
+    Databases are reused across runs when they already hold the right number
+    of entries, since filling a million-entry journal takes a few minutes.
+    """
+    store = EntryStore(path)
+    if store.count(user_id) == size:
+        return store
+    store.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    store = EntryStore(path)
+    batch: List[dict] = []
+    for entry in generate_entries(size, seed):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            store.add_entries(user_id, batch)
+            batch = []
+    if batch:
+        store.add_entries(user_id, batch)
+    return store
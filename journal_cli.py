@@ -0,0 +1,134 @@
+"""Command line tools for the journal database (no LLM involved).
+
+    python journal_cli.py import my_journal.jsonl
+    python journal_cli.py import exports/entries.csv --user rz --batch-size 5000
+    python journal_cli.py import ~/notes/journal/ --format markdown
+    python journal_cli.py import old_diary.csv --suggest-metadata
+    python journal_cli.py export backup.jsonl.gz
+    python journal_cli.py export work-2024.csv --start 2024-01-01 --end 2024-12-31 --tag work
+    python journal_cli.py compact --keep-events 200 --keep-days 90 --vacuum
+"""
+import argparse
+import os
+import sys
+
+from journal_store import configure_entry_store
+from journal_store import compaction, exporter, importer
+
+# Defaults match main.py
+DEFAULT_DB_PATH = "./my_daily_journal_data.db"
+DEFAULT_USER_ID = "rz"
+DEFAULT_APP_NAME = "Journal Manager System"
+
+
+def run_import(args) -> int:
+    store = configure_entry_store(args.db, log=print)
+    print(f"Importing {args.path} for user {args.user}...")
+    result = importer.import_entries(
+        store, args.user, args.path, fmt=args.format,
+        batch_size=args.batch_size, restart=args.restart, suggest=args.suggest_metadata,
+    )
+    print(f"Imported {result['imported']} entries, skipped {result['skipped']} "
+          f"in {result['elapsed_seconds']}s ({result['entries_per_second']} entries/s)")
+    if args.suggest_metadata:
+        print(f"Suggested a mood or tags for {result['suggested']} entries")
+    for error in result["errors"]:
+        print(f"  skipped {error}")
+    return 0
+
+
+def run_export(args) -> int:
+    store = configure_entry_store(args.db)
+    fmt = args.format or ("csv" if ".csv" in args.path else "jsonl")
+    # Keep stdout clean when the export itself goes there
+    log = (lambda message: print(message, file=sys.stderr)) if args.path == "-" else print
+    exporter.export_entries(
+        store, args.user, args.path, fmt=fmt, start=args.start, end=args.end,
+        mood=args.mood, tags=args.tag, compress=args.gzip or None, log=log,
+    )
+    return 0
+
+
+def run_compact(args) -> int:
+    from journal_store.session_service import JournalSessionService
+
+    store = configure_entry_store(args.db, log=print)
+    session_service = JournalSessionService(db_url=f"sqlite:///{args.db}")
+    size_before = _database_size(args.db)
+    users = compaction.session_users(session_service, args.app) if args.all_users else [args.user]
+    archive = None if args.no_archive else (args.archive_dir or compaction.archive_dir(args.db))
+    pruned = 0
+    for user_id in users:
+        results = compaction.compact_user_sessions(
+            session_service, store, args.app, user_id,
+            keep_events=args.keep_events, keep_days=args.keep_days, archive_path=archive,
+        )
+        pruned += sum(result["pruned"] for result in results)
+    session_service.close()
+    if args.vacuum:
+        compaction.vacuum(session_service)
+    print(f"Pruned {pruned} events from the sessions of {len(users)} user(s)"
+          + (f", archived to {archive}" if archive and pruned else ""))
+    print(f"Database size: {size_before / 1e6:.1f} MB -> {_database_size(args.db) / 1e6:.1f} MB")
+    return 0
+
+
+def _database_size(path: str) -> int:
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Journal database tools")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    parser.add_argument("--user", default=DEFAULT_USER_ID, help="user id that owns the entries")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import", help="bulk import entries from JSONL, CSV or a directory of dated Markdown files"
+    )
+    import_parser.add_argument("path", help="JSONL/CSV file or directory of YYYY-MM-DD*.md files")
+    import_parser.add_argument("--format", choices=importer.FORMATS, help="source format (guessed from the path)")
+    import_parser.add_argument("--batch-size", type=int, default=1000, help="entries per transaction")
+    import_parser.add_argument("--restart", action="store_true",
+                               help="ignore saved progress and import from the beginning")
+    import_parser.add_argument("--suggest-metadata", action="store_true",
+                               help="suggest a mood and tags for entries without them")
+    import_parser.set_defaults(func=run_import)
+
+    export_parser = commands.add_parser("export", help="stream entries to a JSONL or CSV file")
+    export_parser.add_argument("path", help='output file ("-" for stdout, ".gz" suffix to compress)')
+    export_parser.add_argument("--format", choices=exporter.FORMATS, help="output format (guessed from the path)")
+    export_parser.add_argument("--start", help="first date to export (YYYY-MM-DD)")
+    export_parser.add_argument("--end", help="last date to export (YYYY-MM-DD, inclusive)")
+    export_parser.add_argument("--mood", help="only export entries with this mood")
+    export_parser.add_argument("--tag", help="only export entries with any of these comma-separated tags")
+    export_parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    export_parser.set_defaults(func=run_export)
+
+    compact_parser = commands.add_parser(
+        "compact", help="prune old session events (archived first) and snapshot session state"
+    )
+    compact_parser.add_argument("--app", default=DEFAULT_APP_NAME, help="ADK app name of the sessions")
+    compact_parser.add_argument("--all-users", action="store_true", help="compact the sessions of every user")
+    compact_parser.add_argument("--keep-events", type=int, default=compaction.DEFAULT_KEEP_EVENTS,
+                                help="most recent events kept per session")
+    compact_parser.add_argument("--keep-days", type=float, default=compaction.DEFAULT_KEEP_DAYS,
+                                help="prune events older than this many days (0 keeps any age)")
+    compact_parser.add_argument("--archive-dir", help="where pruned events are archived (default: <db>.archive)")
+    compact_parser.add_argument("--no-archive", action="store_true", help="delete pruned events without a copy")
+    compact_parser.add_argument("--vacuum", action="store_true", help="shrink the database file afterwards")
+    compact_parser.set_defaults(func=run_compact)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
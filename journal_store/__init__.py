@@ -0,0 +1,3 @@
+from .context import journal_user_id, next_write_key, open_journal, turn_scope
+from .entries import EntryStore, configure_entry_store, get_entry_store
+from .migrations import SCHEMA_VERSION, migrate_session_entries
@@ -0,0 +1,198 @@
+import datetime
+import itertools
+import json
+from typing import Dict, List, Optional
+
+GRANULARITIES = ("day", "week", "month")
+
+# Every bucket is keyed by the ISO date of its first day, so date ranges can be
+# answered with a plain BETWEEN on the primary key.
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_entry_rollups (
+    user_id TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, granularity, bucket)
+);
+CREATE TABLE IF NOT EXISTS journal_mood_rollups (
+    user_id TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, granularity, bucket, mood)
+);
+CREATE TABLE IF NOT EXISTS journal_tag_rollups (
+    user_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket, tag)
+);
+CREATE TABLE IF NOT EXISTS journal_tag_pair_rollups (
+    user_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    tag_a TEXT NOT NULL,
+    tag_b TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket, tag_a, tag_b)
+);
+"""
+
+ROLLUP_TABLES = (
+    "journal_entry_rollups",
+    "journal_mood_rollups",
+    "journal_tag_rollups",
+    "journal_tag_pair_rollups",
+)
+
+
+def bucket_start(day: datetime.date, granularity: str) -> datetime.date:
+    """Return the first day of the ``granularity`` bucket containing ``day``."""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def bucket_label(start: str, granularity: str) -> str:
+    """Human readable name for a bucket: 2024-03-05, 2024-W10 or 2024-03."""
+    if granularity == "week":
+        year, week, _ = datetime.date.fromisoformat(start).isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == "month":
+        return start[:7]
+    return start
+
+
+def create_rollups(conn) -> bool:
+    """Create the rollup tables. Returns True if they did not exist yet."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'journal_entry_rollups'"
+    ).fetchone()
+    conn.executescript(ROLLUP_SCHEMA)
+    return not exists
+
+
+def record_entry(conn, user_id: str, timestamp: str, mood: Optional[str], tags: List[str]):
+    """Add one entry to every rollup. Runs inside the entry insert transaction."""
+    day = datetime.date.fromisoformat(timestamp[:10])
+    for granularity in GRANULARITIES:
+        bucket = bucket_start(day, granularity).isoformat()
+        conn.execute(
+            "INSERT INTO journal_entry_rollups (user_id, granularity, bucket, count) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (user_id, granularity, bucket) DO UPDATE SET count = count + 1",
+            (user_id, granularity, bucket),
+        )
+        if mood:
+            conn.execute(
+                "INSERT INTO journal_mood_rollups (user_id, granularity, bucket, mood, count) "
+                "VALUES (?, ?, ?, ?, 1) ON CONFLICT (user_id, granularity, bucket, mood) DO UPDATE SET count = count + 1",
+                (user_id, granularity, bucket, mood),
+            )
+    bucket = day.isoformat()
+    conn.executemany(
+        "INSERT INTO journal_tag_rollups (user_id, bucket, tag, count) VALUES (?, ?, ?, 1) "
+        "ON CONFLICT (user_id, bucket, tag) DO UPDATE SET count = count + 1",
+        [(user_id, bucket, tag) for tag in tags],
+    )
+    conn.executemany(
+        "INSERT INTO journal_tag_pair_rollups (user_id, bucket, tag_a, tag_b, count) VALUES (?, ?, ?, ?, 1) "
+        "ON CONFLICT (user_id, bucket, tag_a, tag_b) DO UPDATE SET count = count + 1",
+        [(user_id, bucket, a, b) for a, b in itertools.combinations(sorted(tags), 2)],
+    )
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup from ``journal_entries`` (used once for old databases)."""
+    for table in ROLLUP_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    rows = conn.execute("SELECT user_id, timestamp, mood, tags FROM journal_entries")
+    for user_id, timestamp, mood, tags in rows.fetchall():
+        record_entry(conn, user_id, timestamp, mood, json.loads(tags))
+
+
+def _range_params(start: Optional[str], end: Optional[str]):
+    return (start or "0000-00-00")[:10], (end or "9999-99-99")[:10]
+
+
+def entry_trends(conn, user_id: str, granularity: str = "month",
+                 start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+    """Entry and mood counts per bucket between ``start`` and ``end`` (ISO dates)."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    # Include the bucket that contains ``start`` even if it begins earlier
+    if start:
+        start = bucket_start(datetime.date.fromisoformat(start[:10]), granularity).isoformat()
+    low, high = _range_params(start, end)
+    buckets: Dict[str, dict] = {}
+    for bucket, count in conn.execute(
+        "SELECT bucket, count FROM journal_entry_rollups "
+        "WHERE user_id = ? AND granularity = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+        (user_id, granularity, low, high),
+    ):
+        buckets[bucket] = {
+            "period": bucket_label(bucket, granularity),
+            "start": bucket,
+            "entries": count,
+            "moods": {},
+        }
+    for bucket, mood, count in conn.execute(
+        "SELECT bucket, mood, count FROM journal_mood_rollups "
+        "WHERE user_id = ? AND granularity = ? AND bucket BETWEEN ? AND ? ORDER BY bucket, count DESC",
+        (user_id, granularity, low, high),
+    ):
+        buckets[bucket]["moods"][mood] = count
+    return list(buckets.values())
+
+
+def entry_total(conn, user_id: str, start: Optional[str] = None,
+                end: Optional[str] = None) -> int:
+    """Number of entries between ``start`` and ``end`` (ISO dates, inclusive)."""
+    low, high = _range_params(start, end)
+    row = conn.execute(
+        "SELECT coalesce(sum(count), 0) FROM journal_entry_rollups "
+        "WHERE user_id = ? AND granularity = 'day' AND bucket BETWEEN ? AND ?",
+        (user_id, low, high),
+    ).fetchone()
+    return row[0]
+
+
+def mood_totals(conn, user_id: str, start: Optional[str] = None,
+                end: Optional[str] = None) -> List[tuple]:
+    """(mood, count) totals over a date range, most frequent first."""
+    # Monthly buckets are enough when the whole journal is requested
+    granularity = "day" if start or end else "month"
+    low, high = _range_params(start, end)
+    return [tuple(row) for row in conn.execute(
+        "SELECT mood, sum(count) AS n FROM journal_mood_rollups "
+        "WHERE user_id = ? AND granularity = ? AND bucket BETWEEN ? AND ? "
+        "GROUP BY mood ORDER BY n DESC, mood",
+        (user_id, granularity, low, high),
+    )]
+
+
+def tag_totals(conn, user_id: str, start: Optional[str] = None,
+               end: Optional[str] = None) -> List[tuple]:
+    """(tag, count) totals over a date range, most frequent first."""
+    low, high = _range_params(start, end)
+    return [tuple(row) for row in conn.execute(
+        "SELECT tag, sum(count) AS n FROM journal_tag_rollups "
+        "WHERE user_id = ? AND bucket BETWEEN ? AND ? GROUP BY tag ORDER BY n DESC, tag",
+        (user_id, low, high),
+    )]
+
+
+def tag_pair_totals(conn, user_id: str, start: Optional[str] = None,
+                    end: Optional[str] = None) -> List[tuple]:
+    """(tag_a, tag_b, count) co-occurrence totals over a date range."""
+    low, high = _range_params(start, end)
+    return [tuple(row) for row in conn.execute(
+        "SELECT tag_a, tag_b, sum(count) AS n FROM journal_tag_pair_rollups "
+        "WHERE user_id = ? AND bucket BETWEEN ? AND ? GROUP BY tag_a, tag_b ORDER BY n DESC, tag_a, tag_b",
+        (user_id, low, high),
+    )]
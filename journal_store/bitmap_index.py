@@ -0,0 +1,420 @@
+"""Per-user mood and tag bitmaps with boolean filter expressions.
+
+Each of a user's entries gets an ordinal (its position in id order, so new
+entries append). Every mood and tag keeps the sorted ordinals of its
+entries and, once used for a membership test, a packed bitmap of them.
+Filter expressions such as ``work AND NOT stressed`` or
+``(travel OR friends) AND mood:happy`` are evaluated on these sets, and
+date ranges come from the user's ``TimeIndex``, so matches are counted and
+ordered without reading entry bodies.
+
+The planner generates candidates from the most selective positive filter
+(a term, an OR of terms or the date range) and tests the rest against
+them in order of selectivity, so the cost follows the smallest set rather
+than the journal size.
+"""
+import re
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .time_index import TimeIndex, from_epoch
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(,)|((?i:tag|mood):)?"([^"]*)"|([^\s(),"]+))')
+_OPERATORS = {"and", "or", "not"}
+_KINDS = ("tag", "mood")
+
+
+# ----- Expressions -----
+
+class Term:
+    """A tag or mood; ``kind`` None matches either."""
+
+    __slots__ = ("kind", "name")
+
+    def __init__(self, kind: Optional[str], name: str):
+        self.kind = kind
+        self.name = name
+
+    def __repr__(self):
+        return f"{self.kind}:{self.name}" if self.kind else self.name
+
+
+class Not:
+    __slots__ = ("child",)
+
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return f"NOT {self.child!r}"
+
+
+class And:
+    __slots__ = ("children",)
+
+    def __init__(self, children: list):
+        self.children = children
+
+    def __repr__(self):
+        return "(" + " AND ".join(map(repr, self.children)) + ")"
+
+
+class Or:
+    __slots__ = ("children",)
+
+    def __init__(self, children: list):
+        self.children = children
+
+    def __repr__(self):
+        return "(" + " OR ".join(map(repr, self.children)) + ")"
+
+
+class DateRange:
+    """Entries with since <= epoch < until, served from the time index."""
+
+    __slots__ = ("since", "until")
+
+    def __init__(self, since: Optional[int], until: Optional[int]):
+        self.since = since
+        self.until = until
+
+    def __repr__(self):
+        since = "" if self.since is None else from_epoch(self.since)
+        until = "" if self.until is None else from_epoch(self.until)
+        return f"date[{since}, {until})"
+
+
+def conjoin(nodes: list):
+    """AND of ``nodes`` with nested ANDs flattened, so the planner sees every operand (None if empty)."""
+    children = []
+    for node in nodes:
+        if isinstance(node, And):
+            children.extend(node.children)
+        elif node is not None:
+            children.append(node)
+    if not children:
+        return None
+    return children[0] if len(children) == 1 else And(children)
+
+
+def parse_filter(expression: str):
+    """Parse a boolean filter over tags and moods.
+
+    Terms are tag or mood names, optionally prefixed with ``tag:`` or
+    ``mood:`` (bare names match either) and quoted if they contain spaces
+    (``tag:"self care"``).
+    ``NOT`` binds tighter than ``AND``, which binds tighter than ``OR``;
+    adjacent terms mean AND and commas mean OR, so ``work, family`` keeps
+    the meaning of a comma-separated tag list.
+
+    Returns:
+        The expression tree, or None for an empty expression
+
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    tokens = _tokenize(expression)
+    if not tokens:
+        return None
+    node, position = _parse_or(tokens, 0)
+    if position != len(tokens):
+        raise ValueError(f"Unexpected '{tokens[position][1]}' in filter '{expression}'")
+    return node
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Cannot parse filter '{expression}'")
+        position = match.end()
+        opening, closing, comma, prefix, quoted, word = match.groups()
+        if opening:
+            tokens.append(("(", "("))
+        elif closing:
+            tokens.append((")", ")"))
+        elif comma:
+            tokens.append(("or", ","))
+        elif quoted is not None:
+            tokens.append(("term", (prefix or "") + quoted))
+        elif word.lower() in _OPERATORS:
+            tokens.append((word.lower(), word))
+        else:
+            tokens.append(("term", word))
+    return tokens
+
+
+def _parse_or(tokens, position):
+    children = []
+    while True:
+        node, position = _parse_and(tokens, position)
+        children.append(node)
+        if position < len(tokens) and tokens[position][0] == "or":
+            position += 1
+            continue
+        return (children[0] if len(children) == 1 else Or(children)), position
+
+
+def _parse_and(tokens, position):
+    children = []
+    while True:
+        node, position = _parse_not(tokens, position)
+        children.append(node)
+        if position < len(tokens) and tokens[position][0] == "and":
+            position += 1
+        elif not (position < len(tokens) and tokens[position][0] in ("term", "not", "(")):
+            return (children[0] if len(children) == 1 else And(children)), position
+
+
+def _parse_not(tokens, position):
+    if position >= len(tokens):
+        raise ValueError("Filter ends where a term was expected")
+    kind, text = tokens[position]
+    if kind == "not":
+        child, position = _parse_not(tokens, position + 1)
+        return Not(child), position
+    if kind == "(":
+        node, position = _parse_or(tokens, position + 1)
+        if position >= len(tokens) or tokens[position][0] != ")":
+            raise ValueError("Missing ')' in filter")
+        return node, position + 1
+    if kind != "term":
+        raise ValueError(f"Unexpected '{text}' in filter")
+    return _term(text), position + 1
+
+
+def _term(text: str) -> Term:
+    prefix, _, name = text.partition(":")
+    if name and prefix.lower() in _KINDS:
+        kind, text = prefix.lower(), name
+    else:
+        kind = None
+    name = text.strip().lower()
+    if not name:
+        raise ValueError("Empty term in filter")
+    return Term(kind, name)
+
+
+# ----- Index -----
+
+class _Postings:
+    """Sorted ordinals of one tag or mood, with a packed bitmap built on demand."""
+
+    __slots__ = ("ordinals", "_array", "_bits")
+
+    def __init__(self):
+        self.ordinals = array("q")
+        self._array = None
+        self._bits = None
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def add(self, ordinal: int):
+        self.ordinals.append(ordinal)
+        self._array = None
+        if self._bits is not None and ordinal >> 3 < len(self._bits):
+            self._bits[ordinal >> 3] |= np.uint8(1 << (ordinal & 7))
+
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            self._array = np.frombuffer(self.ordinals[:], dtype=np.int64)
+        return self._array
+
+    def contains(self, ordinals: np.ndarray, size: int) -> np.ndarray:
+        """Membership of each of ``ordinals`` (all below ``size``) as a boolean array."""
+        if self._bits is None or len(self._bits) * 8 < size:
+            # Room for new entries, which set their bit in add()
+            mask = np.zeros(size + size // 4 + 64, dtype=bool)
+            mask[self.array()] = True
+            self._bits = np.packbits(mask, bitorder="little")
+        return ((self._bits[ordinals >> 3] >> (ordinals & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+_EMPTY = _Postings()
+
+
+class BitmapIndex:
+    """Mood and tag sets of one user's entries, evaluated together with a ``TimeIndex``."""
+
+    def __init__(self, rows: Iterable[Tuple[int, int, Optional[str], Iterable[str]]] = ()):
+        self.ids = array("q")
+        self.epochs = array("q")
+        self.moods = {}
+        self.tags = {}
+        self._ids = self._epochs = None
+        for entry_id, epoch, mood, tags in rows:
+            self.add(entry_id, epoch, mood, tags)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, entry_id: int, epoch: int, mood: Optional[str], tags: Iterable[str]):
+        """Append an entry; ids must arrive in increasing order, as the store assigns them."""
+        ordinal = len(self.ids)
+        self.ids.append(entry_id)
+        self.epochs.append(epoch)
+        self._ids = self._epochs = None
+        if mood:
+            self.moods.setdefault(mood, _Postings()).add(ordinal)
+        for tag in tags:
+            self.tags.setdefault(tag, _Postings()).add(ordinal)
+
+    def _columns(self):
+        if self._ids is None:
+            # Copies, so the arrays can still grow while these are in use
+            self._ids = np.frombuffer(self.ids[:], dtype=np.int64)
+            self._epochs = np.frombuffer(self.epochs[:], dtype=np.int64)
+        return self._ids, self._epochs
+
+    # ----- Evaluation -----
+
+    def select(self, node, time_index: TimeIndex, since: Optional[int] = None,
+               until: Optional[int] = None) -> np.ndarray:
+        """Ordinals of the entries matching ``node`` within [since, until), in ordinal order."""
+        if since is not None or until is not None:
+            node = conjoin([node, DateRange(since, until)])
+        if node is None:
+            return np.arange(len(self), dtype=np.int64)
+        return self._generate(node, time_index)
+
+    def count(self, node, time_index: TimeIndex, since: Optional[int] = None,
+              until: Optional[int] = None) -> int:
+        return len(self.select(node, time_index, since, until))
+
+    def page(self, ordinals: np.ndarray, limit: int, after: Optional[Tuple[int, int]] = None,
+             newest_first: bool = True) -> Tuple[List[int], bool]:
+        """Entry ids of one page of ``ordinals`` in (epoch, id) order, and whether more follow."""
+        ids, epochs = self._columns()
+        if after is not None and len(ordinals):
+            candidate_epochs, candidate_ids = epochs[ordinals], ids[ordinals]
+            if newest_first:
+                keep = (candidate_epochs < after[0]) | ((candidate_epochs == after[0]) & (candidate_ids < after[1]))
+            else:
+                keep = (candidate_epochs > after[0]) | ((candidate_epochs == after[0]) & (candidate_ids > after[1]))
+            ordinals = ordinals[keep]
+        more = len(ordinals) > limit
+        if more:
+            # Only the entries up to the limit-th epoch need a full sort
+            candidate_epochs = epochs[ordinals]
+            if newest_first:
+                threshold = np.partition(candidate_epochs, len(ordinals) - limit)[len(ordinals) - limit]
+                ordinals = ordinals[candidate_epochs >= threshold]
+            else:
+                threshold = np.partition(candidate_epochs, limit - 1)[limit - 1]
+                ordinals = ordinals[candidate_epochs <= threshold]
+        # Ordinals follow ids, so ties on the epoch are already in id order
+        order = ordinals[np.argsort(epochs[ordinals], kind="stable")]
+        if newest_first:
+            order = order[::-1]
+        return ids[order[:limit]].tolist(), more
+
+    def estimate(self, node, time_index: TimeIndex) -> int:
+        """Upper bound on the matches of ``node``, from set sizes alone."""
+        if isinstance(node, Term):
+            return sum(len(postings) for postings in self._postings(node))
+        if isinstance(node, DateRange):
+            return time_index.count(node.since, node.until)
+        if isinstance(node, Not):
+            return len(self) - self.estimate(node.child, time_index) if isinstance(node.child, Term) else len(self)
+        if isinstance(node, And):
+            return min(self.estimate(child, time_index) for child in node.children)
+        return min(len(self), sum(self.estimate(child, time_index) for child in node.children))
+
+    def plan(self, node, time_index: TimeIndex) -> Tuple[Optional[object], List[object]]:
+        """Split an AND into the set to generate candidates from and the filters to test, in order.
+
+        Candidates come from the positive child with the fewest entries
+        (None means every entry); the other children are tested most
+        selective first, so each test runs on as few candidates as possible.
+        """
+        children = node.children if isinstance(node, And) else [node]
+        sized = sorted(((self.estimate(child, time_index), number, child)
+                        for number, child in enumerate(children)), key=lambda item: item[:2])
+        generator = next((child for _, _, child in sized if not isinstance(child, Not)), None)
+        return generator, [child for _, _, child in sized if child is not generator]
+
+    def explain(self, node, time_index: TimeIndex, since: Optional[int] = None,
+                until: Optional[int] = None) -> List[str]:
+        """The plan of a query as readable steps (for debugging and benchmarks)."""
+        if since is not None or until is not None:
+            node = conjoin([node, DateRange(since, until)])
+        if node is None:
+            return [f"all {len(self)} entries"]
+        generator, filters = self.plan(node, time_index)
+        steps = [f"generate {generator!r} (~{self.estimate(generator, time_index)})" if generator is not None
+                 else f"generate all {len(self)} entries"]
+        steps.extend(f"filter {child!r} (~{self.estimate(child, time_index)})" for child in filters)
+        return steps
+
+    def _postings(self, term: Term) -> List[_Postings]:
+        found = []
+        if term.kind in (None, "tag"):
+            found.append(self.tags.get(term.name, _EMPTY))
+        if term.kind in (None, "mood"):
+            found.append(self.moods.get(term.name, _EMPTY))
+        return found
+
+    def _generate(self, node, time_index: TimeIndex) -> np.ndarray:
+        """Sorted ordinals matching ``node``."""
+        if isinstance(node, Term):
+            sets = [postings.array() for postings in self._postings(node) if len(postings)]
+            if not sets:
+                return np.empty(0, dtype=np.int64)
+            return sets[0] if len(sets) == 1 else np.union1d(*sets)
+        if isinstance(node, DateRange):
+            low, high = time_index.span(node.since, node.until)
+            ids, _ = self._columns()
+            entry_ids = np.frombuffer(time_index.ids[low:high], dtype=np.int64)
+            return np.sort(np.searchsorted(ids, entry_ids))
+        if isinstance(node, Or):
+            result = self._generate(node.children[0], time_index)
+            for child in node.children[1:]:
+                result = np.union1d(result, self._generate(child, time_index))
+            return result
+        generator, filters = self.plan(node, time_index)
+        if generator is None:
+            candidates = np.arange(len(self), dtype=np.int64)
+        else:
+            candidates = self._generate(generator, time_index)
+        for child in filters:
+            if not len(candidates):
+                break
+            candidates = candidates[self._contains(child, candidates, time_index)]
+        return candidates
+
+    def _contains(self, node, ordinals: np.ndarray, time_index: TimeIndex) -> np.ndarray:
+        """Boolean membership of each of ``ordinals`` in ``node``."""
+        if isinstance(node, Term):
+            mask = np.zeros(len(ordinals), dtype=bool)
+            for postings in self._postings(node):
+                if len(postings):
+                    mask |= postings.contains(ordinals, len(self))
+            return mask
+        if isinstance(node, DateRange):
+            _, epochs = self._columns()
+            candidate_epochs = epochs[ordinals]
+            mask = np.ones(len(ordinals), dtype=bool)
+            if node.since is not None:
+                mask &= candidate_epochs >= node.since
+            if node.until is not None:
+                mask &= candidate_epochs < node.until
+            return mask
+        if isinstance(node, Not):
+            return ~self._contains(node.child, ordinals, time_index)
+        if isinstance(node, And):
+            keep = np.arange(len(ordinals))
+            for child in node.children:
+                keep = keep[self._contains(child, ordinals[keep], time_index)]
+            mask = np.zeros(len(ordinals), dtype=bool)
+            mask[keep] = True
+            return mask
+        mask = np.zeros(len(ordinals), dtype=bool)
+        for child in node.children:
+            mask |= self._contains(child, ordinals, time_index)
+        return mask
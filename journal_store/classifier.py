@@ -0,0 +1,297 @@
+"""Local mood and tag suggestions for new entries.
+
+``add_entry`` used to rely on the model to pick a mood and tags for every
+entry, which costs output tokens and often a second round trip when the
+model forgot them. ``EntryClassifier`` fills in what is missing without a
+model call: keyword lexicons cover a new journal, and a naive Bayes model
+counted from the user's own labelled entries learns their vocabulary
+(their tag names, what "the sprint" usually means for them). Training is
+incremental, one entry at a time, so it is kept current as entries are
+added instead of being retrained. A suggestion costs a tokenization and a
+few dictionary lookups per word, a few microseconds per entry.
+"""
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .vectors import STOPWORDS, tokenize
+
+# Labelled entries needed before the learned model is trusted over the lexicons alone
+MIN_TRAINING_ENTRIES = int(os.getenv("JOURNAL_CLASSIFIER_MIN_ENTRIES", "20"))
+# Probability the learned model must give its best mood to suggest it
+MIN_MOOD_PROBABILITY = float(os.getenv("JOURNAL_CLASSIFIER_MIN_MOOD_PROBABILITY", "0.6"))
+# Probability the learned model must give a tag to suggest it
+MIN_TAG_PROBABILITY = float(os.getenv("JOURNAL_CLASSIFIER_MIN_TAG_PROBABILITY", "0.8"))
+MAX_SUGGESTED_TAGS = 3
+# Additive smoothing of the word counts
+SMOOTHING = 0.5
+
+# Suggestion flags stored in journal_entries.suggested
+SUGGESTED_MOOD = 1
+SUGGESTED_TAGS = 2
+
+MOOD_LEXICON = {
+    "happy": "happy glad great wonderful awesome fantastic joy joyful delighted cheerful amazing lovely",
+    "grateful": "grateful thankful gratitude blessed appreciate appreciated",
+    "excited": "excited thrilled pumped eager",
+    "calm": "calm relaxed relaxing peaceful serene chill",
+    "energetic": "energetic energized motivated refreshed",
+    "content": "content satisfied",
+    "tired": "tired exhausted sleepy drained fatigue fatigued slept_badly barely_slept",
+    "stressed": "stressed stress stressful overwhelmed hectic swamped under_pressure",
+    "anxious": "anxious anxiety nervous worried worry worrying uneasy",
+    "sad": "sad unhappy lonely heartbroken depressed crying cried miserable",
+    "frustrated": "frustrated frustrating annoyed annoying irritated",
+    "angry": "angry furious mad",
+}
+
+TAG_LEXICON = {
+    "work": "work meeting meetings manager office boss colleague colleagues coworker coworkers "
+            "deadline deadlines roadmap release shipped debugging client standup sprint",
+    "career": "career promotion interview interviewed resume senior_role",
+    "family": "family mom dad mother father parents sister brother kids son daughter wife husband grandma grandpa",
+    "health": "health doctor dentist sick headache therapy medication slept_badly",
+    "exercise": "exercise gym yoga workout ran running hike hiked swim swam cycling",
+    "friends": "friend friends",
+    "travel": "travel trip flight airport hotel vacation",
+    "learning": "learning course chapter studied studying lesson practiced tutorial",
+    "food": "food cooked cooking baked recipe restaurant ramen sourdough",
+}
+
+
+def _lexicon(definitions: Dict[str, str]) -> Dict[str, List[str]]:
+    """Token -> labels; ``a_b`` matches the word pair "a b" from ``tokenize``."""
+    lexicon: Dict[str, List[str]] = {}
+    for label, words in definitions.items():
+        for word in words.split():
+            lexicon.setdefault(word.replace("_", " "), []).append(label)
+    return lexicon
+
+
+_MOOD_WORDS = _lexicon(MOOD_LEXICON)
+_TAG_WORDS = _lexicon(TAG_LEXICON)
+
+# A negation covers the next few non-stopwords up to punctuation or a contrast ("not happy, but calm")
+NEGATION_WINDOW = 3
+_NEGATORS = frozenset("not no never nor without cannot".split())
+_SCOPE_BREAKS = frozenset("but though although however yet . , ; : ! ?".split())
+_NEGATION_TOKEN_RE = re.compile(r"[a-z0-9']+|[.,;:!?]")
+
+
+class EntryClassifier:
+    """Per-user mood and tag suggestions from lexicons and incremental naive Bayes.
+
+    Moods are one label per entry: multinomial naive Bayes over the entry's
+    words, suggested only when its posterior clears ``MIN_MOOD_PROBABILITY``.
+    A mood word from the lexicon wins, since "exhausted" says more than the
+    user's habits. Tags are independent yes/no labels: each tag seen in
+    training gets Bernoulli log-odds over the entry's words and is suggested
+    when its probability clears ``MIN_TAG_PROBABILITY``, after any lexicon tags.
+
+    Scores are split into a per-label part and a sparse per-word part that
+    only depends on that word's counts, so a suggestion only visits the
+    labels each word was seen with, and learning an entry only drops the
+    cached weights of its own words.
+    """
+
+    def __init__(self):
+        # Per mood: labelled entries, words in them, and per word the entries of each mood
+        self.mood_entries: Dict[str, int] = {}
+        self.mood_words: Dict[str, int] = {}
+        self.mood_counts: Dict[str, Dict[str, int]] = {}
+        # Per tag: entries with it, and per word the entries with it and with each tag
+        self.tag_entries: Dict[str, int] = {}
+        self.word_entries: Dict[str, int] = {}
+        self.tag_counts: Dict[str, Dict[str, int]] = {}
+        self.tagged_entries = 0
+        # Cached log weights, dropped when the counts under them change
+        self._mood_weights: Dict[str, Dict[str, float]] = {}
+        self._tag_weights: Dict[str, Tuple[float, Dict[str, float]]] = {}
+        self._mood_bases: Optional[Dict[str, float]] = None
+
+    def learn(self, text: str, mood: Optional[str] = None, tags: Optional[Iterable[str]] = None):
+        """Count one entry; ``mood``/``tags`` of None mean unknown and are not learned."""
+        if mood is None and tags is None:
+            return
+        words = _words(tokenize(text))
+        if mood is not None:
+            self.mood_entries[mood] = self.mood_entries.get(mood, 0) + 1
+            self.mood_words[mood] = self.mood_words.get(mood, 0) + len(words)
+            for word in words:
+                counts = self.mood_counts.setdefault(word, {})
+                counts[mood] = counts.get(mood, 0) + 1
+                self._mood_weights.pop(word, None)
+            self._mood_bases = None
+        if tags is not None:
+            self.tagged_entries += 1
+            for tag in tags:
+                self.tag_entries[tag] = self.tag_entries.get(tag, 0) + 1
+            for word in words:
+                self.word_entries[word] = self.word_entries.get(word, 0) + 1
+                counts = self.tag_counts.setdefault(word, {})
+                for tag in tags:
+                    counts[tag] = counts.get(tag, 0) + 1
+                self._tag_weights.pop(word, None)
+
+    def suggest(self, text: str) -> Tuple[Optional[str], List[str]]:
+        """Return (mood or None, tags) suggested for ``text``.
+
+        Mood evidence skips words only seen negated ("not happy", "wasn't
+        stressed"), and a negated mood word means the learned model is not
+        asked: the mood is then better left to the user than guessed.
+        """
+        tokens = tokenize(text)
+        words = _words(tokens)
+        tags = self.suggest_tags(tokens, words)
+        negated = _negated_words(text)
+        if not negated:
+            return self.suggest_mood(tokens, words), tags
+        tokens = [token for token in tokens if negated.isdisjoint(token.split(" "))]
+        learned = not any(word in _MOOD_WORDS for word in negated)
+        return self.suggest_mood(tokens, _words(tokens), learned), tags
+
+    def suggest_mood(self, tokens: List[str], words: set, learned: bool = True) -> Optional[str]:
+        hits: Dict[str, int] = {}
+        for token in tokens:
+            for mood in _MOOD_WORDS.get(token, ()):
+                hits[mood] = hits.get(mood, 0) + 1
+        if hits:
+            ranked = sorted(hits.values(), reverse=True)
+            # "happy but exhausted": conflicting mood words, no suggestion
+            if len(ranked) > 1 and ranked[0] == ranked[1]:
+                return None
+            return max(hits, key=hits.get)
+        if not learned:
+            return None
+        known = [word for word in words if word in self.mood_counts]
+        if not known or sum(self.mood_entries.values()) < MIN_TRAINING_ENTRIES:
+            return None
+        # The words of an entry are far from independent; averaging their
+        # evidence instead of summing it keeps the posterior from becoming
+        # confident on coincidences
+        scores = dict(self._mood_base())
+        for word in known:
+            for mood, weight in self._mood_weight(word).items():
+                scores[mood] += weight / len(known)
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        probability = 1.0 / sum(math.exp(score - top) for score in scores.values())
+        return best if probability >= MIN_MOOD_PROBABILITY else None
+
+    def suggest_tags(self, tokens: List[str], words: set) -> List[str]:
+        scores = {}
+        for token in tokens:
+            for tag in _TAG_WORDS.get(token, ()):
+                scores[tag] = math.inf
+        total = self.tagged_entries
+        known = [word for word in words if word in self.word_entries]
+        if total < MIN_TRAINING_ENTRIES or not known:
+            return sorted(scores)[:MAX_SUGGESTED_TAGS]
+        evidence: Dict[str, float] = {}
+        absent = 0.0
+        for word in known:
+            word_base, weights = self._tag_weight(word)
+            absent -= word_base
+            for tag, weight in weights.items():
+                evidence[tag] = evidence.get(tag, 0.0) + weight
+        log = math.log
+        threshold = log(MIN_TAG_PROBABILITY / (1 - MIN_TAG_PROBABILITY))
+        for tag, weight in evidence.items():
+            if tag in scores:
+                continue
+            with_tag = self.tag_entries[tag]
+            without_tag = total - with_tag
+            # Prior log-odds, plus every word's weight as if it was never seen with the tag
+            score = (log((with_tag + SMOOTHING) / (without_tag + SMOOTHING)) + absent + weight
+                     + len(known) * log(SMOOTHING * (without_tag + 2 * SMOOTHING) / (with_tag + 2 * SMOOTHING)))
+            if score > threshold:
+                scores[tag] = score
+        return sorted(scores, key=scores.get, reverse=True)[:MAX_SUGGESTED_TAGS]
+
+    def _mood_base(self) -> Dict[str, float]:
+        """Per mood: log prior and the log weight of a word never seen with the mood."""
+        if self._mood_bases is None:
+            total = sum(self.mood_entries.values())
+            size = len(self.mood_counts)
+            self._mood_bases = {
+                mood: math.log(entries / total) + math.log(SMOOTHING)
+                - math.log(self.mood_words[mood] + SMOOTHING * size)
+                for mood, entries in self.mood_entries.items()
+            }
+        return self._mood_bases
+
+    def _mood_weight(self, word: str) -> Dict[str, float]:
+        """Per mood the word was seen with: its log weight above an unseen word's."""
+        weights = self._mood_weights.get(word)
+        if weights is None:
+            weights = {mood: math.log((count + SMOOTHING) / SMOOTHING)
+                       for mood, count in self.mood_counts[word].items()}
+            self._mood_weights[word] = weights
+        return weights
+
+    def _tag_weight(self, word: str) -> Tuple[float, Dict[str, float]]:
+        """The word's log entry count, and per tag it was seen with its log weight above an unseen pair's."""
+        cached = self._tag_weights.get(word)
+        if cached is None:
+            entries = self.word_entries[word] + SMOOTHING
+            cached = math.log(entries), {
+                tag: math.log((count + SMOOTHING) / SMOOTHING * entries / (entries - count))
+                for tag, count in self.tag_counts[word].items()
+            }
+            self._tag_weights[word] = cached
+        return cached
+
+
+def _negated_words(text: str) -> set:
+    """Words of ``text`` that only occur within a negation's scope."""
+    negated, plain = set(), set()
+    scope = 0
+    for token in _NEGATION_TOKEN_RE.findall(text.lower()):
+        token = token.strip("'")
+        if token in _NEGATORS or token.endswith("n't"):
+            scope = NEGATION_WINDOW
+        elif token in _SCOPE_BREAKS:
+            scope = 0
+        elif token in STOPWORDS:
+            continue
+        elif scope:
+            negated.add(token)
+            scope -= 1
+        else:
+            plain.add(token)
+    return negated - plain
+
+
+def _words(tokens: List[str]) -> set:
+    # The learned model uses single words; word pairs mostly repeat them
+    return {token for token in tokens if " " not in token}
+
+
+def suggest_metadata(classifier: EntryClassifier, entry: dict) -> int:
+    """Fill in a missing mood and tags of a normalized entry; return the ``SUGGESTED_*`` flags."""
+    if entry["mood"] and entry["tags"]:
+        return 0
+    mood, tags = classifier.suggest(entry["text"])
+    flags = 0
+    if not entry["mood"] and mood:
+        entry["mood"] = mood
+        flags |= SUGGESTED_MOOD
+    if not entry["tags"] and tags:
+        entry["tags"] = tags
+        flags |= SUGGESTED_TAGS
+    return flags
+
+
+def suggested_fields(flags: int) -> List[str]:
+    """Names of the fields a ``suggested`` value marks as suggested."""
+    return [field for field, flag in (("mood", SUGGESTED_MOOD), ("tags", SUGGESTED_TAGS)) if flags & flag]
+
+
+def learn_entry(classifier: EntryClassifier, text: str, mood: Optional[str], tags: List[str], flags: int):
+    """Train on the labels of a stored entry that were given rather than suggested."""
+    classifier.learn(
+        text,
+        mood if mood and not flags & SUGGESTED_MOOD else None,
+        tags if tags and not flags & SUGGESTED_TAGS else None,
+    )
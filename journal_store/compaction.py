@@ -0,0 +1,224 @@
+"""Compaction of long-lived ADK sessions.
+
+``main.py`` resumes the same session forever, and ``get_session`` loads
+every event of it at the start of each turn. Compaction keeps the latest
+events of a session (``keep_events``, and none older than ``keep_days``),
+appends the older ones to a gzip JSONL archive next to the database and
+deletes them from the ``events`` table.
+
+Session state is kept in its ``sessions`` row, not rebuilt from events, so
+pruning loses no state; a snapshot of it is recorded with each compaction
+in ``journal_session_snapshots``. Compaction also strips the full
+``entries`` lists that older versions wrote into state deltas.
+"""
+import datetime
+import gzip
+import json
+import os
+import time
+from typing import Callable, List, Optional
+
+DEFAULT_KEEP_EVENTS = int(os.getenv("JOURNAL_SESSION_KEEP_EVENTS", "200"))
+# 0 keeps events of any age
+DEFAULT_KEEP_DAYS = float(os.getenv("JOURNAL_SESSION_KEEP_DAYS", "90"))
+
+# State keys of older versions that no longer belong in sessions or events
+LEGACY_STATE_KEYS = ("entries",)
+
+_DELETE_CHUNK = 500
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_session_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    state TEXT NOT NULL,
+    events_pruned INTEGER NOT NULL,
+    events_kept INTEGER NOT NULL,
+    pruned_through REAL,
+    archive_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_journal_session_snapshots_session
+    ON journal_session_snapshots (app_name, user_id, session_id, id);
+"""
+
+
+def create_snapshot_table(conn):
+    conn.executescript(SNAPSHOT_SCHEMA)
+
+
+def record_snapshot(conn, app_name: str, user_id: str, session_id: str, state: dict,
+                    events_pruned: int, events_kept: int, pruned_through: Optional[float],
+                    archive_path: Optional[str]):
+    conn.execute(
+        "INSERT INTO journal_session_snapshots (app_name, user_id, session_id, created_at, state, "
+        "events_pruned, events_kept, pruned_through, archive_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (app_name, user_id, session_id, datetime.datetime.now().isoformat(timespec="seconds"),
+         json.dumps(state, default=str), events_pruned, events_kept, pruned_through, archive_path),
+    )
+
+
+def latest_snapshot(conn, app_name: str, user_id: str, session_id: str) -> Optional[dict]:
+    row = conn.execute(
+        "SELECT created_at, state, events_pruned, events_kept, pruned_through, archive_path "
+        "FROM journal_session_snapshots WHERE app_name = ? AND user_id = ? AND session_id = ? "
+        "ORDER BY id DESC LIMIT 1",
+        (app_name, user_id, session_id),
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "created_at": row[0],
+        "state": json.loads(row[1]),
+        "events_pruned": row[2],
+        "events_kept": row[3],
+        "pruned_through": row[4],
+        "archive_path": row[5],
+    }
+
+
+def archive_dir(db_path: str) -> Optional[str]:
+    """Directory for archived session events, next to the database."""
+    if not db_path or db_path == ":memory:":
+        return None
+    return f"{db_path}.archive"
+
+
+def prune_point(events: list, keep_events: int = DEFAULT_KEEP_EVENTS,
+                keep_days: float = DEFAULT_KEEP_DAYS, now: Optional[float] = None) -> int:
+    """Index of the first event to keep in a timestamp-ordered event list.
+
+    The kept history starts at a user message, so a tool response is never
+    kept without the call that produced it.
+    """
+    cut = max(0, len(events) - keep_events)
+    if keep_days:
+        oldest = (now or time.time()) - keep_days * 86400
+        while cut < len(events) and events[cut].timestamp < oldest:
+            cut += 1
+    if cut < len(events):
+        while cut > 0 and events[cut].author != "user":
+            cut -= 1
+    return cut
+
+
+def compact_session(session_service, store, app_name: str, user_id: str, session_id: str,
+                    keep_events: int = DEFAULT_KEEP_EVENTS, keep_days: float = DEFAULT_KEEP_DAYS,
+                    archive_path: Optional[str] = None, now: Optional[float] = None) -> dict:
+    """Prune a session's old events and record a snapshot of its state.
+
+    Args:
+        session_service: ADK ``DatabaseSessionService`` (or ``JournalSessionService``)
+        store: Entry store that records the snapshot
+        app_name: App the session belongs to
+        user_id: Owner of the session
+        session_id: Session to compact
+        keep_events: Most recent events to keep
+        keep_days: Drop events older than this many days (0 keeps any age)
+        archive_path: Directory to append pruned events to as gzip JSONL
+            (pruned events are deleted without a copy if omitted)
+        now: Reference time for ``keep_days`` (defaults to the current time)
+
+    Returns:
+        Counts of pruned and kept events and the archive file, if any
+    """
+    from google.adk.sessions.database_session_service import StorageEvent, StorageSession
+    from sqlalchemy import delete
+
+    if hasattr(session_service, "flush"):
+        # Queued events must be in the table before it is pruned
+        session_service.flush()
+    session = session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        raise ValueError(f"Session {session_id} of {user_id} not found")
+    events = sorted(session.events, key=lambda event: event.timestamp)
+    cut = prune_point(events, keep_events, keep_days, now)
+    pruned, kept = events[:cut], events[cut:]
+    legacy_events = [event for event in kept if _legacy_delta(event)]
+    legacy_state = [key for key in LEGACY_STATE_KEYS if key in session.state]
+    result = {"session_id": session_id, "pruned": len(pruned), "kept": len(kept),
+              "legacy_deltas_stripped": len(legacy_events), "archive": None}
+    if not pruned and not legacy_events and not legacy_state:
+        return result
+
+    if pruned and archive_path:
+        result["archive"] = _archive(archive_path, session_id, pruned)
+
+    key = (app_name, user_id, session_id)
+    with session_service.DatabaseSessionFactory() as db:
+        ids = [event.id for event in pruned]
+        for start in range(0, len(ids), _DELETE_CHUNK):
+            db.execute(delete(StorageEvent).where(
+                StorageEvent.app_name == app_name,
+                StorageEvent.user_id == user_id,
+                StorageEvent.session_id == session_id,
+                StorageEvent.id.in_(ids[start:start + _DELETE_CHUNK]),
+            ))
+        for event in legacy_events:
+            row = db.get(StorageEvent, (event.id, *key))
+            if row is not None:
+                delta = {name: value for name, value in row.actions.state_delta.items()
+                         if name not in LEGACY_STATE_KEYS}
+                row.actions = row.actions.model_copy(update={"state_delta": delta})
+        storage_session = db.get(StorageSession, key)
+        for name in legacy_state:
+            storage_session.state.pop(name, None)
+        db.commit()
+
+    state = {name: value for name, value in session.state.items() if name not in LEGACY_STATE_KEYS}
+    store.record_session_snapshot(
+        app_name, user_id, session_id, state, len(pruned), len(kept),
+        pruned[-1].timestamp if pruned else None, result["archive"],
+    )
+    if hasattr(session_service, "invalidate"):
+        session_service.invalidate(app_name, user_id, session_id)
+    return result
+
+
+def compact_user_sessions(session_service, store, app_name: str, user_id: str,
+                          log: Callable[[str], None] = print, **options) -> List[dict]:
+    """Compact every session of a user (see ``compact_session`` for the options)."""
+    results = []
+    listed = session_service.list_sessions(app_name=app_name, user_id=user_id)
+    for listed_session in listed.sessions if listed else []:
+        result = compact_session(session_service, store, app_name, user_id, listed_session.id, **options)
+        if result["pruned"] or result["legacy_deltas_stripped"]:
+            log(f"Compacted session {listed_session.id}: pruned {result['pruned']} events, "
+                f"kept {result['kept']}")
+        results.append(result)
+    return results
+
+
+def session_users(session_service, app_name: str) -> List[str]:
+    """Ids of every user with a session of ``app_name``."""
+    from google.adk.sessions.database_session_service import StorageSession
+
+    with session_service.DatabaseSessionFactory() as db:
+        rows = db.query(StorageSession.user_id).filter(StorageSession.app_name == app_name).distinct()
+        return sorted(row[0] for row in rows)
+
+
+def vacuum(session_service):
+    """Return the space freed by pruning to the file system (rewrites the database)."""
+    with session_service.db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM")
+        if session_service.db_engine.dialect.name == "sqlite":
+            # In WAL mode the rewritten pages land in the log until it is checkpointed
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _legacy_delta(event) -> bool:
+    delta = event.actions.state_delta if event.actions else None
+    return bool(delta) and any(name in delta for name in LEGACY_STATE_KEYS)
+
+
+def _archive(directory: str, session_id: str, events: list) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{session_id}.jsonl.gz")
+    # Each compaction appends a gzip member; readers see one continuous stream
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for event in events:
+            f.write(event.model_dump_json(exclude_none=True) + "\n")
+    return path
@@ -0,0 +1,69 @@
+import contextlib
+import contextvars
+import hashlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .entries import EntryStore, get_entry_store, normalize_mood, normalize_tags
+
+
+class _TurnWrites:
+    __slots__ = ("key", "counts")
+
+    def __init__(self, key: str):
+        self.key = key
+        # Writes of each content so far in this attempt
+        self.counts: Dict[str, int] = {}
+
+
+# Writes of the conversation turn being run (set by the turn scheduler). Tool
+# calls share the object even when the framework copies the context.
+_turn_writes: contextvars.ContextVar[Optional[_TurnWrites]] = contextvars.ContextVar("journal_turn_writes",
+                                                                                     default=None)
+
+
+def journal_user_id(context) -> str:
+    """Return the id of the user whose session a tool or callback runs in."""
+    return context._invocation_context.user_id
+
+
+def open_journal(tool_context) -> Tuple[EntryStore, str]:
+    """Return the entry store and user id for a tool call.
+
+    Legacy ``state["entries"]`` lists are migrated once at startup (see
+    ``migrations.migrate_session_entries``), so this does no per-call checks.
+    """
+    return get_entry_store(), journal_user_id(tool_context)
+
+
+@contextlib.contextmanager
+def turn_scope(turn_key: str) -> Iterator[None]:
+    """Run one attempt of a turn; its writes get keys derived from ``turn_key``.
+
+    A retried turn runs again under the same ``turn_key``. Keys also depend on
+    what is written, so a write the failed attempt already made gets the same
+    key and is not stored twice, while one it never got to gets a new key,
+    whatever order the retry makes them in.
+    """
+    token = _turn_writes.set(_TurnWrites(turn_key))
+    try:
+        yield
+    finally:
+        _turn_writes.reset(token)
+
+
+def next_write_key(text: str, mood: Optional[str] = None,
+                   tags: Union[str, Iterable[str], None] = None) -> Optional[str]:
+    """Idempotency key for writing this entry in the current turn (None outside a turn).
+
+    The key hashes the normalized text, mood and tags, plus how many times
+    the same content was written before in this attempt, so an entry the
+    user really logs twice in one turn is stored twice.
+    """
+    writes = _turn_writes.get()
+    if writes is None:
+        return None
+    content = "\x1f".join([" ".join(text.split()), normalize_mood(mood) or "",
+                           ",".join(sorted(normalize_tags(tags)))])
+    digest = hashlib.sha1(content.encode()).hexdigest()[:16]
+    writes.counts[digest] = count = writes.counts.get(digest, 0) + 1
+    return f"{writes.key}:{digest}:{count}"
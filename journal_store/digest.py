@@ -0,0 +1,108 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from .context import journal_user_id
+from .entries import EntryStore, get_entry_store
+
+# Rough token budget for the digest injected into agent instructions
+DEFAULT_DIGEST_TOKENS = int(os.getenv("JOURNAL_DIGEST_TOKENS", "400"))
+DIGEST_RECENT_ENTRIES = 5
+DIGEST_TOP_ITEMS = 5
+DIGEST_SNIPPET_CHARS = 160
+
+_cache: Dict[Tuple[str, int], Tuple[int, str]] = {}
+_cache_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _clean(text: str) -> str:
+    # Braces would be read as state placeholders by ADK instruction templating
+    return text.replace("{", "(").replace("}", ")").replace("\n", " ")
+
+
+def _snippet(text: str) -> str:
+    text = _clean(text).strip()
+    if len(text) > DIGEST_SNIPPET_CHARS:
+        text = text[:DIGEST_SNIPPET_CHARS - 3].rstrip() + "..."
+    return text
+
+
+def build_journal_digest(store: EntryStore, user_id: str,
+                         max_tokens: int = DEFAULT_DIGEST_TOKENS) -> str:
+    """Summarize a user's journal in a few lines that fit ``max_tokens``.
+
+    The digest holds the entry count and date span, the most common moods and
+    tags, and as many of the latest entries as the budget allows. Agents fetch
+    full entries with their tools when they need more.
+    """
+    total = store.count(user_id)
+    if not total:
+        return "The journal is empty."
+
+    first, last = store.time_span(user_id)
+    lines = [f"{total} entries from {first[:10]} to {last[:10]}."]
+    moods = store.mood_counts(user_id, limit=DIGEST_TOP_ITEMS)
+    if moods:
+        lines.append("Top moods: " + ", ".join(f"{_clean(m)} ({n})" for m, n in moods))
+    tags = store.tag_counts(user_id, limit=DIGEST_TOP_ITEMS)
+    if tags:
+        lines.append("Top tags: " + ", ".join(f"{_clean(t)} ({n})" for t, n in tags))
+
+    used = estimate_tokens("\n".join(lines))
+    if used > max_tokens:
+        return lines[0]
+
+    recent_lines = []
+    for entry in store.recent_entries(user_id, DIGEST_RECENT_ENTRIES):
+        meta = [entry["timestamp"][:10]]
+        if entry["mood"]:
+            meta.append(_clean(entry["mood"]))
+        if entry["tags"]:
+            meta.append("#" + " #".join(_clean(t) for t in entry["tags"]))
+        line = f"- [{' | '.join(meta)}] {_snippet(entry['text'])}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        recent_lines.append(line)
+        used += cost
+    if recent_lines:
+        lines.append("Latest entries:")
+        lines.extend(recent_lines)
+    return "\n".join(lines)
+
+
+def get_journal_digest(user_id: str, max_tokens: Optional[int] = None) -> str:
+    """Return the cached digest for ``user_id``, rebuilding it if entries changed."""
+    store = get_entry_store()
+    if max_tokens is None:
+        max_tokens = DEFAULT_DIGEST_TOKENS
+    version = store.version(user_id)
+    key = (user_id, max_tokens)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    digest = build_journal_digest(store, user_id, max_tokens)
+    with _cache_lock:
+        _cache[key] = (version, digest)
+    return digest
+
+
+def journal_instruction(template: str, max_tokens: Optional[int] = None):
+    """Build an ADK instruction provider from ``template``.
+
+    ``{user_name}`` and ``{journal_digest}`` in the template are filled from
+    session state and the cached journal digest on every turn.
+    """
+
+    def instruction_provider(context) -> str:
+        digest = get_journal_digest(journal_user_id(context), max_tokens)
+        user_name = _clean(str(context.state.get("user_name", "")))
+        return template.replace("{journal_digest}", digest).replace("{user_name}", user_name)
+
+    return instruction_provider
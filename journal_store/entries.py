@@ -0,0 +1,766 @@
+import base64
+import datetime
+import json
+import sqlite3
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from . import aggregates, compaction, migrations, response_cache, summaries
+from .records import RecordSet
+from .search import parse_search_query
+from .time_index import TimeIndex, to_epoch
+
+# Same SQLite file the ADK session service uses (see main.py)
+DEFAULT_DB_PATH = "./my_daily_journal_data.db"
+
+
+def normalize_mood(mood: Optional[str]) -> Optional[str]:
+    """Lower-case a mood, mapping empty values to None."""
+    if not mood:
+        return None
+    mood = mood.strip().lower()
+    return mood or None
+
+
+def normalize_tags(tags: Union[str, Iterable[str], None]) -> List[str]:
+    """Turn a comma-separated string or list of tags into a clean list."""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    normalized = []
+    for tag in tags:
+        tag = tag.strip().lower()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+class EntryStore:
+    """Append-only journal entry repository backed by SQLite.
+
+    Entries live in their own tables inside the session database, indexed on
+    timestamp, mood and tag, so tools never have to load or rewrite the whole
+    journal. Each user has a version counter that is bumped on every write.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH,
+                 log: Callable[[str], None] = lambda message: None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._time_indexes = {}
+        self._bitmap_indexes = {}
+        self._vector_indexes = {}
+        self._classifiers = {}
+        # Per user, the journal_users.version the cached indexes above are current with
+        self._synced_versions = {}
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            # A no-op single query once the database is current
+            self.schema_version = migrations.ensure_schema(self._conn, log)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ----- Writes -----
+
+    def add_entry(self, user_id: str, text: str, mood: Optional[str] = None,
+                  tags: Union[str, Iterable[str], None] = None,
+                  timestamp: Optional[str] = None, suggest: bool = False,
+                  request_key: Optional[str] = None) -> dict:
+        """Append a single entry and return it as a dict."""
+        return self.add_entries(user_id, [{
+            "text": text,
+            "mood": mood,
+            "tags": tags,
+            "timestamp": timestamp,
+            "request_key": request_key,
+        }], suggest=suggest)[0]
+
+    def add_entries(self, user_id: str, entries: Iterable[dict],
+                    progress: Optional[Tuple[str, str, int, bool]] = None,
+                    suggest: bool = False) -> List[dict]:
+        """Append several entries in a single transaction.
+
+        Args:
+            user_id: Owner of the entries
+            entries: Dicts with ``text`` and optional ``timestamp``, ``mood``, ``tags``
+                and ``request_key``; an entry whose key was already written is not
+                added again, and the entry stored the first time is returned instead
+            progress: Optional ``(task, item, position, done)`` recorded in the
+                same transaction, so resumable jobs never import a batch twice
+            suggest: Fill in a missing mood or tags with the user's classifier;
+                returned entries then list the ``suggested`` fields
+        """
+        added = []
+        results = []
+        with self._lock, self._conn:
+            self._check_version(user_id)
+            synced = self._synced_versions[user_id]
+            classifier = self.classifier(user_id) if suggest else self._classifiers.get(user_id)
+            for entry in entries:
+                stored = self._written_entry(user_id, entry.get("request_key"), suggest)
+                if stored is None:
+                    stored = self._insert(user_id, entry, classifier, suggest)
+                    added.append(stored)
+                results.append(stored)
+            if progress:
+                migrations.record_progress(self._conn, *progress)
+            if added:
+                self._conn.execute(
+                    "INSERT INTO journal_users (user_id, entry_count, version) VALUES (?, ?, 1) "
+                    "ON CONFLICT (user_id) DO UPDATE SET "
+                    "entry_count = entry_count + excluded.entry_count, version = version + 1",
+                    (user_id, len(added)),
+                )
+                # The indexes are updated below; they stay current unless another
+                # process wrote in between, which the next read then notices
+                if self.version(user_id) == synced + 1:
+                    self._synced_versions[user_id] = synced + 1
+            index = self._time_indexes.get(user_id)
+            if index is not None:
+                for entry in added:
+                    index.add(to_epoch(entry["timestamp"]), entry["id"])
+            bitmap_index = self._bitmap_indexes.get(user_id)
+            if bitmap_index is not None:
+                for entry in added:
+                    bitmap_index.add(entry["id"], to_epoch(entry["timestamp"]), entry["mood"], entry["tags"])
+            vector_index = self._vector_indexes.get(user_id)
+            if vector_index is not None and added:
+                from .vectors import entry_text
+                vector_index.add((entry["id"], entry_text(entry)) for entry in added)
+        return results
+
+    def _written_entry(self, user_id: str, request_key: Optional[str], suggest: bool) -> Optional[dict]:
+        """The entry an earlier write with ``request_key`` added, if any."""
+        if not request_key:
+            return None
+        row = self._conn.execute(
+            "SELECT id, text, timestamp, mood, tags, suggested FROM journal_entries "
+            "WHERE user_id = ? AND request_key = ?",
+            (user_id, request_key),
+        ).fetchone()
+        if row is None:
+            return None
+        entry = row_to_entry(row)
+        if suggest:
+            from .classifier import suggested_fields
+            entry["suggested"] = suggested_fields(row["suggested"])
+        return entry
+
+    def _insert(self, user_id: str, entry: dict, classifier=None, suggest: bool = False) -> dict:
+        timestamp = entry.get("timestamp") or datetime.datetime.now().isoformat()
+        request_key = entry.get("request_key")
+        entry = {
+            "text": entry["text"],
+            "mood": normalize_mood(entry.get("mood")),
+            "tags": normalize_tags(entry.get("tags")),
+        }
+        flags = 0
+        if classifier is not None:
+            from .classifier import learn_entry, suggest_metadata, suggested_fields
+            flags = suggest_metadata(classifier, entry) if suggest else 0
+        mood, tags = entry["mood"], entry["tags"]
+        cursor = self._conn.execute(
+            "INSERT INTO journal_entries (user_id, text, timestamp, mood, tags, ts, suggested, request_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, entry["text"], timestamp, mood, json.dumps(tags), to_epoch(timestamp), flags, request_key),
+        )
+        entry_id = cursor.lastrowid
+        self._conn.executemany(
+            "INSERT INTO journal_entry_tags (entry_id, user_id, tag) VALUES (?, ?, ?)",
+            [(entry_id, user_id, tag) for tag in tags],
+        )
+        aggregates.record_entry(self._conn, user_id, timestamp, mood, tags)
+        summaries.invalidate(self._conn, user_id, timestamp)
+        if classifier is not None:
+            learn_entry(classifier, entry["text"], mood, tags, flags)
+        added = {
+            "id": entry_id,
+            "text": entry["text"],
+            "timestamp": timestamp,
+            "mood": mood,
+            "tags": tags,
+        }
+        if suggest:
+            added["suggested"] = suggested_fields(flags)
+        return added
+
+    def set_progress(self, task: str, item: str, position: int = 0, done: bool = False):
+        with self._lock, self._conn:
+            migrations.record_progress(self._conn, task, item, position, done)
+
+    def get_progress(self, task: str, item: str) -> dict:
+        """Return the recorded progress of a resumable task."""
+        with self._lock:
+            return migrations.get_progress(self._conn, task, item)
+
+    # ----- Reads -----
+
+    def count(self, user_id: str) -> int:
+        row = self._fetchone("SELECT entry_count FROM journal_users WHERE user_id = ?", (user_id,))
+        return row[0] if row else 0
+
+    def version(self, user_id: str) -> int:
+        row = self._fetchone("SELECT version FROM journal_users WHERE user_id = ?", (user_id,))
+        return row[0] if row else 0
+
+    def get_entries(self, user_id: str, mood: Optional[str] = None,
+                    tags: Union[str, Iterable[str], None] = None,
+                    since: Optional[str] = None, until: Optional[str] = None,
+                    query: Optional[str] = None) -> List[dict]:
+        """Return entries in timestamp order, optionally filtered.
+
+        Args:
+            user_id: Owner of the entries
+            mood: Only return entries with this mood
+            tags: Only return entries carrying at least one of these tags
+            since: Only return entries at or after this ISO timestamp
+            until: Only return entries before this ISO timestamp
+            query: Boolean filter over tags and moods, e.g. "work AND NOT stressed"
+                (see bitmap_index.parse_filter)
+        """
+        return list(self.iter_entries(user_id, mood=mood, tags=tags, since=since, until=until, query=query))
+
+    def iter_entries(self, user_id: str, mood: Optional[str] = None,
+                     tags: Union[str, Iterable[str], None] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     newest_first: bool = False, batch_size: int = 500,
+                     query: Optional[str] = None) -> Iterator[dict]:
+        """Stream matching entries in (timestamp, id) order.
+
+        Rows are fetched ``batch_size`` at a time with keyset pagination, so
+        memory stays constant and the store is not locked while the caller
+        consumes the stream.
+        """
+        cursor = None
+        while True:
+            page, cursor = self.page_entries(
+                user_id, mood=mood, tags=tags, since=since, until=until,
+                limit=batch_size, cursor=cursor, newest_first=newest_first, query=query,
+            )
+            yield from page
+            if cursor is None:
+                return
+
+    def load_records(self, user_id: str, mood: Optional[str] = None,
+                     tags: Union[str, Iterable[str], None] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     batch_size: int = 5000) -> RecordSet:
+        """Load matching entries as compact records (see records.py), in (timestamp, id) order.
+
+        A fraction of the memory of ``get_entries``; convert with
+        ``RecordSet.to_dicts`` where a tool returns the entries. Rows are read
+        ``batch_size`` at a time, so the store is not locked for the whole load.
+        """
+        records = RecordSet()
+        where, params = self._filters(user_id, mood, tags, since, until)
+        after = None
+        while True:
+            page_where, page_params = list(where), list(params)
+            if after:
+                page_where.append("(ts > ? OR (ts = ? AND id > ?))")
+                page_params.extend([after[0], after[0], after[1]])
+            rows = self._fetchall(
+                "SELECT id, ts, mood, tags, text FROM journal_entries WHERE "
+                + " AND ".join(page_where)
+                + " ORDER BY ts, id LIMIT ?",
+                page_params + [batch_size],
+            )
+            for row in rows:
+                records.add_row(row)
+            if len(rows) < batch_size:
+                return records
+            after = rows[-1]["ts"], rows[-1]["id"]
+
+    def page_entries(self, user_id: str, mood: Optional[str] = None,
+                     tags: Union[str, Iterable[str], None] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     limit: int = 20, cursor: Optional[str] = None,
+                     newest_first: bool = True, query: Optional[str] = None):
+        """Return one page of matching entries and the cursor of the next page.
+
+        Pages are ordered by (timestamp, id), which is stable even when
+        entries share a timestamp or new entries arrive between calls.
+        Date-only queries are served from the in-memory time index; mood,
+        tag and ``query`` filters from the bitmap index combined with it.
+
+        Returns:
+            A ``(entries, next_cursor)`` tuple; ``next_cursor`` is None on the last page
+
+        Raises:
+            ValueError: If ``cursor`` was not produced by this method
+        """
+        after = decode_cursor(cursor) if cursor else None
+        node = filter_node(mood, tags, query)
+        if node is None:
+            return self._page_by_time(user_id, since, until, limit, after, newest_first)
+
+        with self._lock:
+            index = self.bitmap_index(user_id)
+            matches = index.select(node, self.time_index(user_id), _epoch_or_none(since), _epoch_or_none(until))
+            page_ids, more = index.page(matches, limit, after, newest_first)
+        entries = self.get_entries_by_id(page_ids)
+        next_cursor = None
+        if more and entries:
+            last = entries[-1]
+            next_cursor = encode_cursor(to_epoch(last["timestamp"]), last["id"])
+        return entries, next_cursor
+
+    def _page_by_time(self, user_id, since, until, limit, after, newest_first):
+        with self._lock:
+            index = self.time_index(user_id)
+            low, high = index.span(_epoch_or_none(since), _epoch_or_none(until))
+            if newest_first:
+                if after:
+                    high = min(high, index.position(*after))
+                page_low = max(low, high - limit)
+                page_ids = list(reversed(index.ids[page_low:high]))
+                more = page_low > low
+            else:
+                if after:
+                    low = max(low, index.position(after[0], after[1] + 1))
+                page_high = min(high, low + limit)
+                page_ids = list(index.ids[low:page_high])
+                more = page_high < high
+        entries = self.get_entries_by_id(page_ids)
+        next_cursor = None
+        if more and entries:
+            last = entries[-1]
+            next_cursor = encode_cursor(to_epoch(last["timestamp"]), last["id"])
+        return entries, next_cursor
+
+    def get_entries_by_id(self, entry_ids: List[int]) -> List[dict]:
+        """Fetch entries by id, in the order given."""
+        if not entry_ids:
+            return []
+        rows = {}
+        # Stay under SQLite's bound-parameter limit
+        for offset in range(0, len(entry_ids), 500):
+            chunk = entry_ids[offset:offset + 500]
+            for row in self._fetchall(
+                "SELECT id, text, timestamp, mood, tags FROM journal_entries WHERE id IN (%s)"
+                % ", ".join("?" * len(chunk)),
+                chunk,
+            ):
+                rows[row["id"]] = row
+        return [row_to_entry(rows[entry_id]) for entry_id in entry_ids if entry_id in rows]
+
+    def time_index(self, user_id: str) -> TimeIndex:
+        """Return the user's sorted timestamp index, loading it on first use."""
+        with self._lock:
+            self._check_version(user_id)
+            index = self._time_indexes.get(user_id)
+            if index is None:
+                rows = self._conn.execute(
+                    "SELECT ts, id FROM journal_entries WHERE user_id = ? ORDER BY ts, id",
+                    (user_id,),
+                )
+                index = TimeIndex((row[0], row[1]) for row in rows)
+                self._time_indexes[user_id] = index
+            return index
+
+    def _check_version(self, user_id: str):
+        """Drop the user's cached indexes if another process wrote entries since they were synced.
+
+        Writes through this store bump ``journal_users.version`` and update the
+        loaded indexes in place, so any other version means entries were added
+        elsewhere, e.g. by ``journal_cli.py import`` next to the server.
+        """
+        version = self.version(user_id)
+        synced = self._synced_versions.get(user_id)
+        if synced is not None and synced != version:
+            self._time_indexes.pop(user_id, None)
+            self._bitmap_indexes.pop(user_id, None)
+            self._classifiers.pop(user_id, None)
+            # Vectors are costly to rebuild and persisted, so only the new entries are embedded
+            vector_index = self._vector_indexes.get(user_id)
+            if vector_index is not None:
+                self._embed_missing(user_id, vector_index)
+        self._synced_versions[user_id] = version
+
+    def bitmap_index(self, user_id: str):
+        """Return the user's mood and tag bitmap index, loading it on first use."""
+        from .bitmap_index import BitmapIndex
+
+        with self._lock:
+            self._check_version(user_id)
+            index = self._bitmap_indexes.get(user_id)
+            if index is None:
+                rows = self._conn.execute(
+                    "SELECT id, ts, mood, tags FROM journal_entries WHERE user_id = ? ORDER BY id",
+                    (user_id,),
+                )
+                # Most entries repeat a tag list already seen; parse each one once
+                tag_lists = {}
+
+                def tag_list(text):
+                    if text not in tag_lists:
+                        tag_lists[text] = json.loads(text)
+                    return tag_lists[text]
+
+                index = BitmapIndex((row[0], row[1], row[2], tag_list(row[3])) for row in rows)
+                self._bitmap_indexes[user_id] = index
+            return index
+
+    def explain_filter(self, user_id: str, mood: Optional[str] = None,
+                       tags: Union[str, Iterable[str], None] = None,
+                       since: Optional[str] = None, until: Optional[str] = None,
+                       query: Optional[str] = None) -> List[str]:
+        """Describe how a filter would be evaluated, most selective step first."""
+        node = filter_node(mood, tags, query)
+        with self._lock:
+            if node is None:
+                return ["time index"]
+            return self.bitmap_index(user_id).explain(
+                node, self.time_index(user_id), _epoch_or_none(since), _epoch_or_none(until))
+
+    def count_entries(self, user_id: str, mood: Optional[str] = None,
+                      tags: Union[str, Iterable[str], None] = None,
+                      since: Optional[str] = None, until: Optional[str] = None,
+                      query: Optional[str] = None) -> int:
+        """Count matching entries from the indexes, without reading entry bodies."""
+        node = filter_node(mood, tags, query)
+        with self._lock:
+            if node is None:
+                if not since and not until:
+                    return self.count(user_id)
+                return self.time_index(user_id).count(_epoch_or_none(since), _epoch_or_none(until))
+            return self.bitmap_index(user_id).count(
+                node, self.time_index(user_id), _epoch_or_none(since), _epoch_or_none(until))
+
+    def _filters(self, user_id, mood, tags, since, until):
+        where = ["user_id = ?"]
+        params: list = [user_id]
+        mood = normalize_mood(mood)
+        if mood:
+            where.append("mood = ?")
+            params.append(mood)
+        tag_list = normalize_tags(tags)
+        if tag_list:
+            where.append(
+                "id IN (SELECT entry_id FROM journal_entry_tags WHERE user_id = ? AND tag IN (%s))"
+                % ", ".join("?" * len(tag_list))
+            )
+            params.append(user_id)
+            params.extend(tag_list)
+        if since:
+            where.append("ts >= ?")
+            params.append(to_epoch(since))
+        if until:
+            where.append("ts < ?")
+            params.append(to_epoch(until))
+        return where, params
+
+    def search(self, user_id: str, query: str, limit: int = 20,
+               since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """Full-text search over entry text, best matches first.
+
+        Terms are matched with AND; if that finds nothing for a multi-term
+        query, any-term matches are returned instead. Results are ranked with
+        BM25 and each entry carries its ``score`` (higher is better).
+        ``since``/``until`` restrict matches to a time range.
+        """
+        match = parse_search_query(query)
+        if not match:
+            return []
+        time_range = (_epoch_or_none(since), _epoch_or_none(until))
+        rows = self._search_rows(user_id, match, limit, *time_range)
+        if not rows:
+            any_match = parse_search_query(query, operator="OR")
+            if any_match != match:
+                rows = self._search_rows(user_id, any_match, limit, *time_range)
+        results = []
+        for row in rows:
+            entry = row_to_entry(row)
+            entry["score"] = round(-row["rank"], 4)
+            results.append(entry)
+        return results
+
+    def semantic_search(self, user_id: str, query: str, k: int = 10,
+                        since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """Return the ``k`` entries most similar in meaning to ``query``.
+
+        Uses the local hashed-vector index (see vectors.py), so related entries
+        are found even when they share no exact phrase with the query. Each
+        entry carries its cosine ``score``.
+        """
+        import numpy as np
+
+        with self._lock:
+            index = self.vector_index(user_id)
+            allowed = None
+            if since or until:
+                time_index = self.time_index(user_id)
+                low, high = time_index.span(_epoch_or_none(since), _epoch_or_none(until))
+                allowed = np.sort(np.asarray(time_index.ids[low:high], dtype=np.int64))
+            matches = index.query(query, k, allowed)
+        scores = dict(matches)
+        entries = self.get_entries_by_id([entry_id for entry_id, _ in matches])
+        for entry in entries:
+            entry["score"] = scores[entry["id"]]
+        return entries
+
+    def vector_index(self, user_id: str):
+        """Return the user's vector index, loading it on first use and embedding any entries it lacks."""
+        from .vectors import VectorIndex, index_path
+
+        with self._lock:
+            self._check_version(user_id)
+            index = self._vector_indexes.get(user_id)
+            if index is not None:
+                return index
+            index = VectorIndex(index_path(self.db_path, user_id))
+            last_id = index.last_id
+            if len(index) > self.count(user_id) or (last_id and not self._fetchone(
+                    "SELECT 1 FROM journal_entries WHERE id = ? AND user_id = ?", (last_id, user_id))):
+                # Files from another database or a rolled-back write: start over
+                index.reset()
+            self._embed_missing(user_id, index)
+            self._vector_indexes[user_id] = index
+            return index
+
+    def _embed_missing(self, user_id: str, index):
+        """Embed the user's entries that are not in ``index``, wherever their ids fall.
+
+        Entries written by another process can have lower ids than ones added
+        here since, so catching up on ``id > last_id`` alone would skip them.
+        """
+        import numpy as np
+
+        from .vectors import entry_text
+
+        if len(index) == self.count(user_id):
+            return
+        ids = np.fromiter((row[0] for row in self._conn.execute(
+            "SELECT id FROM journal_entries WHERE user_id = ?", (user_id,))), dtype=np.int64)
+        missing = np.sort(ids[~np.isin(ids, index.ids[:len(index)])]).tolist()
+        # Stay under SQLite's bound-parameter limit
+        for offset in range(0, len(missing), 500):
+            chunk = missing[offset:offset + 500]
+            rows = self._conn.execute(
+                "SELECT id, text, tags FROM journal_entries WHERE id IN (%s) ORDER BY id"
+                % ", ".join("?" * len(chunk)),
+                chunk,
+            )
+            index.add((row["id"], entry_text({"text": row["text"], "tags": json.loads(row["tags"])}))
+                      for row in rows)
+
+    def classifier(self, user_id: str):
+        """Return the user's mood/tag classifier, trained on their entries on first use."""
+        from .classifier import EntryClassifier, learn_entry
+
+        with self._lock:
+            self._check_version(user_id)
+            classifier = self._classifiers.get(user_id)
+            if classifier is not None:
+                return classifier
+            classifier = EntryClassifier()
+            rows = self._conn.execute(
+                "SELECT text, mood, tags, suggested FROM journal_entries WHERE user_id = ? ORDER BY id",
+                (user_id,),
+            )
+            while True:
+                batch = rows.fetchmany(1000)
+                if not batch:
+                    break
+                for text, mood, tags, flags in batch:
+                    learn_entry(classifier, text, mood, json.loads(tags), flags)
+            self._classifiers[user_id] = classifier
+            return classifier
+
+    def recent_entries(self, user_id: str, limit: int) -> List[dict]:
+        """Return the newest ``limit`` entries, newest first."""
+        rows = self._fetchall(
+            "SELECT id, text, timestamp, mood, tags FROM journal_entries "
+            "WHERE user_id = ? ORDER BY ts DESC, id DESC LIMIT ?",
+            (user_id, limit),
+        )
+        return [row_to_entry(row) for row in rows]
+
+    def time_span(self, user_id: str):
+        """Return the (first, last) entry timestamps, or (None, None)."""
+        first = self._fetchone(
+            "SELECT timestamp FROM journal_entries WHERE user_id = ? ORDER BY ts, id LIMIT 1", (user_id,)
+        )
+        last = self._fetchone(
+            "SELECT timestamp FROM journal_entries WHERE user_id = ? ORDER BY ts DESC, id DESC LIMIT 1", (user_id,)
+        )
+        return (first[0], last[0]) if first else (None, None)
+
+    # ----- Aggregates (served from rollup tables, see aggregates.py) -----
+
+    def mood_counts(self, user_id: str, limit: Optional[int] = None,
+                    start: Optional[str] = None, end: Optional[str] = None) -> List[tuple]:
+        """Return (mood, count) pairs, most frequent first."""
+        with self._lock:
+            return aggregates.mood_totals(self._conn, user_id, start, end)[:limit]
+
+    def tag_counts(self, user_id: str, limit: Optional[int] = None,
+                   start: Optional[str] = None, end: Optional[str] = None) -> List[tuple]:
+        """Return (tag, count) pairs, most frequent first."""
+        with self._lock:
+            return aggregates.tag_totals(self._conn, user_id, start, end)[:limit]
+
+    def tag_pair_counts(self, user_id: str, limit: Optional[int] = None,
+                        start: Optional[str] = None, end: Optional[str] = None) -> List[tuple]:
+        """Return (tag_a, tag_b, count) co-occurrences, most frequent first."""
+        with self._lock:
+            return aggregates.tag_pair_totals(self._conn, user_id, start, end)[:limit]
+
+    def entry_total(self, user_id: str, start: Optional[str] = None,
+                    end: Optional[str] = None) -> int:
+        """Return the number of entries between two ISO dates (inclusive)."""
+        with self._lock:
+            return aggregates.entry_total(self._conn, user_id, start, end)
+
+    def entry_trends(self, user_id: str, granularity: str = "month",
+                     start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+        """Return entry and mood counts per day, week or month."""
+        with self._lock:
+            return aggregates.entry_trends(self._conn, user_id, granularity, start, end)
+
+    # ----- Period summary cache (see summaries.py) -----
+
+    def get_period_summary(self, user_id: str, period: str) -> Optional[dict]:
+        with self._lock:
+            return summaries.get_summary(self._conn, user_id, period)
+
+    def save_period_summary(self, user_id: str, period: "summaries.Period",
+                            summary: str, entry_count: int):
+        with self._lock, self._conn:
+            summaries.put_summary(self._conn, user_id, period, summary, entry_count)
+
+    def record_summary_stats(self, user_id: str, hits: int, misses: int, model_calls: int):
+        with self._lock, self._conn:
+            summaries.record_stats(self._conn, user_id, hits, misses, model_calls)
+
+    def summary_cache_stats(self, user_id: str) -> dict:
+        with self._lock:
+            return summaries.get_stats(self._conn, user_id)
+
+    # ----- Agent response cache (see response_cache.py) -----
+
+    def get_cached_response(self, user_id: str, query: str) -> Optional[str]:
+        """Return a cached answer to ``query`` if the user's entries have not changed since."""
+        with self._lock, self._conn:
+            return response_cache.get_response(self._conn, user_id, query, self.version(user_id))
+
+    def cache_response(self, user_id: str, query: str, response: str):
+        with self._lock, self._conn:
+            response_cache.put_response(self._conn, user_id, query, response, self.version(user_id))
+
+    def response_cache_stats(self, user_id: str) -> dict:
+        with self._lock:
+            return response_cache.get_stats(self._conn, user_id)
+
+    # ----- Session snapshots (see compaction.py) -----
+
+    def record_session_snapshot(self, app_name: str, user_id: str, session_id: str, state: dict,
+                                events_pruned: int, events_kept: int,
+                                pruned_through: Optional[float], archive_path: Optional[str]):
+        with self._lock, self._conn:
+            compaction.record_snapshot(self._conn, app_name, user_id, session_id, state,
+                                       events_pruned, events_kept, pruned_through, archive_path)
+
+    def latest_session_snapshot(self, app_name: str, user_id: str, session_id: str) -> Optional[dict]:
+        with self._lock:
+            return compaction.latest_snapshot(self._conn, app_name, user_id, session_id)
+
+    def _search_rows(self, user_id: str, match: str, limit: int,
+                     since: Optional[int] = None, until: Optional[int] = None):
+        return self._fetchall(
+            "SELECT e.id, e.text, e.timestamp, e.mood, e.tags, bm25(journal_entries_fts) AS rank "
+            "FROM journal_entries_fts JOIN journal_entries e ON e.id = journal_entries_fts.rowid "
+            "WHERE journal_entries_fts MATCH ? AND e.user_id = ? AND e.ts >= ? AND e.ts < ? "
+            "ORDER BY rank LIMIT ?",
+            (match, user_id,
+             -2 ** 63 if since is None else since,
+             2 ** 63 - 1 if until is None else until,
+             limit),
+        )
+
+    def _fetchone(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+
+def encode_cursor(epoch: int, entry_id: int) -> str:
+    """Opaque page cursor pointing just past (epoch, entry_id)."""
+    return base64.urlsafe_b64encode(f"{epoch}|{entry_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        epoch, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return int(epoch), int(entry_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _epoch_or_none(timestamp: Optional[str]) -> Optional[int]:
+    return to_epoch(timestamp) if timestamp else None
+
+
+def filter_node(mood: Optional[str] = None, tags: Union[str, Iterable[str], None] = None,
+                query: Optional[str] = None):
+    """Combine the mood, tag list and boolean query filters into one expression (None if unfiltered).
+
+    Raises:
+        ValueError: If ``query`` is malformed
+    """
+    from .bitmap_index import Or, Term, conjoin, parse_filter
+
+    parts = []
+    mood = normalize_mood(mood)
+    if mood:
+        parts.append(Term("mood", mood))
+    tag_list = normalize_tags(tags)
+    if tag_list:
+        terms = [Term("tag", tag) for tag in tag_list]
+        parts.append(terms[0] if len(terms) == 1 else Or(terms))
+    if query:
+        parts.append(parse_filter(query))
+    return conjoin(parts)
+
+
+def row_to_entry(row) -> dict:
+    """Convert a ``journal_entries`` row to the dict shape tools return."""
+    return {
+        "id": row["id"],
+        "text": row["text"],
+        "timestamp": row["timestamp"],
+        "mood": row["mood"],
+        "tags": json.loads(row["tags"]),
+    }
+
+
+_store: Optional[EntryStore] = None
+_store_lock = threading.Lock()
+
+
+def configure_entry_store(db_path: str, log: Callable[[str], None] = lambda message: None) -> EntryStore:
+    """Point the shared entry store at ``db_path`` and migrate its schema (called once from main.py)."""
+    global _store
+    with _store_lock:
+        if _store is not None and _store.db_path != db_path:
+            _store.close()
+            _store = None
+        if _store is None:
+            _store = EntryStore(db_path, log)
+        return _store
+
+
+def get_entry_store() -> EntryStore:
+    """Return the shared entry store, opening the default database if needed."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EntryStore(DEFAULT_DB_PATH)
+        return _store
@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from typing import Callable, Optional
+
+from .entries import EntryStore
+from .time_index import parse_date_range
+
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = ("id", "timestamp", "text", "mood", "tags")
+
+
+def _open_output(path: str, compress: bool):
+    if path == "-":
+        if compress:
+            return gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb"), True
+        return sys.stdout, False
+    if compress:
+        return gzip.open(path, "wb"), True
+    return open(path, "w", encoding="utf-8", newline=""), True
+
+
+def export_entries(store: EntryStore, user_id: str, path: str, fmt: str = "jsonl",
+                   start: Optional[str] = None, end: Optional[str] = None,
+                   mood: Optional[str] = None, tags: Optional[str] = None,
+                   compress: Optional[bool] = None, batch_size: int = 1000,
+                   log: Callable[[str], None] = print) -> dict:
+    """Stream a user's entries to a JSONL or CSV file in timestamp order.
+
+    Entries are read in keyset-paginated batches and written as they arrive,
+    so memory use does not depend on the size of the journal. Exported JSONL
+    and CSV files can be imported again with ``journal_cli.py import``.
+
+    Args:
+        store: Entry store to read from
+        user_id: Owner of the entries
+        path: Output file, or "-" for stdout
+        fmt: "jsonl" or "csv"
+        start: Optional first date to export (YYYY-MM-DD)
+        end: Optional last date to export (YYYY-MM-DD, inclusive)
+        mood: Optional mood filter
+        tags: Optional comma-separated tags; entries with any of them are exported
+        compress: Gzip the output (default: when ``path`` ends in ".gz")
+        batch_size: Entries fetched per query
+
+    Returns:
+        Number of entries written, timing and throughput
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'; use one of {', '.join(FORMATS)}")
+    if compress is None:
+        compress = path.endswith(".gz")
+    since, until = parse_date_range(start, end)
+
+    started = time.perf_counter()
+    written = 0
+    output, should_close = _open_output(path, compress)
+    text = io.TextIOWrapper(output, encoding="utf-8", newline="") if compress else output
+    try:
+        writer = None
+        if fmt == "csv":
+            writer = csv.writer(text)
+            writer.writerow(CSV_FIELDS)
+        for entry in store.iter_entries(user_id, mood=mood, tags=tags, since=since, until=until,
+                                        batch_size=batch_size):
+            if writer:
+                writer.writerow([entry["id"], entry["timestamp"], entry["text"],
+                                 entry["mood"] or "", ";".join(entry["tags"])])
+            else:
+                text.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            written += 1
+        text.flush()
+    finally:
+        if compress:
+            text.detach()
+        if should_close:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    log(f"Exported {written} entries in {elapsed:.2f}s")
+    return {
+        "exported": written,
+        "elapsed_seconds": round(elapsed, 3),
+        "entries_per_second": round(written / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,203 @@
+import csv
+import datetime
+import json
+import os
+import re
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .entries import EntryStore, normalize_mood, normalize_tags
+
+IMPORT_TASK = "import"
+FORMATS = ("jsonl", "csv", "markdown")
+
+# Accepted spellings of each field in imported records
+TEXT_FIELDS = ("text", "entry", "content", "body")
+TIMESTAMP_FIELDS = ("timestamp", "date", "created_at", "created")
+
+_MARKDOWN_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+
+
+class InvalidRecord(ValueError):
+    """A source record that cannot be turned into a journal entry."""
+
+
+def detect_format(path: str) -> str:
+    """Guess the import format from a path."""
+    if os.path.isdir(path):
+        return "markdown"
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of '{path}'; pass --format ({', '.join(FORMATS)})")
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, record) for each non-blank line."""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, InvalidRecord(f"invalid JSON: {e}")
+                continue
+            yield number, record
+
+
+def read_csv(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, record) for each CSV row; the first row is the header."""
+    with open(path, encoding="utf-8", newline="") as f:
+        for number, row in enumerate(csv.DictReader(f), 1):
+            yield number, {key.strip().lower(): value for key, value in row.items() if key}
+
+
+def read_markdown_dir(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (file number, record) for each ``YYYY-MM-DD*.md`` file, in name order.
+
+    An optional front matter block between ``---`` lines may set ``mood``,
+    ``tags`` and ``time``; the rest of the file is the entry text.
+    """
+    names = sorted(name for name in os.listdir(path)
+                   if name.lower().endswith(".md") and _MARKDOWN_DATE_RE.match(name))
+    for number, name in enumerate(names, 1):
+        with open(os.path.join(path, name), encoding="utf-8") as f:
+            content = f.read()
+        record = {"timestamp": _MARKDOWN_DATE_RE.match(name).group(1)}
+        lines = content.lstrip("\ufeff").splitlines()
+        if lines and lines[0].strip() == "---" and "---" in (line.strip() for line in lines[1:]):
+            end = [line.strip() for line in lines[1:]].index("---") + 1
+            for line in lines[1:end]:
+                key, _, value = line.partition(":")
+                record[key.strip().lower()] = value.strip().strip("[]")
+            lines = lines[end + 1:]
+        if "time" in record:
+            record["timestamp"] = f"{record['timestamp']}T{record.pop('time')}"
+        record["text"] = "\n".join(lines).strip()
+        yield number, record
+
+
+READERS = {
+    "jsonl": read_jsonl,
+    "csv": read_csv,
+    "markdown": read_markdown_dir,
+}
+
+
+def normalize_record(record) -> dict:
+    """Validate a source record and convert it to the ``add_entry`` schema.
+
+    Raises:
+        InvalidRecord: If the record has no text, an unreadable timestamp or
+            tags that are not strings
+    """
+    if isinstance(record, InvalidRecord):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRecord("record is not an object")
+    text = next((record[field] for field in TEXT_FIELDS if record.get(field)), None)
+    if not isinstance(text, str) or not text.strip():
+        raise InvalidRecord("missing entry text")
+    timestamp = next((record[field] for field in TIMESTAMP_FIELDS if record.get(field)), None)
+    if not timestamp:
+        raise InvalidRecord("missing timestamp")
+    try:
+        timestamp = datetime.datetime.fromisoformat(str(timestamp).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise InvalidRecord(f"invalid timestamp: {timestamp}")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    mood = record.get("mood")
+    tags = record.get("tags")
+    if isinstance(tags, str):
+        tags = tags.replace(";", ",")
+    elif isinstance(tags, list) and not all(isinstance(tag, str) for tag in tags):
+        raise InvalidRecord(f"invalid tags: {tags}")
+    return {
+        "text": text.strip(),
+        "timestamp": timestamp.isoformat(),
+        "mood": normalize_mood(mood) if isinstance(mood, str) else None,
+        "tags": normalize_tags(tags) if isinstance(tags, (str, list)) else [],
+    }
+
+
+def import_entries(store: EntryStore, user_id: str, path: str, fmt: Optional[str] = None,
+                   batch_size: int = 1000, restart: bool = False, suggest: bool = False,
+                   log: Callable[[str], None] = print) -> dict:
+    """Stream entries from a JSONL file, CSV file or Markdown directory into the store.
+
+    Records are validated, normalized and committed ``batch_size`` at a time.
+    Each batch commits together with the source position it reached, so an
+    interrupted import picks up after the last committed batch.
+
+    Args:
+        store: Entry store to import into
+        user_id: Owner of the imported entries
+        path: Source file or directory
+        fmt: "jsonl", "csv" or "markdown" (guessed from ``path`` if omitted)
+        batch_size: Entries per transaction
+        restart: Ignore recorded progress and import from the beginning
+        suggest: Suggest a mood and tags for records without them, with the
+            classifier trained on the user's entries so far (and on the
+            labelled records of this import as they are committed)
+        log: Progress output
+
+    Returns:
+        Counts of imported and skipped records, timings and throughput
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in READERS:
+        raise ValueError(f"Unknown format '{fmt}'; use one of {', '.join(FORMATS)}")
+
+    source = f"{user_id}:{os.path.abspath(path)}"
+    progress = {"position": 0, "done": False} if restart else store.get_progress(IMPORT_TASK, source)
+    if progress["done"]:
+        log(f"{path} was already imported for {user_id}; use --restart to import it again")
+        return {"imported": 0, "skipped": 0, "suggested": 0, "errors": [], "elapsed_seconds": 0.0,
+                "entries_per_second": 0.0, "resumed_from": progress["position"]}
+    resume_from = progress["position"]
+    if resume_from:
+        log(f"Resuming {path} after record {resume_from}")
+
+    started = time.perf_counter()
+    imported = skipped = suggested = 0
+    errors: List[str] = []
+    batch: List[dict] = []
+    position = resume_from
+
+    def commit(done: bool):
+        nonlocal imported, suggested, batch
+        added = store.add_entries(user_id, batch, progress=(IMPORT_TASK, source, position, done), suggest=suggest)
+        imported += len(batch)
+        suggested += sum(1 for entry in added if entry.get("suggested"))
+        batch = []
+        elapsed = time.perf_counter() - started
+        log(f"  {imported} entries imported ({imported / elapsed if elapsed else 0:.0f}/s)")
+
+    for position, record in READERS[fmt](path):
+        if position <= resume_from:
+            continue
+        try:
+            batch.append(normalize_record(record))
+        except InvalidRecord as e:
+            skipped += 1
+            if len(errors) < 20:
+                errors.append(f"record {position}: {e}")
+            continue
+        if len(batch) >= batch_size:
+            commit(done=False)
+    commit(done=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "skipped": skipped,
+        "suggested": suggested,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "entries_per_second": round(imported / elapsed, 1) if elapsed else 0.0,
+        "resumed_from": resume_from,
+    }
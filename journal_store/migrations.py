@@ -0,0 +1,264 @@
+import datetime
+from typing import Callable, List, Tuple
+
+from . import aggregates, compaction, response_cache, summaries
+from .search import FTS_SCHEMA
+from .time_index import to_epoch
+
+# Bump by appending to MIGRATIONS; never edit a migration that has shipped.
+# Every step is idempotent so databases created before versioning existed
+# can simply replay all of them.
+
+ENTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    mood TEXT,
+    tags TEXT NOT NULL DEFAULT '[]'
+);
+
+CREATE TABLE IF NOT EXISTS journal_entry_tags (
+    entry_id INTEGER NOT NULL REFERENCES journal_entries (id),
+    user_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (entry_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_journal_entry_tags_user_tag
+    ON journal_entry_tags (user_id, tag, entry_id);
+
+CREATE TABLE IF NOT EXISTS journal_users (
+    user_id TEXT PRIMARY KEY,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+);
+"""
+
+PROGRESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_progress (
+    task TEXT NOT NULL,
+    item TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (task, item)
+);
+"""
+
+# Progress task name used for moving legacy state["entries"] into the store
+LEGACY_STATE_TASK = "legacy_state_entries"
+
+
+def _table_exists(conn, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _create_entry_tables(conn):
+    conn.executescript(ENTRY_SCHEMA)
+
+
+def _create_search_index(conn):
+    existed = _table_exists(conn, "journal_entries_fts")
+    conn.executescript(FTS_SCHEMA)
+    if not existed:
+        conn.execute("INSERT INTO journal_entries_fts (journal_entries_fts) VALUES ('rebuild')")
+
+
+def _create_rollups(conn):
+    if aggregates.create_rollups(conn):
+        aggregates.rebuild_rollups(conn)
+
+
+def _create_summary_cache(conn):
+    summaries.create_summary_cache(conn)
+
+
+def _add_epoch_column(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(journal_entries)")]
+    if "ts" not in columns:
+        conn.execute("ALTER TABLE journal_entries ADD COLUMN ts INTEGER NOT NULL DEFAULT 0")
+        rows = conn.execute("SELECT id, timestamp FROM journal_entries").fetchall()
+        conn.executemany(
+            "UPDATE journal_entries SET ts = ? WHERE id = ?",
+            [(to_epoch(timestamp), entry_id) for entry_id, timestamp in rows],
+        )
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_user_ts
+            ON journal_entries (user_id, ts, id);
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_user_mood_ts
+            ON journal_entries (user_id, mood, ts);
+        DROP INDEX IF EXISTS idx_journal_entries_user_timestamp;
+        DROP INDEX IF EXISTS idx_journal_entries_user_mood;
+    """)
+
+
+def _create_progress_table(conn):
+    conn.executescript(PROGRESS_SCHEMA)
+
+
+def _create_response_cache(conn):
+    response_cache.create_response_cache(conn)
+
+
+def _create_session_snapshots(conn):
+    compaction.create_snapshot_table(conn)
+
+
+def _add_suggested_column(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(journal_entries)")]
+    if "suggested" not in columns:
+        # Bit flags (see classifier.SUGGESTED_*) for metadata that was suggested, not given
+        conn.execute("ALTER TABLE journal_entries ADD COLUMN suggested INTEGER NOT NULL DEFAULT 0")
+
+
+def _add_request_key_column(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(journal_entries)")]
+    if "request_key" not in columns:
+        # Idempotency key of the write that added the entry (see context.next_write_key)
+        conn.execute("ALTER TABLE journal_entries ADD COLUMN request_key TEXT")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_journal_entries_request_key
+            ON journal_entries (user_id, request_key) WHERE request_key IS NOT NULL
+    """)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "entry tables", _create_entry_tables),
+    (2, "full-text search index", _create_search_index),
+    (3, "mood/tag/time rollups", _create_rollups),
+    (4, "period summary cache", _create_summary_cache),
+    (5, "integer epoch timestamps", _add_epoch_column),
+    (6, "task progress", _create_progress_table),
+    (7, "agent response cache", _create_response_cache),
+    (8, "session snapshots", _create_session_snapshots),
+    (9, "suggested entry metadata", _add_suggested_column),
+    (10, "idempotent entry writes", _add_request_key_column),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn) -> int:
+    """Return the schema version recorded in the database (0 if unversioned)."""
+    if not _table_exists(conn, "journal_schema_migrations"):
+        return 0
+    return conn.execute("SELECT coalesce(max(version), 0) FROM journal_schema_migrations").fetchone()[0]
+
+
+def ensure_schema(conn, log: Callable[[str], None] = lambda message: None) -> int:
+    """Apply pending schema migrations in order and record each one.
+
+    Returns:
+        The schema version after migrating
+    """
+    conn.executescript(VERSION_SCHEMA)
+    current = schema_version(conn)
+    for version, name, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        log(f"Migrating journal schema to v{version}: {name}")
+        migrate(conn)
+        with conn:
+            conn.execute(
+                "INSERT INTO journal_schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+        current = version
+    return current
+
+
+def record_progress(conn, task: str, item: str, position: int = 0, done: bool = False):
+    """Upsert progress of a resumable task. Call inside the transaction doing the work."""
+    conn.execute(
+        "INSERT INTO journal_progress (task, item, position, done, updated_at) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (task, item) DO UPDATE SET position = excluded.position, done = excluded.done, "
+        "updated_at = excluded.updated_at",
+        (task, item, position, int(done), datetime.datetime.now().isoformat(timespec="seconds")),
+    )
+
+
+def get_progress(conn, task: str, item: str) -> dict:
+    row = conn.execute(
+        "SELECT position, done, updated_at FROM journal_progress WHERE task = ? AND item = ?",
+        (task, item),
+    ).fetchone()
+    if row is None:
+        return {"position": 0, "done": False, "updated_at": None}
+    return {"position": row[0], "done": bool(row[1]), "updated_at": row[2]}
+
+
+def normalize_legacy_entries(entries: list, fallback_timestamp: str) -> List[dict]:
+    """Convert an old ``state["entries"]`` list to the ``add_entry`` schema.
+
+    Legacy entries are either plain strings or dicts that may lack metadata.
+    Entries without a timestamp get ``fallback_timestamp`` (the session's last
+    update) rather than the time of migration.
+    """
+    normalized = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"text": entry}
+        normalized.append({
+            "text": entry.get("text", ""),
+            "timestamp": entry.get("timestamp") or fallback_timestamp,
+            "mood": entry.get("mood"),
+            "tags": entry.get("tags") or [],
+        })
+    return [entry for entry in normalized if entry["text"]]
+
+
+def migrate_session_entries(session_service, store, app_name: str, user_id: str,
+                            log: Callable[[str], None] = print) -> int:
+    """Move entries stored in ADK session state into the entry store, once.
+
+    Each session is imported in a single transaction that also records its
+    progress, then ``entries`` is removed from the session state. Re-running
+    after an interruption skips sessions that were already imported, and once
+    every session of the user is done later startups return immediately.
+
+    Returns:
+        The number of entries moved
+    """
+    from google.adk.events import Event, EventActions
+
+    user_key = f"{app_name}:{user_id}"
+    if store.get_progress(LEGACY_STATE_TASK, user_key)["done"]:
+        return 0
+
+    moved = 0
+    listed = session_service.list_sessions(app_name=app_name, user_id=user_id)
+    for listed_session in listed.sessions if listed else []:
+        session = session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=listed_session.id
+        )
+        legacy_entries = session.state.get("entries") if session else None
+        if not legacy_entries:
+            continue
+
+        if not store.get_progress(LEGACY_STATE_TASK, session.id)["done"]:
+            fallback = datetime.datetime.fromtimestamp(session.last_update_time).isoformat()
+            entries = normalize_legacy_entries(legacy_entries, fallback)
+            store.add_entries(user_id, entries, progress=(LEGACY_STATE_TASK, session.id, len(entries), True))
+            moved += len(entries)
+            log(f"Moved {len(entries)} journal entries from session {session.id} into the entry store")
+
+        # Drop the list from session state; only the version counter remains
+        session_service.append_event(session, Event(
+            author="user",
+            actions=EventActions(state_delta={
+                "entries": None,
+                "entries_version": store.version(user_id),
+            }),
+        ))
+
+    store.set_progress(LEGACY_STATE_TASK, user_key, moved, done=True)
+    return moved
@@ -0,0 +1,191 @@
+"""Compact in-memory journal entries.
+
+A journal loaded as ``get_entries`` dicts costs a dict, an ISO timestamp
+string, a mood string and a list of tag strings per entry. ``RecordSet``
+keeps each entry as an ``EntryRecord`` with ``__slots__``: an integer epoch
+(see ``time_index.to_epoch``), a mood code and a shared tuple of interned
+tag ids, so only the text is stored per entry. Records are converted back
+to the readable dict shape with ``to_dicts`` where a tool returns them.
+
+``dumps`` serializes a record set as JSON with the tag and mood vocabularies
+written once and delta-encoded epochs and ids, and ``loads`` reads it back.
+"""
+import enum
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .time_index import from_epoch
+
+FORMAT_VERSION = 1
+
+
+class Mood(enum.IntEnum):
+    """Codes of the common moods; other moods get codes after these per record set."""
+
+    NONE = 0
+    HAPPY = 1
+    GRATEFUL = 2
+    CALM = 3
+    EXCITED = 4
+    ENERGETIC = 5
+    CONTENT = 6
+    NEUTRAL = 7
+    TIRED = 8
+    STRESSED = 9
+    ANXIOUS = 10
+    SAD = 11
+    FRUSTRATED = 12
+    ANGRY = 13
+
+
+class Vocabulary:
+    """Interns strings as small integer ids, in first-seen order."""
+
+    __slots__ = ("names", "_ids")
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names:
+            self.id(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def id(self, name: str) -> int:
+        """The id of ``name``, assigning the next one on first use."""
+        value = self._ids.get(name)
+        if value is None:
+            value = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return value
+
+
+class EntryRecord:
+    """One journal entry: id, epoch, mood code, tag ids and text."""
+
+    __slots__ = ("id", "epoch", "mood", "tags", "text")
+
+    def __init__(self, entry_id: int, epoch: int, mood: int, tags: Tuple[int, ...], text: str):
+        self.id = entry_id
+        self.epoch = epoch
+        self.mood = mood
+        self.tags = tags
+        self.text = text
+
+
+def _mood_vocabulary() -> Vocabulary:
+    # Codes of common moods are their enum values; code 0 means no mood
+    return Vocabulary([""] + [mood.name.lower() for mood in Mood if mood])
+
+
+class RecordSet:
+    """Compact, ordered collection of ``EntryRecord`` sharing one tag and mood vocabulary."""
+
+    def __init__(self):
+        self.records: List[EntryRecord] = []
+        self.tags = Vocabulary()
+        self.moods = _mood_vocabulary()
+        # Identical tag lists share one tuple, keyed by tag names, tag ids and stored JSON
+        self._tag_sets: Dict[object, Tuple[int, ...]] = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[EntryRecord]:
+        return iter(self.records)
+
+    def add(self, entry_id: int, epoch: int, mood: Optional[str], tags: Iterable[str],
+            text: str) -> EntryRecord:
+        """Append an entry; ``mood`` and ``tags`` must already be normalized."""
+        record = EntryRecord(entry_id, epoch, self.moods.id(mood or ""), self._tag_ids(tuple(tags)), text)
+        self.records.append(record)
+        return record
+
+    def add_row(self, row) -> EntryRecord:
+        """Append a ``journal_entries`` row with ``id``, ``ts``, ``mood``, ``tags`` and ``text``."""
+        tag_ids = self._tag_sets.get(row["tags"])
+        if tag_ids is None:
+            # Most rows repeat a tag list already seen, so its JSON is parsed once
+            tag_ids = self._tag_sets[row["tags"]] = self._tag_ids(tuple(json.loads(row["tags"])))
+        record = EntryRecord(row["id"], row["ts"], self.moods.id(row["mood"] or ""), tag_ids, row["text"])
+        self.records.append(record)
+        return record
+
+    def _tag_ids(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        tag_ids = self._tag_sets.get(tags)
+        if tag_ids is None:
+            tag_ids = tuple(self.tags.id(tag) for tag in tags)
+            tag_ids = self._tag_sets.setdefault(tag_ids, tag_ids)
+            self._tag_sets[tags] = tag_ids
+        return tag_ids
+
+    def mood(self, record: EntryRecord) -> Optional[str]:
+        return self.moods.names[record.mood] or None
+
+    def tag_names(self, record: EntryRecord) -> List[str]:
+        names = self.tags.names
+        return [names[tag_id] for tag_id in record.tags]
+
+    def to_dict(self, record: EntryRecord) -> dict:
+        """The readable dict shape tools return (see ``entries.row_to_entry``)."""
+        return {
+            "id": record.id,
+            "text": record.text,
+            "timestamp": from_epoch(record.epoch),
+            "mood": self.mood(record),
+            "tags": self.tag_names(record),
+        }
+
+    def to_dicts(self) -> List[dict]:
+        return [self.to_dict(record) for record in self.records]
+
+    # ----- Serialization -----
+
+    def dumps(self) -> str:
+        """Serialize as compact JSON: vocabularies once, then one row per entry.
+
+        Rows are ``[id delta, epoch delta, mood code, tag set index, text]``;
+        deltas are taken from the previous row, so rows in timestamp order
+        carry small numbers.
+        """
+        tag_sets: Dict[Tuple[int, ...], int] = {}
+        rows = []
+        last_id = last_epoch = 0
+        for record in self.records:
+            rows.append([record.id - last_id, record.epoch - last_epoch, record.mood,
+                         tag_sets.setdefault(record.tags, len(tag_sets)), record.text])
+            last_id, last_epoch = record.id, record.epoch
+        return json.dumps({
+            "version": FORMAT_VERSION,
+            "moods": self.moods.names[len(Mood):],
+            "tags": self.tags.names,
+            "tag_sets": [list(tag_ids) for tag_ids in tag_sets],
+            "rows": rows,
+        }, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, text: str) -> "RecordSet":
+        """Inverse of ``dumps``.
+
+        Raises:
+            ValueError: If ``text`` is not a serialized record set of a known version
+        """
+        data = json.loads(text)
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            raise ValueError("Not a serialized record set")
+        records = cls()
+        for mood in data["moods"]:
+            records.moods.id(mood)
+        for tag in data["tags"]:
+            records.tags.id(tag)
+        tag_sets = []
+        for tag_ids in data["tag_sets"]:
+            tag_ids = tuple(tag_ids)
+            tag_sets.append(records._tag_sets.setdefault(tag_ids, tag_ids))
+        entry_id = epoch = 0
+        for id_delta, epoch_delta, mood, tag_set, text in data["rows"]:
+            entry_id += id_delta
+            epoch += epoch_delta
+            records.records.append(EntryRecord(entry_id, epoch, mood, tag_sets[tag_set], text))
+        return records
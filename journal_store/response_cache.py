@@ -0,0 +1,118 @@
+import datetime
+import hashlib
+import os
+import re
+from typing import Optional
+
+# Cached agent answers, reused while the user's entries are unchanged.
+# Limits are per user; the least recently used answers are evicted first.
+DEFAULT_TTL_SECONDS = int(os.getenv("JOURNAL_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("JOURNAL_RESPONSE_CACHE_ENTRIES", "200"))
+DEFAULT_MAX_BYTES = int(os.getenv("JOURNAL_RESPONSE_CACHE_BYTES", str(2 * 1024 * 1024)))
+
+RESPONSE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_response_cache (
+    user_id TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    query TEXT NOT NULL,
+    response TEXT NOT NULL,
+    entries_version INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    used_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, query_key)
+);
+CREATE INDEX IF NOT EXISTS idx_journal_response_cache_used
+    ON journal_response_cache (user_id, used_at);
+"""
+
+def normalize_query(query: str) -> str:
+    """Lower-case a request and drop punctuation and extra whitespace."""
+    words = re.findall(r"[\w']+", query.lower())
+    return " ".join(words)
+
+
+def query_key(query: str, today: Optional[datetime.date] = None) -> str:
+    """Cache key of a request on ``today``.
+
+    Every key is dated: "summarize my week", "how was my year" or "how was
+    March" mean another period once the day rolls over, and no pattern
+    catches every such phrasing.
+    """
+    normalized = f"{normalize_query(query)} @{(today or datetime.date.today()).isoformat()}"
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def create_response_cache(conn):
+    conn.executescript(RESPONSE_CACHE_SCHEMA)
+
+
+def get_response(conn, user_id: str, query: str, entries_version: int,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS) -> Optional[str]:
+    """Return the cached answer if it was produced for the current entries and has not expired."""
+    key = query_key(query)
+    row = conn.execute(
+        "SELECT response, entries_version, created_at FROM journal_response_cache "
+        "WHERE user_id = ? AND query_key = ?",
+        (user_id, key),
+    ).fetchone()
+    if row is None:
+        return None
+    now = datetime.datetime.now()
+    expired = now - datetime.datetime.fromisoformat(row[2]) > datetime.timedelta(seconds=ttl_seconds)
+    if row[1] != entries_version or expired:
+        conn.execute("DELETE FROM journal_response_cache WHERE user_id = ? AND query_key = ?", (user_id, key))
+        return None
+    conn.execute(
+        "UPDATE journal_response_cache SET hits = hits + 1, used_at = ? WHERE user_id = ? AND query_key = ?",
+        (now.isoformat(), user_id, key),
+    )
+    return row[0]
+
+
+def put_response(conn, user_id: str, query: str, response: str, entries_version: int,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+    """Store an answer, then evict stale and least recently used answers over the limits."""
+    now = datetime.datetime.now().isoformat()
+    size = len(response.encode())
+    if size > max_bytes:
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO journal_response_cache "
+        "(user_id, query_key, query, response, entries_version, size, hits, created_at, used_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+        (user_id, query_key(query), query, response, entries_version, size, now, now),
+    )
+    # Answers computed for older entries can never be served again
+    conn.execute(
+        "DELETE FROM journal_response_cache WHERE user_id = ? AND entries_version != ?",
+        (user_id, entries_version),
+    )
+    total_entries, total_bytes = conn.execute(
+        "SELECT count(*), coalesce(sum(size), 0) FROM journal_response_cache WHERE user_id = ?",
+        (user_id,),
+    ).fetchone()
+    if total_entries <= max_entries and total_bytes <= max_bytes:
+        return
+    rows = conn.execute(
+        "SELECT query_key, size FROM journal_response_cache WHERE user_id = ? ORDER BY used_at",
+        (user_id,),
+    ).fetchall()
+    evicted = []
+    for key, row_size in rows:
+        if total_entries <= max_entries and total_bytes <= max_bytes:
+            break
+        evicted.append((user_id, key))
+        total_entries -= 1
+        total_bytes -= row_size
+    conn.executemany("DELETE FROM journal_response_cache WHERE user_id = ? AND query_key = ?", evicted)
+
+
+def get_stats(conn, user_id: str) -> dict:
+    row = conn.execute(
+        "SELECT count(*), coalesce(sum(size), 0), coalesce(sum(hits), 0) FROM journal_response_cache "
+        "WHERE user_id = ?",
+        (user_id,),
+    ).fetchone()
+    return {"entries": row[0], "bytes": row[1], "hits": row[2]}
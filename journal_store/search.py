@@ -0,0 +1,65 @@
+import re
+from typing import List
+
+# A quoted phrase, or a bare word with an optional trailing * for prefix search
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS journal_entries_fts USING fts5 (
+    text,
+    content = 'journal_entries',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS journal_entries_fts_insert AFTER INSERT ON journal_entries BEGIN
+    INSERT INTO journal_entries_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+
+def _quote(words: List[str]) -> str:
+    return '"%s"' % " ".join(words)
+
+
+def parse_search_query(query: str, operator: str = "AND") -> str:
+    """Translate a user search string into an FTS5 MATCH expression.
+
+    Supported syntax:
+        coffee morning   - entries containing every term (ranked by BM25)
+        run*             - prefix match (running, runner, ...)
+        "morning coffee" - exact phrase
+        coffee OR tea    - either term
+
+    Anything else is treated as plain words, so user input can never produce
+    an FTS5 syntax error. ``operator`` joins terms that have no explicit OR.
+
+    Returns:
+        The MATCH expression, or an empty string if the query has no words
+    """
+    parts = []
+    pending_or = False
+    for match in _TOKEN_RE.finditer(query):
+        phrase, word = match.groups()
+        if word == "OR":
+            pending_or = bool(parts)
+            continue
+        if phrase is not None:
+            words = _WORD_RE.findall(phrase.lower())
+            term = _quote(words) if words else None
+        else:
+            words = _WORD_RE.findall(word.lower())
+            if not words:
+                term = None
+            elif word.endswith("*") and len(words) == 1:
+                term = _quote(words) + "*"
+            else:
+                # "e-mail" or "o'clock" become phrases of their word parts
+                term = _quote(words)
+        if term is None:
+            continue
+        if parts:
+            parts.append("OR" if pending_or else operator)
+        parts.append(term)
+        pending_or = False
+    return " ".join(parts)
@@ -0,0 +1,387 @@
+"""Session service for the journal app: WAL SQLite, pooled connections, write-behind events.
+
+``JournalSessionService`` is a drop-in replacement for ADK's
+``DatabaseSessionService`` (same tables, same URL):
+
+* Connections come from a pool and are opened in WAL mode with a busy
+  timeout, so readers never wait on the writer and concurrent writers wait
+  instead of failing with "database is locked".
+* ``append_event`` (called by the Runner on the event loop for every event)
+  only updates the in-memory session and queues the event. A background
+  writer commits queued events in batches, one transaction per batch.
+* Sessions are cached after their first load, so ``get_session`` at the start
+  of each turn does not re-read the whole history from SQLite.
+* ``*_async`` variants of the remaining database calls run them on the
+  service's thread pool instead of the event loop.
+
+Queued events are committed within milliseconds, ``flush()`` waits for them,
+and ``close()`` (also run at exit) flushes before shutting the writer down.
+Turns of one session must not overlap (``server.py`` and ``main.py``
+serialize them), since the last-update-time check of the synchronous
+service is not repeated.
+"""
+import asyncio
+import atexit
+import base64
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Optional
+
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.database_session_service import (
+    Base,
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+    _extract_state_delta,
+)
+from google.adk.sessions.state import State
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.engine import create_engine
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import MetaData
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("JOURNAL_SESSION_POOL_SIZE", "4"))
+# Events committed per transaction at most
+BATCH_SIZE = int(os.getenv("JOURNAL_SESSION_BATCH_SIZE", "256"))
+# Sessions kept in memory (least recently used are dropped first)
+CACHE_SESSIONS = int(os.getenv("JOURNAL_SESSION_CACHE", "512"))
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # Durable at checkpoints; in WAL mode a power loss can only drop the last commits
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+_STOP = object()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class JournalSessionService(DatabaseSessionService):
+    """``DatabaseSessionService`` with pooled WAL connections and batched event writes."""
+
+    def __init__(self, db_url: str, pool_size: int = POOL_SIZE, batch_size: int = BATCH_SIZE,
+                 cache_sessions: int = CACHE_SESSIONS):
+        """
+        Args:
+            db_url: Database URL, e.g. ``sqlite:///./my_daily_journal_data.db``
+            pool_size: Pooled database connections (and worker threads for ``*_async``)
+            batch_size: Most events committed in one transaction
+            cache_sessions: Sessions kept in memory
+        """
+        engine_options = {}
+        if db_url.startswith("sqlite") and ":memory:" not in db_url and db_url != "sqlite://":
+            engine_options = {
+                "pool_size": pool_size,
+                "max_overflow": pool_size,
+                "connect_args": {"check_same_thread": False, "timeout": 30},
+            }
+        try:
+            self.db_engine = create_engine(db_url, **engine_options)
+        except Exception as e:
+            raise ValueError(f"Failed to create database engine for URL '{db_url}'") from e
+        if self.db_engine.dialect.name == "sqlite":
+            sqlalchemy_event.listen(self.db_engine, "connect", _set_sqlite_pragmas)
+        self.metadata = MetaData()
+        self.inspector = inspect(self.db_engine)
+        self.DatabaseSessionFactory = sessionmaker(bind=self.db_engine, expire_on_commit=False)
+        Base.metadata.create_all(self.db_engine)
+
+        self.batch_size = batch_size
+        self.cache_sessions = cache_sessions
+        self._cache = OrderedDict()  # (app_name, user_id, session_id) -> Session
+        self._cache_lock = threading.RLock()
+        self._create_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = defaultdict(int)  # session key -> queued events not yet committed
+        self._pending_changed = threading.Condition()
+        self._write_error: Optional[BaseException] = None
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="journal-session")
+        self.batches = 0
+        self.events_written = 0
+        self._writer = threading.Thread(target=self._write_loop, name="journal-session-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ----- BaseSessionService -----
+
+    def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                       session_id: Optional[str] = None):
+        # The first session of an app or user also inserts its shared state row,
+        # so concurrent creations would collide on it
+        with self._create_lock:
+            session = super().create_session(app_name=app_name, user_id=user_id, state=state,
+                                             session_id=session_id)
+        self._remember(session)
+        return _copy_session(session)
+
+    def get_session(self, *, app_name: str, user_id: str, session_id: str, config=None):
+        key = (app_name, user_id, session_id)
+        with self._cache_lock:
+            session = self._cache.get(key)
+            if session is not None:
+                self._cache.move_to_end(key)
+        if session is None:
+            # Evicted sessions may still have events on their way to the database
+            self._wait_for(key)
+            session = super().get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            if session is None:
+                return None
+            session.events.sort(key=lambda event: event.timestamp)
+            session = self._remember(session)
+        copied = _copy_session(session)
+        if config:
+            if config.num_recent_events:
+                copied.events = copied.events[-config.num_recent_events:]
+            elif config.after_timestamp:
+                copied.events = [e for e in copied.events if e.timestamp >= config.after_timestamp]
+        return copied
+
+    def delete_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        with self._cache_lock:
+            self._cache.pop(key, None)
+        self._wait_for(key)
+        super().delete_session(app_name, user_id, session_id)
+
+    def invalidate(self, app_name: str, user_id: str, session_id: str):
+        """Drop a cached session so the next ``get_session`` reads it again (after compaction)."""
+        with self._cache_lock:
+            self._cache.pop((app_name, user_id, session_id), None)
+
+    def append_event(self, session, event):
+        """Apply ``event`` in memory and queue it for the background writer."""
+        if event.partial:
+            return event
+        if self._write_error is not None:
+            raise RuntimeError("journal session writer failed") from self._write_error
+        key = (session.app_name, session.user_id, session.id)
+        # Updates the caller's session object (state and events)
+        super(DatabaseSessionService, self).append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached is not session:
+                cached.events.append(event)
+                _apply_state_delta(cached.state, event)
+                cached.last_update_time = event.timestamp
+            self._share_app_and_user_state(key, event)
+        with self._pending_changed:
+            self._pending[key] += 1
+        self._queue.put((key, event))
+        return event
+
+    # ----- Non-blocking variants -----
+
+    async def create_session_async(self, **kwargs):
+        return await self._run(lambda: self.create_session(**kwargs))
+
+    async def get_session_async(self, **kwargs):
+        return await self._run(lambda: self.get_session(**kwargs))
+
+    async def list_sessions_async(self, **kwargs):
+        return await self._run(lambda: self.list_sessions(**kwargs))
+
+    async def flush_async(self):
+        await self._run(self.flush)
+
+    async def _run(self, function):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function)
+
+    # ----- Writer -----
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until every queued event is committed.
+
+        Raises:
+            RuntimeError: If the background writer failed to commit events
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._pending_changed:
+            while self._pending and self._write_error is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("queued session events were not written in time")
+                self._pending_changed.wait(remaining)
+        if self._write_error is not None:
+            raise RuntimeError("journal session writer failed") from self._write_error
+
+    def close(self):
+        """Flush queued events and stop the writer thread."""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._executor.shutdown(wait=True)
+        atexit.unregister(self.close)
+
+    def stats(self) -> dict:
+        with self._pending_changed:
+            pending = sum(self._pending.values())
+        return {
+            "events_written": self.events_written,
+            "batches": self.batches,
+            "events_per_batch": round(self.events_written / self.batches, 1) if self.batches else 0.0,
+            "pending_events": pending,
+            "cached_sessions": len(self._cache),
+        }
+
+    def _wait_for(self, key):
+        with self._pending_changed:
+            while self._pending.get(key) and self._write_error is None:
+                self._pending_changed.wait()
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Everything queued while the previous batch committed goes into this one
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.exception("Failed to write %d session events", len(batch))
+                self._write_error = e
+            with self._pending_changed:
+                for key, _ in batch:
+                    self._pending[key] -= 1
+                    if not self._pending[key]:
+                        del self._pending[key]
+                self._pending_changed.notify_all()
+
+    def _write_batch(self, batch):
+        with self.DatabaseSessionFactory() as db:
+            sessions = {}
+            app_states = {}
+            user_states = {}
+            for (app_name, user_id, session_id), event in batch:
+                key = (app_name, user_id, session_id)
+                if key not in sessions:
+                    sessions[key] = db.get(StorageSession, key)
+                storage_session = sessions[key]
+                if storage_session is None:
+                    logger.warning("Dropping event %s of deleted session %s", event.id, session_id)
+                    continue
+                if event.actions and event.actions.state_delta:
+                    app_delta, user_delta, session_delta = _extract_state_delta(event.actions.state_delta)
+                    if app_delta:
+                        if app_name not in app_states:
+                            app_states[app_name] = db.get(StorageAppState, app_name) or \
+                                _added(db, StorageAppState(app_name=app_name, state={}))
+                        app_states[app_name].state.update(app_delta)
+                    if user_delta:
+                        if (app_name, user_id) not in user_states:
+                            user_states[(app_name, user_id)] = db.get(StorageUserState, (app_name, user_id)) or \
+                                _added(db, StorageUserState(app_name=app_name, user_id=user_id, state={}))
+                        user_states[(app_name, user_id)].state.update(user_delta)
+                    if session_delta:
+                        storage_session.state.update(session_delta)
+                storage_session.update_time = datetime.fromtimestamp(event.timestamp)
+                db.add(_storage_event(key, event))
+            db.commit()
+        self.batches += 1
+        self.events_written += len(batch)
+
+    # ----- Cache -----
+
+    def _remember(self, session):
+        key = (session.app_name, session.user_id, session.id)
+        with self._cache_lock:
+            cached = self._cache.setdefault(key, session)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_sessions:
+                self._cache.popitem(last=False)
+            return cached
+
+    def _share_app_and_user_state(self, key, event):
+        """Copy ``app:`` and ``user:`` deltas into other cached sessions they apply to."""
+        delta = event.actions.state_delta if event.actions else None
+        if not delta:
+            return
+        shared = {name: value for name, value in delta.items()
+                  if name.startswith((State.APP_PREFIX, State.USER_PREFIX))}
+        if not shared:
+            return
+        app_name, user_id, _ = key
+        for (other_app, other_user, _), other in self._cache.items():
+            if other_app != app_name:
+                continue
+            for name, value in shared.items():
+                if name.startswith(State.APP_PREFIX) or other_user == user_id:
+                    other.state[name] = value
+
+
+def _apply_state_delta(state: dict, event):
+    if event.actions and event.actions.state_delta:
+        for name, value in event.actions.state_delta.items():
+            if not name.startswith(State.TEMP_PREFIX):
+                state[name] = value
+
+
+def _copy_session(session):
+    # Events are never modified once appended, so a new list is enough
+    return session.model_copy(update={"state": dict(session.state), "events": list(session.events)})
+
+
+def _added(db, row):
+    db.add(row)
+    return row
+
+
+def _storage_event(key, event) -> StorageEvent:
+    app_name, user_id, session_id = key
+    storage_event = StorageEvent(
+        id=event.id,
+        invocation_id=event.invocation_id,
+        author=event.author,
+        branch=event.branch,
+        actions=event.actions,
+        session_id=session_id,
+        app_name=app_name,
+        user_id=user_id,
+        timestamp=datetime.fromtimestamp(event.timestamp),
+        long_running_tool_ids=event.long_running_tool_ids,
+        grounding_metadata=event.grounding_metadata,
+        partial=event.partial,
+        turn_complete=event.turn_complete,
+        error_code=event.error_code,
+        error_message=event.error_message,
+        interrupted=event.interrupted,
+    )
+    if event.content:
+        content = event.content.model_dump(exclude_none=True)
+        # Same encoding of inline data as DatabaseSessionService.append_event
+        for part in content.get("parts", []):
+            if "inline_data" in part:
+                part["inline_data"]["data"] = (base64.b64encode(part["inline_data"]["data"]).decode("utf-8"),)
+        storage_event.content = content
+    return storage_event
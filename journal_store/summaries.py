@@ -0,0 +1,164 @@
+import calendar
+import datetime
+import re
+from typing import List, NamedTuple, Optional
+
+# Period summaries form a strict hierarchy so higher levels can be built from
+# cached lower levels: a year is 12 months and a month is split into weeks of
+# days 1-7, 8-14, 15-21, 22-28 and 29-end ("2024-03-W1" ... "2024-03-W5").
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_period_summaries (
+    user_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    entry_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, period)
+);
+CREATE TABLE IF NOT EXISTS journal_summary_stats (
+    user_id TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    model_calls INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_PERIOD_RE = re.compile(r"^(\d{4})(?:-(\d{2})(?:-W([1-5]))?)?$")
+
+
+class Period(NamedTuple):
+    key: str
+    kind: str  # "year", "month" or "week"
+    start: datetime.date
+    end: datetime.date  # inclusive
+
+    def children(self) -> List["Period"]:
+        """The periods this one is summarized from (empty for weeks)."""
+        if self.kind == "year":
+            return [parse_period(f"{self.key}-{month:02d}") for month in range(1, 13)]
+        if self.kind == "month":
+            last_day = self.end.day
+            return [parse_period(f"{self.key}-W{week}") for week in range(1, 6)
+                    if (week - 1) * 7 + 1 <= last_day]
+        return []
+
+
+def parse_period(period: str) -> Period:
+    """Parse "2024", "2024-03" or "2024-03-W2" into a Period.
+
+    Raises:
+        ValueError: If the string is not a valid period
+    """
+    match = _PERIOD_RE.match(period.strip())
+    if not match:
+        raise ValueError(
+            f"Invalid period '{period}'. Use YYYY for a year, YYYY-MM for a month "
+            f"or YYYY-MM-W1..W5 for a week of a month."
+        )
+    year, month, week = match.groups()
+    year = int(year)
+    if month is None:
+        return Period(f"{year:04d}", "year", datetime.date(year, 1, 1), datetime.date(year, 12, 31))
+    month = int(month)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month in period '{period}'")
+    last_day = calendar.monthrange(year, month)[1]
+    if week is None:
+        return Period(f"{year:04d}-{month:02d}", "month",
+                      datetime.date(year, month, 1), datetime.date(year, month, last_day))
+    first = (int(week) - 1) * 7 + 1
+    if first > last_day:
+        raise ValueError(f"Week {week} does not exist in {year:04d}-{month:02d}")
+    last = last_day if int(week) == 5 else first + 6
+    return Period(f"{year:04d}-{month:02d}-W{week}", "week",
+                  datetime.date(year, month, first), datetime.date(year, month, last))
+
+
+def resolve_period(period: str, today: Optional[datetime.date] = None) -> str:
+    """Map "this year", "last year", "this month" and "last month" to period keys."""
+    today = today or datetime.date.today()
+    relative = period.strip().lower()
+    if relative == "this year":
+        return f"{today.year:04d}"
+    if relative == "last year":
+        return f"{today.year - 1:04d}"
+    if relative == "this month":
+        return f"{today.year:04d}-{today.month:02d}"
+    if relative == "last month":
+        last = today.replace(day=1) - datetime.timedelta(days=1)
+        return f"{last.year:04d}-{last.month:02d}"
+    return period
+
+
+def periods_containing(day: datetime.date) -> List[str]:
+    """Keys of the week, month and year that contain ``day``."""
+    week = min((day.day - 1) // 7 + 1, 5)
+    return [
+        f"{day.year:04d}-{day.month:02d}-W{week}",
+        f"{day.year:04d}-{day.month:02d}",
+        f"{day.year:04d}",
+    ]
+
+
+def create_summary_cache(conn):
+    conn.executescript(SUMMARY_SCHEMA)
+
+
+def invalidate(conn, user_id: str, timestamp: str):
+    """Drop cached summaries of every period an entry at ``timestamp`` falls in."""
+    keys = periods_containing(datetime.date.fromisoformat(timestamp[:10]))
+    conn.execute(
+        "DELETE FROM journal_period_summaries WHERE user_id = ? AND period IN (?, ?, ?)",
+        [user_id] + keys,
+    )
+
+
+def get_summary(conn, user_id: str, period: str) -> Optional[dict]:
+    row = conn.execute(
+        "SELECT period, kind, summary, entry_count, created_at FROM journal_period_summaries "
+        "WHERE user_id = ? AND period = ?",
+        (user_id, period),
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "period": row[0],
+        "kind": row[1],
+        "summary": row[2],
+        "entry_count": row[3],
+        "created_at": row[4],
+    }
+
+
+def put_summary(conn, user_id: str, period: Period, summary: str, entry_count: int):
+    conn.execute(
+        "INSERT OR REPLACE INTO journal_period_summaries "
+        "(user_id, period, kind, summary, entry_count, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, period.key, period.kind, summary, entry_count,
+         datetime.datetime.now().isoformat(timespec="seconds")),
+    )
+
+
+def record_stats(conn, user_id: str, hits: int, misses: int, model_calls: int):
+    conn.execute(
+        "INSERT INTO journal_summary_stats (user_id, hits, misses, model_calls) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (user_id) DO UPDATE SET hits = hits + excluded.hits, "
+        "misses = misses + excluded.misses, model_calls = model_calls + excluded.model_calls",
+        (user_id, hits, misses, model_calls),
+    )
+
+
+def get_stats(conn, user_id: str) -> dict:
+    row = conn.execute(
+        "SELECT hits, misses, model_calls FROM journal_summary_stats WHERE user_id = ?",
+        (user_id,),
+    ).fetchone()
+    hits, misses, model_calls = row if row else (0, 0, 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "model_calls": model_calls,
+        "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+    }
@@ -0,0 +1,101 @@
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional, Tuple
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def to_epoch(timestamp: str) -> int:
+    """Convert an ISO timestamp to integer microseconds since 1970-01-01.
+
+    Timestamps are naive local times (``datetime.now().isoformat()``), so they
+    are counted as-is; timestamps with an offset are converted to local time
+    first. Dates without a time mean midnight.
+    """
+    value = datetime.datetime.fromisoformat(timestamp)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_epoch(epoch: int) -> str:
+    """Inverse of ``to_epoch``."""
+    return (_EPOCH + epoch * _MICROSECOND).isoformat()
+
+
+def parse_date_range(start: Optional[str] = None, end: Optional[str] = None,
+                     recent_days: Optional[int] = None,
+                     now: Optional[datetime.datetime] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Turn user-facing range arguments into ``(since, until)`` ISO timestamps.
+
+    ``start`` is inclusive. ``end`` is inclusive too: a bare date such as
+    "2024-03-31" covers that whole day. ``recent_days`` is used when no start
+    is given. Either bound may be None.
+
+    Raises:
+        ValueError: If a date cannot be parsed
+    """
+    since = until = None
+    if start:
+        since = datetime.datetime.fromisoformat(start).isoformat()
+    elif recent_days:
+        since = ((now or datetime.datetime.now()) - datetime.timedelta(days=recent_days)).isoformat()
+    if end:
+        end_value = datetime.datetime.fromisoformat(end)
+        if len(end) <= 10:
+            until = (end_value + datetime.timedelta(days=1)).isoformat()
+        else:
+            until = (end_value + _MICROSECOND).isoformat()
+    return since, until
+
+
+class TimeIndex:
+    """Sorted, array-backed (epoch, entry id) index for one user's journal.
+
+    Two parallel ``array('q')`` columns hold epochs and ids ordered by
+    (epoch, id). A date-range filter is two binary searches and a slice, and
+    appending an entry newer than all others is O(1).
+    """
+
+    __slots__ = ("epochs", "ids")
+
+    def __init__(self, rows: Iterable[Tuple[int, int]] = ()):
+        self.epochs = array("q")
+        self.ids = array("q")
+        for epoch, entry_id in rows:
+            self.epochs.append(epoch)
+            self.ids.append(entry_id)
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def add(self, epoch: int, entry_id: int):
+        """Insert an entry, keeping (epoch, id) order."""
+        if not self.epochs or (epoch, entry_id) >= (self.epochs[-1], self.ids[-1]):
+            self.epochs.append(epoch)
+            self.ids.append(entry_id)
+            return
+        position = self.position(epoch, entry_id)
+        self.epochs.insert(position, epoch)
+        self.ids.insert(position, entry_id)
+
+    def position(self, epoch: int, entry_id: int) -> int:
+        """Index of the first item at or after (epoch, entry_id)."""
+        low = bisect_left(self.epochs, epoch)
+        high = bisect_right(self.epochs, epoch, low)
+        # Ties on the epoch are ordered by id; they are rare, so scan them
+        while low < high and self.ids[low] < entry_id:
+            low += 1
+        return low
+
+    def span(self, since: Optional[int] = None, until: Optional[int] = None) -> Tuple[int, int]:
+        """Positions [low, high) of entries with since <= epoch < until."""
+        low = 0 if since is None else bisect_left(self.epochs, since)
+        high = len(self.epochs) if until is None else bisect_left(self.epochs, until, low)
+        return low, max(low, high)
+
+    def count(self, since: Optional[int] = None, until: Optional[int] = None) -> int:
+        low, high = self.span(since, until)
+        return high - low
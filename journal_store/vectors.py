@@ -0,0 +1,169 @@
+import hashlib
+import math
+import os
+import re
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Hashed feature space. 512 float32 columns is 2 KB per entry, so 100k
+# entries fit in ~200 MB and a full scan is a single matrix-vector product.
+DIMENSIONS = 512
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been but by can could did do does
+for from had has have he her him his how i i'm if in into is it it's its just me
+more my no not of on or our out she so some than that the their them then there
+they this to too up us was we were what when which who will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words without stopwords, plus adjacent word pairs."""
+    words = [word.strip("'") for word in _WORD_RE.findall(text.lower())]
+    words = [word for word in words if word and word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _feature(token: str) -> Tuple[int, float]:
+    # crc32 is stable across processes, unlike hash(); the top bit picks the sign
+    code = zlib.crc32(token.encode())
+    return code % DIMENSIONS, -1.0 if code & 0x80000000 else 1.0
+
+
+def embed(text: str) -> np.ndarray:
+    """Unit-length signed hashing vector of ``text`` with sublinear term counts."""
+    counts = {}
+    for token in tokenize(text):
+        counts[token] = counts.get(token, 0) + 1
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for token, count in counts.items():
+        column, sign = _feature(token)
+        vector[column] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def entry_text(entry: dict) -> str:
+    """Text embedded for an entry: its body followed by its tags."""
+    return " ".join([entry["text"]] + list(entry.get("tags") or []))
+
+
+class VectorIndex:
+    """One user's entry vectors as a float32 matrix, persisted next to the DB.
+
+    Rows are appended to ``<name>.f32`` (vectors) and ``<name>.ids`` (int64
+    entry ids) as entries are added, so updates never rewrite the files.
+    Document frequencies per hashed column are kept alongside and used to
+    weight query terms, so common words count for less than rare ones.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.matrix = np.zeros((64, DIMENSIONS), dtype=np.float32)
+        self.ids = np.zeros(64, dtype=np.int64)
+        self.document_frequency = np.zeros(DIMENSIONS, dtype=np.float64)
+        self.size = 0
+        if path and os.path.exists(path + ".f32") and os.path.exists(path + ".ids"):
+            vectors = np.fromfile(path + ".f32", dtype=np.float32)
+            ids = np.fromfile(path + ".ids", dtype=np.int64)
+            rows = min(len(ids), len(vectors) // DIMENSIONS)
+            # Drop a partially written trailing row; it is re-added on catch-up
+            self._grow(rows)
+            self.matrix[:rows] = vectors[:rows * DIMENSIONS].reshape(rows, DIMENSIONS)
+            self.ids[:rows] = ids[:rows]
+            self.size = rows
+            # Two processes catching up on the same entries both append them; keep the first copy
+            _, first = np.unique(self.ids[:rows], return_index=True)
+            if len(first) < rows:
+                keep = np.sort(first)
+                self.matrix[:len(keep)] = self.matrix[keep]
+                self.ids[:len(keep)] = self.ids[keep]
+                self.size = len(keep)
+            self.document_frequency = (self.matrix[:self.size] != 0).sum(axis=0).astype(np.float64)
+            if self.size != len(ids) or rows * DIMENSIONS != len(vectors):
+                self._rewrite()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_id(self) -> int:
+        return int(self.ids[:self.size].max()) if self.size else 0
+
+    def add(self, entries: Iterable[Tuple[int, str]]):
+        """Embed and append ``(entry_id, text)`` pairs."""
+        new_ids = []
+        new_vectors = []
+        for entry_id, text in entries:
+            new_ids.append(entry_id)
+            new_vectors.append(embed(text))
+        if not new_ids:
+            return
+        vectors = np.vstack(new_vectors)
+        ids = np.asarray(new_ids, dtype=np.int64)
+        self._grow(self.size + len(ids))
+        self.matrix[self.size:self.size + len(ids)] = vectors
+        self.ids[self.size:self.size + len(ids)] = ids
+        self.size += len(ids)
+        self.document_frequency += (vectors != 0).sum(axis=0)
+        if self.path:
+            with open(self.path + ".f32", "ab") as f:
+                vectors.tofile(f)
+            with open(self.path + ".ids", "ab") as f:
+                ids.tofile(f)
+
+    def query(self, text: str, k: int = 10, allowed_ids: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(entry_id, cosine similarity)`` pairs, best first.
+
+        Args:
+            text: Free-text query
+            k: Number of results
+            allowed_ids: Optional sorted array of entry ids to restrict results to
+        """
+        vector = embed(text)
+        if not self.size or not vector.any():
+            return []
+        idf = np.log((1 + self.size) / (1 + self.document_frequency)) + 1.0
+        vector = (vector * idf).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        scores = self.matrix[:self.size] @ vector
+        if allowed_ids is not None:
+            scores = np.where(np.isin(self.ids[:self.size], allowed_ids), scores, 0.0)
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[row]), round(float(scores[row]), 4)) for row in top if scores[row] > 0]
+
+    def reset(self):
+        """Drop every vector (used when the files no longer match the database)."""
+        self.size = 0
+        self.document_frequency[:] = 0
+        if self.path:
+            self._rewrite()
+
+    def _grow(self, rows: int):
+        if rows <= len(self.ids):
+            return
+        capacity = max(rows, 2 * len(self.ids))
+        matrix = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self.size] = self.ids[:self.size]
+        self.matrix, self.ids = matrix, ids
+
+    def _rewrite(self):
+        self.matrix[:self.size].tofile(self.path + ".f32")
+        self.ids[:self.size].tofile(self.path + ".ids")
+
+
+def index_path(db_path: str, user_id: str) -> Optional[str]:
+    """File prefix of a user's vectors, in a directory next to the database."""
+    if not db_path or db_path == ":memory:":
+        return None
+    directory = f"{db_path}.vectors"
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.sha1(user_id.encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{name}-{DIMENSIONS}")
@@ -1,58 +1,93 @@
+import argparse
 import asyncio
-
-from dotenv import load_dotenv
-from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
-from memory_agent.agent import memory_agent  # Import the manager agent
-from utils import call_agent_async
+import concurrent.futures
 import os
-load_dotenv()
-# Debug: Print environment loading
-print("=== ENVIRONMENT DEBUG ===")
-print(f"Current working directory: {os.getcwd()}")
-print(f"Files in current directory: {os.listdir('.')}")
-
-# Check if .env file exists
-if os.path.exists('.env'):
-    print("✅ .env file found")
-    with open('.env', 'r') as f:
-        content = f.read()
-        print(f".env content preview: {content[:50]}...")
-else:
-    print("❌ .env file NOT found")
-
-# Check if API key is loaded
-api_key = os.getenv('GOOGLE_API_KEY')
-if api_key:
-    print(f"✅ API key loaded: {api_key[:10]}...{api_key[-4:]}")
-else:
-    print("❌ API key not found in environment")
-    print("Available env vars:", [k for k in os.environ.keys() if 'GOOGLE' in k])
+import threading
+import time
 
-print("========================")
+# Setup constants
+APP_NAME = "Journal Manager System"
+USER_ID = "rz"
 
+# Using SQLite database for persistent storage (WAL mode, events written in the background)
+db_path = "./my_daily_journal_data.db"
+db_url = f"sqlite:///{db_path}"
 
 
-# ===== PART 1: Initialize Persistent Session Service =====
-# Using SQLite database for persistent storage
-db_url = "sqlite:///./my_daily_journal_data.db"
-session_service = DatabaseSessionService(db_url=db_url)
-
-
-# ===== PART 2: Define Initial State =====utils.py
+# ===== PART 1: Define Initial State =====
 # This will only be used when creating a new session
 initial_state = {
     "user_name": "Raymond Zialcita",
-    "entries": [],
+    # Entries are kept in the entry store; state only tracks its version
+    "entries_version": 0,
 }
 
 
-async def main_async():
-    # Setup constants
-    APP_NAME = "Journal Manager System"
-    USER_ID = "rz"
+def print_environment_debug():
+    """Show where the configuration comes from (``--debug`` only)."""
+    print("=== ENVIRONMENT DEBUG ===")
+    print(f"Current working directory: {os.getcwd()}")
+    print(f"Files in current directory: {os.listdir('.')}")
+
+    # Check if .env file exists
+    if os.path.exists('.env'):
+        print("✅ .env file found")
+        with open('.env', 'r') as f:
+            content = f.read()
+            print(f".env content preview: {content[:50]}...")
+    else:
+        print("❌ .env file NOT found")
+
+    # Check if API key is loaded
+    api_key = os.getenv('GOOGLE_API_KEY')
+    if api_key:
+        print(f"✅ API key loaded: {api_key[:10]}...{api_key[-4:]}")
+    else:
+        print("❌ API key not found in environment")
+        print("Available env vars:", [k for k in os.environ.keys() if 'GOOGLE' in k])
+
+    print("========================")
+
+
+def start_journal() -> dict:
+    """Open storage, import the agents and find or create the session.
+
+    Runs in a background thread while the first prompt is already waiting
+    for input, so importing google.adk and the SQLite work overlap with the
+    user typing instead of delaying the prompt.
+    """
+    started = time.perf_counter()
+    from google.adk.runners import Runner
+    from journal_store import configure_entry_store, migrate_session_entries
+    from journal_store.compaction import archive_dir, compact_user_sessions
+    from journal_store.session_service import JournalSessionService
+    from memory_agent.agent import memory_agent  # Import the manager agent
+    from memory_agent.llm import schedule_model_calls
+    from memory_agent.router import IntentRouter
+    from memory_agent.scheduler import ModelScheduler, TurnScheduler
+    from tracing import Tracer
+
+    # ===== PART 2: Initialize Persistent Session Service =====
+    session_service = JournalSessionService(db_url=db_url)
+
+    # Optional per-turn tracing (set JOURNAL_TRACE_DIR to enable)
+    tracer = Tracer.from_env()
+    if tracer:
+        tracer.instrument_session_service(session_service)
+        tracer.instrument_agent(memory_agent)
+    # Model calls are rate limited and retried on transient errors
+    model_scheduler = schedule_model_calls(memory_agent, ModelScheduler())
+
+    # Journal entries live in their own indexed tables in the same database file.
+    # Opening the store applies any pending schema migrations.
+    entry_store = configure_entry_store(db_path, log=print)
 
     # ===== PART 3: Session Management - Find or Create =====
+    # One-time move of entries kept in session state by older versions
+    migrate_session_entries(session_service, entry_store, APP_NAME, USER_ID)
+    # Keep resumed sessions bounded; pruned events are archived next to the database
+    compact_user_sessions(session_service, entry_store, APP_NAME, USER_ID, archive_path=archive_dir(db_path))
+
     # Check for existing sessions for this user
     existing_sessions = session_service.list_sessions(
         app_name=APP_NAME,
@@ -62,8 +97,8 @@ async def main_async():
     # If there's an existing session, use it, otherwise create a new one
     if existing_sessions and len(existing_sessions.sessions) > 0:
         # Use the most recent session
-        SESSION_ID = existing_sessions.sessions[0].id
-        print(f"Continuing existing session: {SESSION_ID}")
+        session_id = existing_sessions.sessions[0].id
+        session_message = f"Continuing existing session: {session_id}"
     else:
         # Create a new session with initial state
         new_session = session_service.create_session(
@@ -71,8 +106,8 @@ async def main_async():
             user_id=USER_ID,
             state=initial_state,
         )
-        SESSION_ID = new_session.id
-        print(f"Created new session: {SESSION_ID}")
+        session_id = new_session.id
+        session_message = f"Created new session: {session_id}"
 
     # ===== PART 4: Manager Agent Runner Setup =====
     # Create a runner with the manager agent (which coordinates sub-agents)
@@ -81,6 +116,57 @@ async def main_async():
         app_name=APP_NAME,
         session_service=session_service,
     )
+    # Unambiguous requests skip the manager agent's routing call
+    router = IntentRouter(session_service, APP_NAME)
+    return {
+        "runner": runner,
+        "router": router,
+        # Failed turns are retried without repeating the entries they added
+        "turns": TurnScheduler(runner, router=router, tracer=tracer),
+        "model_scheduler": model_scheduler,
+        "session_service": session_service,
+        "entry_store": entry_store,
+        "session_id": session_id,
+        "session_message": session_message,
+        "tracer": tracer,
+        "startup_seconds": time.perf_counter() - started,
+    }
+
+
+def prewarm_journal(journal: dict):
+    """Load the session and the user's entry indexes before the first turn needs them."""
+    journal["session_service"].get_session(app_name=APP_NAME, user_id=USER_ID, session_id=journal["session_id"])
+    entry_store = journal["entry_store"]
+    entry_store.time_index(USER_ID)
+    entry_store.bitmap_index(USER_ID)
+    entry_store.classifier(USER_ID)
+    entry_store.vector_index(USER_ID)
+
+
+def start_in_background() -> concurrent.futures.Future:
+    """Start the journal in a daemon thread; the future resolves once it can take turns.
+
+    The thread goes on to pre-warm the indexes, which only reads, so exiting
+    while it runs loses nothing.
+    """
+    ready = concurrent.futures.Future()
+
+    def run():
+        try:
+            journal = start_journal()
+        except BaseException as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(journal)
+        prewarm_journal(journal)
+
+    threading.Thread(target=run, name="journal-startup", daemon=True).start()
+    return ready
+
+
+async def main_async(stream=True, debug=False):
+    ready = start_in_background()
+    journal = None
 
     # ===== PART 5: Interactive Conversation Loop =====
     print("\nWelcome to the Advanced Journal Management System!")
@@ -94,14 +180,42 @@ async def main_async():
         # Get user input
         user_input = input("You: ")
 
+        if journal is None:
+            # Usually ready by now; otherwise wait for the rest of startup
+            journal = await asyncio.wrap_future(ready)
+            if debug:
+                print(f"{journal['session_message']} (ready in {journal['startup_seconds']:.2f}s)")
+            # google.adk is loaded by now, so this import is cheap
+            from utils import LatencyStats
+            # Time to first text and total time per turn, summarized on exit
+            latency = LatencyStats()
+        router, tracer = journal["router"], journal["tracer"]
+
         # Check if user wants to exit
         if user_input.lower() in ["exit", "quit"]:
+            print(f"Router: {router.stats_line()}")
+            print(f"Turns: {journal['turns'].stats_line()}")
+            print(f"Latency: {latency.summary_line()}")
+            if tracer:
+                print(tracer.format_summary())
             print("Ending conversation. Your data has been saved to the database.")
             break
 
         # Process the user query through the manager agent
-        await call_agent_async(runner, USER_ID, SESSION_ID, user_input)
+        await journal["turns"].run_turn(USER_ID, journal["session_id"], user_input, stream=stream,
+                                        latency=latency)
 
 
 if __name__ == "__main__":
-    asyncio.run(main_async())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Interactive journal assistant")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="print each answer only once it is complete")
+    parser.add_argument("--debug", action="store_true",
+                        help="print where the environment comes from and how long startup took")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.debug:
+        print_environment_debug()
+    asyncio.run(main_async(stream=not args.no_stream, debug=args.debug))
@@ -1,5 +1,6 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
+from journal_store.digest import journal_instruction
 from .sub_agents.journal_agent.agent import journal_agent
 from .sub_agents.summarizer_agent.agent import summarizer_agent
 
@@ -35,13 +36,14 @@ memory_agent = Agent(
     name="memory_agent",
     model="gemini-2.0-flash",
     description="A manager agent that orchestrates journal entry management and analysis tasks",
-    instruction="""
+    instruction=journal_instruction("""
     You are the Manager Agent for a digital journal system. Your role is to understand user requests 
     and delegate them to the appropriate specialized sub-agents, then present their results to the user.
 
     The user's information is stored in state:
     - User's name: {user_name}
-    - Entries: {entries}
+    - Journal digest (the full entries are read by the sub-agents with their tools):
+    {journal_digest}
 
     AVAILABLE SUB-AGENTS:
     1. **journal_agent** - Handles entry management (adding, viewing, searching entries)
@@ -83,7 +85,7 @@ memory_agent = Agent(
     - User: "Call me Sarah" → Use update_user_name tool
 
     You coordinate a powerful multi-agent system. Make it feel seamless and intelligent.
-    """,
+    """),
     tools=[update_user_name],
     sub_agents=[journal_agent, summarizer_agent],
 )
\ No newline at end of file
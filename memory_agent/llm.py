@@ -0,0 +1,108 @@
+from typing import AsyncGenerator, Optional
+
+from google import genai
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from journal_store.digest import estimate_tokens
+from tracing import request_tokens
+from .scheduler import ModelScheduler
+
+# Model used by tools that call Gemini directly instead of through an agent
+DIRECT_MODEL = "gemini-2.0-flash"
+
+_client = None
+# Shared scheduler of model calls (see schedule_model_calls)
+_scheduler: Optional[ModelScheduler] = None
+
+
+async def generate_text(prompt: str, model: str = DIRECT_MODEL) -> str:
+    """Run a single prompt through the model and return the response text.
+
+    Args:
+        prompt: The full prompt to send
+        model: Gemini model name
+
+    Returns:
+        The response text, stripped of surrounding whitespace
+    """
+    global _client
+    if _client is None:
+        # Picks up GOOGLE_API_KEY from the environment, like the agents do
+        _client = genai.Client()
+    if _scheduler is None:
+        response = await _client.aio.models.generate_content(model=model, contents=prompt)
+    else:
+        response = await _scheduler.call(
+            lambda: _client.aio.models.generate_content(model=model, contents=prompt),
+            estimate_tokens(prompt),
+        )
+    return (response.text or "").strip()
+
+
+class ScheduledLlm(BaseLlm):
+    """Wraps an agent's model so its calls go through a shared ``ModelScheduler``.
+
+    A call that fails with a transient error before any response has been
+    passed on is retried after a backoff; once part of an answer has been
+    yielded (a streamed chunk, a function call the runner acted on), the
+    error is raised and left to the turn.
+    """
+
+    inner: BaseLlm
+    scheduler: ModelScheduler
+
+    async def generate_content_async(self, llm_request: LlmRequest,
+                                     stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        scheduler = self.scheduler
+        estimate = request_tokens(llm_request)
+        attempt = 0
+        yielded = False
+        while True:
+            await scheduler.budget.acquire(estimate)
+            scheduler.calls += 1
+            responses = self.inner.generate_content_async(llm_request, stream)
+            usage = None
+            try:
+                while True:
+                    # Hold a slot only while waiting on the model. The caller runs tools and
+                    # hands off to sub-agents (more model calls) before asking for the next
+                    # response, so holding it across ``yield`` could deadlock.
+                    async with scheduler.slot():
+                        try:
+                            response = await responses.__anext__()
+                        except StopAsyncIteration:
+                            break
+                    # Not every ADK version reports usage on its responses
+                    usage = getattr(response, "usage_metadata", None) or usage
+                    yielded = True
+                    yield response
+            except Exception as e:
+                await responses.aclose()
+                if yielded:
+                    scheduler.failures += 1
+                    raise
+                await scheduler.backoff(e, attempt)
+                attempt += 1
+                continue
+            if usage is not None and usage.total_token_count:
+                scheduler.budget.charge(usage.total_token_count - estimate)
+            return
+
+
+def schedule_model_calls(agent, scheduler: ModelScheduler) -> ModelScheduler:
+    """Send the model calls of ``agent``, its sub-agents and ``generate_text`` through ``scheduler``."""
+    global _scheduler
+    _scheduler = scheduler
+    _wrap_models(agent, scheduler)
+    return scheduler
+
+
+def _wrap_models(agent, scheduler: ModelScheduler):
+    model = agent.canonical_model
+    if isinstance(model, ScheduledLlm):
+        model = model.inner
+    agent.model = ScheduledLlm(model=model.model, inner=model, scheduler=scheduler)
+    for sub_agent in agent.sub_agents:
+        _wrap_models(sub_agent, scheduler)
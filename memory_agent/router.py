@@ -0,0 +1,239 @@
+import logging
+import os
+import re
+import time
+from typing import NamedTuple, Optional
+
+# Fast-path routes below this confidence go through the manager LLM.
+# Set JOURNAL_ROUTER_MIN_CONFIDENCE above 1 to turn the fast path off.
+DEFAULT_MIN_CONFIDENCE = float(os.getenv("JOURNAL_ROUTER_MIN_CONFIDENCE", "0.8"))
+
+MANAGER = "memory_agent"
+JOURNAL = "journal_agent"
+SUMMARIZER = "summarizer_agent"
+UPDATE_USER_NAME = "update_user_name"
+
+_POLITE_RE = re.compile(r"^(?:(?:please|hey|ok|okay|so|can you|could you|would you)[\s,]+)+", re.I)
+_NAME_PREFIX = r"^(?:call me|my name is|i'?m called|update my name to|change my name to|set my name to)\b"
+_NAME_PREFIX_RE = re.compile(_NAME_PREFIX, re.I)
+_NAME_RE = re.compile(_NAME_PREFIX + r"\s+([A-Za-z][\w'-]*(?:\s+[A-Za-z][\w'-]*){0,2})\s*[.!]?$", re.I)
+_ADD_RE = re.compile(
+    r"^(?:add (?:an? |this )?(?:journal )?entry|journal|record|note|log)(?: that| about|:)?\s+(.+)$", re.I
+)
+_VIEW_RE = re.compile(
+    r"^(?:show|list|display|view|let me see|give me|pull up|read)\b.*"
+    r"\b(?:entries|entry|journal|notes|wrote|written)\b",
+    re.I,
+)
+_SEARCH_RE = re.compile(r"^(?:find|search|look for|look up)\b", re.I)
+_ANALYSIS_RE = re.compile(
+    r"\b(?:summari[sz]e|summary|analy[sz]e|analysis|trends?|patterns?|insights?|report|review|"
+    r"compare|themes?)\b",
+    re.I,
+)
+# Imperative openings of an analysis request; "I had my review today" is an entry, not one
+_REQUEST_START_RE = re.compile(
+    r"^(?:summari[sz]e|analy[sz]e|compare|review|report|give me|get me|show me|tell me|generate|"
+    r"create|write|make|produce|prepare|provide|spot|identify|look at|go over|break down)\b",
+    re.I,
+)
+_QUESTION_START_RE = re.compile(
+    r"^(?:what|when|where|why|who|which|how|is|are|am|do|does|did|can|could|would|will|should|"
+    r"shall|may|hi|hello|hey|thanks|thank you|help|tell me|show|list|find|search|delete|remove|"
+    r"edit|change|update)\b",
+    re.I,
+)
+# Requests about the journal itself (reading, undoing, fixing or analysing entries) that
+# look like entries: "I'd like to see my entries", "Undo the last entry I added"
+_NOT_ENTRY_RE = re.compile(
+    r"\b(?:see|show|list|view|display|read|undo|delete|remove|erase|fix|edit|correct|change|"
+    r"summari[sz]e|analy[sz]e|entries|entry)\b",
+    re.I,
+)
+_FIRST_PERSON_RE = re.compile(
+    r"\b(?:i|i'm|i've|i'd|i'll|im|ive|my|we|we're|our|today|tonight|yesterday|this morning)\b", re.I
+)
+# Words that mean "call me" / "my name is" is not followed by a name ("call me later",
+# "my name is not important"): negations, fillers, function words and common adjectives
+_NOT_NAMES = frozenset("""
+a an the back later tomorrow tonight when if at after before now soon again
+please maybe sometime anytime crazy
+not no never none nothing nobody just really actually basically literally still also too
+very so quite pretty kind sort going gonna getting being been be is was are were
+and or but because since though although that which who what where how why
+it its this these those here there my your his her our their me you him them us
+important unimportant irrelevant secret private long short hard difficult weird strange
+funny boring common unusual unique complicated easy simple same different fine
+""".split())
+
+
+class _SiblingEventFilter(logging.Filter):
+    """Hide the runner's warning about events from agents outside a sub-agent's tree.
+
+    A runner rooted at a sub-agent sees manager and sibling events in the
+    shared session history; they are expected and harmless.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.getMessage().startswith("Event from an unknown agent")
+
+
+class Route(NamedTuple):
+    target: str  # MANAGER, JOURNAL, SUMMARIZER or UPDATE_USER_NAME
+    intent: str
+    confidence: float
+    argument: Optional[str] = None
+
+
+def classify(text: str) -> Route:
+    """Deterministically guess where a user message should go.
+
+    Only unambiguous phrasings get a high confidence; anything else is left
+    to the manager agent (``Route(MANAGER, "unknown", 0.0)``).
+    """
+    message = _POLITE_RE.sub("", text.strip())
+    lowered = message.lower()
+    if not message:
+        return Route(MANAGER, "empty", 0.0)
+
+    name = _NAME_RE.match(message)
+    if name:
+        words = name.group(1).split()
+        if not any(word.lower() in _NOT_NAMES for word in words):
+            return Route(UPDATE_USER_NAME, "set_name", 0.95, " ".join(w[:1].upper() + w[1:] for w in words))
+    if _NAME_PREFIX_RE.match(message):
+        # Talk about the name that is not a plain name ("my name is not important") is left to the model
+        return Route(MANAGER, "unknown", 0.0)
+
+    question = "?" in message or bool(_QUESTION_START_RE.match(message))
+    added = _ADD_RE.match(message)
+    if (added and len(added.group(1).split()) >= 2 and not question
+            and not _NOT_ENTRY_RE.search(added.group(1))):
+        return Route(JOURNAL, "add_entry", 0.95)
+
+    if _ANALYSIS_RE.search(lowered) and (question or _REQUEST_START_RE.match(message)):
+        # "show me a summary of March" is analysis, not a listing
+        return Route(SUMMARIZER, "analysis", 0.85 if "?" not in message else 0.7)
+    if _VIEW_RE.match(message):
+        return Route(JOURNAL, "view_entries", 0.9)
+    if _SEARCH_RE.match(message):
+        return Route(JOURNAL, "search_entries", 0.9)
+
+    # A first-person statement that is not a question or a command is probably a journal
+    # entry, but not surely enough to skip the manager ("Today I want you to ...")
+    if (not question and len(message.split()) >= 3 and _FIRST_PERSON_RE.search(lowered)
+            and not _NOT_ENTRY_RE.search(message)):
+        return Route(JOURNAL, "add_entry", 0.6)
+    return Route(MANAGER, "unknown", 0.0)
+
+
+class IntentRouter:
+    """Sends unambiguous messages straight to a sub-agent or tool.
+
+    Confident routes skip the manager agent's routing call: journal and
+    summarizer requests run on their own runner over the same session, and
+    name changes are applied to session state without any model call.
+    Everything else goes to the manager as before.
+
+    The router keeps its hit rate and an estimate of the time saved: the
+    manager's hand-off delay (start of turn to the first sub-agent event) is
+    measured on turns it routes, and credited for each fast-path dispatch.
+    """
+
+    def __init__(self, session_service, app_name: str, min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+                 log=print):
+        self.session_service = session_service
+        self.app_name = app_name
+        self.min_confidence = min_confidence
+        self.log = log
+        self._runners = {}
+        self.turns = 0
+        self.hits = 0
+        self.seconds_saved = 0.0
+        self._handoff_seconds = None
+        self._turn_seconds = None
+
+    def route(self, text: str) -> Route:
+        """Classify a message; routes below the confidence threshold go to the manager."""
+        self.turns += 1
+        route = classify(text)
+        if route.target == MANAGER or route.confidence < self.min_confidence:
+            return Route(MANAGER, route.intent, route.confidence)
+        self.hits += 1
+        return route
+
+    def runner_for(self, target: str):
+        """Runner with ``target`` (a sub-agent) as its root, sharing the session service."""
+        if target not in self._runners:
+            from google.adk.runners import Runner
+            from .agent import memory_agent
+
+            if not self._runners:
+                logging.getLogger("google.adk.runners").addFilter(_SiblingEventFilter())
+
+            self._runners[target] = Runner(
+                agent=memory_agent.find_agent(target),
+                app_name=self.app_name,
+                session_service=self.session_service,
+            )
+        return self._runners[target]
+
+    def update_user_name(self, user_id: str, session_id: str, query: str, name: str) -> str:
+        """Apply a name change directly to session state and return the reply."""
+        from google.adk.events import Event, EventActions
+        from google.genai import types
+
+        session = self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        old_name = session.state.get("user_name", "")
+        reply = f"Updated your name to: {name}"
+        if old_name and old_name != name:
+            reply += f" (was {old_name})"
+        print(f"--- Tool: update_user_name called with '{name}' ---")
+        # Record the exchange so the conversation history stays complete
+        self.session_service.append_event(session, Event(
+            author="user",
+            content=types.Content(role="user", parts=[types.Part(text=query)]),
+        ))
+        self.session_service.append_event(session, Event(
+            author=MANAGER,
+            content=types.Content(role="model", parts=[types.Part(text=reply)]),
+            actions=EventActions(state_delta={"user_name": name}),
+        ))
+        return reply
+
+    def record_manager_turn(self, handoff_seconds: Optional[float], turn_seconds: float):
+        """Measure a manager-routed turn (``handoff_seconds`` is None if it never handed off)."""
+        if handoff_seconds is not None:
+            self._handoff_seconds = _average(self._handoff_seconds, handoff_seconds)
+        self._turn_seconds = _average(self._turn_seconds, turn_seconds)
+
+    def record_fast_turn(self, route: Route, started: float):
+        """Credit a fast-path turn with the manager time it avoided and log the router stats."""
+        elapsed = time.perf_counter() - started
+        if route.target == UPDATE_USER_NAME:
+            saved = max(0.0, self._turn_seconds - elapsed) if self._turn_seconds else None
+        else:
+            saved = self._handoff_seconds
+        if saved is not None:
+            self.seconds_saved += saved
+        estimate = f"~{saved:.2f}s saved" if saved is not None else "saving not measured yet"
+        self.log(f"--- Router: {route.intent} -> {route.target} ({route.confidence:.2f}), {estimate}; {self.stats_line()} ---")
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.turns, 3) if self.turns else 0.0,
+            "seconds_saved": round(self.seconds_saved, 2),
+            "avg_handoff_seconds": round(self._handoff_seconds, 3) if self._handoff_seconds else None,
+        }
+
+    def stats_line(self) -> str:
+        stats = self.stats()
+        return (f"hit rate {stats['hits']}/{stats['turns']} ({stats['hit_rate']:.0%}), "
+                f"{stats['seconds_saved']:.1f}s saved in total")
+
+
+def _average(current: Optional[float], value: float, weight: float = 0.2) -> float:
+    """Exponential moving average, seeded with the first value."""
+    return value if current is None else (1 - weight) * current + weight * value
@@ -0,0 +1,317 @@
+"""Scheduling of model calls and conversation turns.
+
+Under load a remote model answers some calls with rate-limit or server
+errors, and a failed call used to end the turn, losing whatever the user
+asked to record. Two layers sit between the conversation and the model:
+
+``ModelScheduler`` admits every model call (agents through
+``llm.ScheduledLlm``, direct prompts through ``llm.generate_text``): at most
+``max_concurrent`` at once, within a token-per-minute budget, and transient
+errors are retried with exponential backoff and full jitter as long as no
+part of the response has been passed on.
+
+``TurnScheduler`` runs whole turns: one FIFO queue per user, so a user with
+many requests holds at most one turn's worth of model slots; identical
+read-only requests in flight in the same session share a single run; and a
+turn that still fails with a transient error is resumed from the events its
+failed attempt left in the session, under the same turn key, so an
+``add_entry`` that attempt stored is returned instead of added twice (see
+``journal_store.context.turn_scope``).
+"""
+import asyncio
+import contextlib
+import itertools
+import os
+import random
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from google.genai import errors
+
+from journal_store import turn_scope
+from .router import DEFAULT_MIN_CONFIDENCE, classify
+
+# Concurrent model calls, tokens per minute (0 = no budget) and retries of a failed call
+MAX_MODEL_CALLS = int(os.getenv("JOURNAL_MAX_MODEL_CALLS", "8"))
+TOKENS_PER_MINUTE = int(os.getenv("JOURNAL_MODEL_TOKENS_PER_MINUTE", "0"))
+MODEL_RETRIES = int(os.getenv("JOURNAL_MODEL_RETRIES", "3"))
+# Whole-turn retries once a model call has failed for good or mid-answer
+TURN_RETRIES = 1
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+
+# Timeouts, rate limits and server-side failures; anything else is not retried
+TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# Router intents that never write, so identical requests can share one run
+READ_ONLY_INTENTS = frozenset({"view_entries", "search_entries", "analysis"})
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether ``error`` is worth retrying: a retryable API status or a network failure."""
+    if isinstance(error, errors.APIError):
+        return error.code in TRANSIENT_STATUSES
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError))
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Retry ``n`` (from 0) waits a uniformly random time up to
+    ``min(max_delay, base_delay * 2 ** n)``, so clients that failed together
+    do not all come back at the same moment.
+    """
+
+    def __init__(self, retries: int = MODEL_RETRIES, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, rng: Optional[random.Random] = None):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        return attempt < self.retries and is_transient(error)
+
+    def delay(self, attempt: int) -> float:
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class TokenBudget:
+    """Token bucket holding up to a minute of ``tokens_per_minute``, refilled continuously.
+
+    Calls take their estimated prompt tokens before they start, waiting in
+    arrival order while the bucket is short; usage reported by the model
+    beyond the estimate is charged afterwards. A budget of 0 never waits.
+    """
+
+    def __init__(self, tokens_per_minute: int = TOKENS_PER_MINUTE):
+        self.capacity = tokens_per_minute
+        self.level = float(tokens_per_minute)
+        self.waited_seconds = 0.0
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, tokens: int):
+        if not self.capacity:
+            return
+        # A prompt larger than the whole bucket only has to wait for a full one
+        tokens = min(tokens, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self.level < tokens:
+                wait = (tokens - self.level) * 60 / self.capacity
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self.level -= tokens
+
+    def charge(self, tokens: int):
+        """Take (or give back) tokens after a call; the level may go below zero."""
+        if self.capacity:
+            self._refill()
+            self.level -= tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+
+class ModelScheduler:
+    """Shared admission of model calls: concurrency slots, a token budget and retries.
+
+    Safe to construct outside the event loop (main.py builds it in a startup
+    thread): the asyncio primitives are created on first use, since before
+    Python 3.10 they bind to ``get_event_loop()`` when constructed.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_MODEL_CALLS, tokens_per_minute: int = TOKENS_PER_MINUTE,
+                 retry: Optional[RetryPolicy] = None):
+        self.max_concurrent = max_concurrent
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.budget = TokenBudget(tokens_per_minute)
+        self.retry = retry or RetryPolicy()
+        self.active = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def call(self, request: Callable[[], Awaitable], tokens: int):
+        """Await ``request()`` for a single-response call, retrying transient errors."""
+        for attempt in itertools.count():
+            await self.budget.acquire(tokens)
+            self.calls += 1
+            try:
+                async with self.slot():
+                    return await request()
+            except Exception as e:
+                await self.backoff(e, attempt)
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        return self._slots
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one of the ``max_concurrent`` model call slots."""
+        async with self.slots:
+            self.active += 1
+            try:
+                yield
+            finally:
+                self.active -= 1
+
+    async def backoff(self, error: Exception, attempt: int):
+        """Wait before retrying after ``error``, or re-raise it when it should not be retried."""
+        if not self.retry.should_retry(error, attempt):
+            self.failures += 1
+            raise error
+        self.retries += 1
+        await asyncio.sleep(self.retry.delay(attempt))
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "token_wait_seconds": round(self.budget.waited_seconds, 3),
+        }
+
+
+class _UserQueue:
+    """FIFO lock of one user plus the number of turns waiting on it."""
+
+    __slots__ = ("lock", "waiting")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+
+
+class TurnScheduler:
+    """Runs conversation turns through ``call_agent_async`` with queues, coalescing and retries."""
+
+    def __init__(self, runner, router=None, tracer=None, retries: int = TURN_RETRIES,
+                 retry: Optional[RetryPolicy] = None, log=print):
+        self.runner = runner
+        self.router = router
+        self.tracer = tracer
+        self.retries = retries
+        self.retry = retry or RetryPolicy()
+        self.log = log
+        self._queues: Dict[str, _UserQueue] = {}
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.turns = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def run_turn(self, user_id: str, session_id: str, query: str, turn_key: Optional[str] = None,
+                       display: bool = True, stream: bool = False, latency=None,
+                       raise_errors: bool = False) -> Optional[str]:
+        """Run one turn and return its final response text.
+
+        Args:
+            user_id: Owner of the session
+            session_id: Session the turn is added to
+            query: The user's message
+            turn_key: Idempotency key of the turn; pass the same key when a
+                client resends a request, so its writes are not repeated
+            display, stream, latency: As for ``call_agent_async``
+            raise_errors: Raise the error of a turn that failed for good
+                instead of printing it and returning None
+        """
+        self.turns += 1
+        key = self._coalescing_key(user_id, session_id, query)
+        try:
+            if key is None:
+                return await self._queued(user_id, session_id, query, turn_key, display, stream, latency)
+            running = self._in_flight.get(key)
+            if running is not None:
+                self.coalesced += 1
+            else:
+                running = asyncio.ensure_future(
+                    self._queued(user_id, session_id, query, turn_key, display, stream, latency))
+                self._in_flight[key] = running
+                running.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            # A caller that goes away must not cancel the run others are waiting on
+            return await asyncio.shield(running)
+        except Exception as e:
+            if raise_errors:
+                raise
+            self.log(f"Error during agent call: {e}")
+            return None
+
+    def _coalescing_key(self, user_id: str, session_id: str, query: str) -> Optional[tuple]:
+        route = classify(query)
+        if route.intent not in READ_ONLY_INTENTS or route.confidence < DEFAULT_MIN_CONFIDENCE:
+            return None
+        return user_id, session_id, " ".join(query.lower().split())
+
+    async def _queued(self, user_id, session_id, query, turn_key, display, stream, latency) -> Optional[str]:
+        queue = self._queues.setdefault(user_id, _UserQueue())
+        queue.waiting += 1
+        try:
+            # A user's turns run one at a time in arrival order
+            async with queue.lock:
+                return await self._attempts(user_id, session_id, query, turn_key or uuid.uuid4().hex,
+                                            display, stream, latency)
+        finally:
+            queue.waiting -= 1
+            if not queue.waiting:
+                self._queues.pop(user_id, None)
+
+    async def _attempts(self, user_id, session_id, query, turn_key, display, stream, latency) -> Optional[str]:
+        """Run the turn, retrying transient failures; the last error is raised."""
+        from utils import call_agent_async
+
+        events_before = len(await self._session_events(user_id, session_id))
+        resume = False
+        for attempt in itertools.count():
+            try:
+                with turn_scope(turn_key):
+                    return await call_agent_async(
+                        self.runner, user_id, session_id, query, router=self.router, tracer=self.tracer,
+                        display=display, stream=stream, latency=latency, raise_errors=True, resume=resume,
+                    )
+            except Exception as e:
+                if attempt >= self.retries or not is_transient(e):
+                    self.failed += 1
+                    raise
+                self.retried += 1
+                delay = self.retry.delay(attempt)
+                self.log(f"Agent call failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                # Once the message is in the session, the retry carries on from the failed attempt's
+                # events (the model sees the tools that already ran) instead of adding it again
+                events = await self._session_events(user_id, session_id)
+                resume = resume or any(event.author == "user" for event in events[events_before:])
+
+    async def _session_events(self, user_id: str, session_id: str) -> list:
+        service = self.runner.session_service
+        get_session_async = getattr(service, "get_session_async", None)
+        if get_session_async is not None:
+            session = await get_session_async(app_name=self.runner.app_name, user_id=user_id, session_id=session_id)
+        else:
+            session = service.get_session(app_name=self.runner.app_name, user_id=user_id, session_id=session_id)
+        return session.events if session else []
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+            "failed": self.failed,
+            "queued": sum(queue.waiting for queue in self._queues.values()),
+        }
+
+    def stats_line(self) -> str:
+        return (f"{self.turns} turns, {self.retried} retried, {self.failed} failed, "
+                f"{self.coalesced} coalesced")
@@ -1,12 +1,19 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
-import datetime
 from typing import Optional
 
+from journal_store import next_write_key, open_journal
+from journal_store.time_index import parse_date_range
+from journal_store.digest import journal_instruction
+
 
 def add_entry(entry: str, tool_context: ToolContext, mood: Optional[str], tags: Optional[str]) -> dict:
     """Add a new entry to the user's journal list with metadata.
 
+    A mood or tags left out are suggested from the entry text by the user's
+    local classifier (keyword lexicons plus a model learned from their own
+    tagged entries), so they only need to be passed when the user states them.
+
     Args:
         entry: The entry text to add
         tool_context: Context for accessing and updating session state
@@ -14,158 +21,175 @@ def add_entry(entry: str, tool_context: ToolContext, mood: Optional[str], tags:
         tags: Optional comma-separated tags for categorization
 
     Returns:
-        A confirmation message
+        A confirmation message, listing any suggested metadata
     """
     print(f"--- Tool: add_entry called for '{entry}' ---")
 
-    # Get current entries from state
-    entries = tool_context.state.get("entries", [])
-
-    # Create entry with metadata
-    entry_data = {
-        "id": len(entries) + 1,  # Simple incrementing ID
-        "text": entry,
-        "timestamp": datetime.datetime.now().isoformat(),
-        "mood": mood.lower() if mood else None,
-        "tags": [tag.strip().lower() for tag in tags.split(",")] if tags else []
-    }
+    store, user_id = open_journal(tool_context)
 
-    # Add the new entry
-    entries.append(entry_data)
+    # Append the entry to the entry store, suggesting a missing mood or tags. The
+    # write key makes a retried turn return the entry its first attempt added.
+    entry_data = store.add_entry(user_id, entry, mood=mood, tags=tags, suggest=True,
+                                 request_key=next_write_key(entry, mood, tags))
 
-    # Update state with the new list of entries
-    tool_context.state["entries"] = entries
+    # Only a version counter goes into session state, never the entries themselves
+    tool_context.state["entries_version"] = store.version(user_id)
 
     # Format response message
+    suggested = entry_data.pop("suggested")
     metadata_parts = []
-    if mood:
-        metadata_parts.append(f"mood: {mood}")
-    if tags:
-        metadata_parts.append(f"tags: {tags}")
+    if entry_data["mood"]:
+        metadata_parts.append(f"mood: {entry_data['mood']}")
+    if entry_data["tags"]:
+        metadata_parts.append(f"tags: {', '.join(entry_data['tags'])}")
+    if suggested:
+        metadata_parts.append(f"suggested: {', '.join(suggested)}")
 
-    metadata_str = f" ({', '.join(metadata_parts)})" if metadata_parts else ""
+    metadata_str = f" ({'; '.join(metadata_parts)})" if metadata_parts else ""
 
     return {
         "action": "add_entry",
         "entry": entry_data,
+        "suggested": suggested,
         "message": f"Added entry: {entry}{metadata_str}",
     }
 
 
+# Upper bound on entries returned by one view_entries call
+MAX_PAGE_SIZE = 100
+
+
 def view_entries(tool_context: ToolContext, filter_mood: Optional[str],
-                 filter_tags: Optional[str], recent_days: Optional[int]) -> dict:
-    """View entries with optional filtering.
+                 filter_tags: Optional[str], filter_query: Optional[str], recent_days: Optional[int],
+                 start_date: Optional[str], end_date: Optional[str],
+                 limit: Optional[int], cursor: Optional[str]) -> dict:
+    """View entries with optional filtering, newest first, one page at a time.
 
     Args:
         tool_context: Context for accessing session state
         filter_mood: Optional mood to filter by
-        filter_tags: Optional comma-separated tags to filter by
-        recent_days: Optional number of recent days to show
+        filter_tags: Optional comma-separated tags to filter by (any of them matches)
+        filter_query: Optional boolean filter over tags and moods, such as
+            "work AND NOT stressed" or "(travel OR friends) AND mood:happy"
+        recent_days: Optional number of recent days to show (ignored if start_date is given)
+        start_date: Optional first date to show (YYYY-MM-DD)
+        end_date: Optional last date to show (YYYY-MM-DD, inclusive)
+        limit: Optional page size (default 20, at most 100)
+        cursor: Optional next_cursor from a previous call, to get the next page
 
     Returns:
-        The filtered list of entries
+        One page of matching entries, the total number of matches and the
+        cursor of the next page (None when there are no more entries)
     """
     # Handle None values inside the function
-    if recent_days is None:
-        recent_days = 30
     if filter_tags is None:
         filter_tags = ""
     if filter_mood is None:
         filter_mood = ""
+    if filter_query is None:
+        filter_query = ""
+    if not limit or limit < 1:
+        limit = 20
+    limit = min(limit, MAX_PAGE_SIZE)
 
     print("--- Tool: view_entries called ---")
 
-    # Get entries from state
-    all_entries = tool_context.state.get("entries", [])
-
-    # Handle legacy entries (convert strings to objects if needed)
-    normalized_entries = []
-    for i, entry in enumerate(all_entries):
-        if isinstance(entry, str):
-            # Convert legacy string entries to new format
-            normalized_entries.append({
-                "id": i + 1,
-                "text": entry,
-                "timestamp": datetime.datetime.now().isoformat(),  # Use current time as fallback
-                "mood": None,
-                "tags": []
-            })
-        else:
-            normalized_entries.append(entry)
-
-    # Update state with normalized entries if we had to convert any
-    if len(normalized_entries) != len([e for e in all_entries if isinstance(e, dict)]):
-        tool_context.state["entries"] = normalized_entries
-
-    filtered_entries = normalized_entries.copy()
-
-    # Apply filters
-    if filter_mood:
-        filtered_entries = [e for e in filtered_entries if e.get("mood") == filter_mood.lower()]
-
-    if filter_tags:
-        filter_tag_list = [tag.strip().lower() for tag in filter_tags.split(",")]
-        filtered_entries = [e for e in filtered_entries
-                            if any(tag in e.get("tags", []) for tag in filter_tag_list)]
-
-    if recent_days:
-        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=recent_days)
-        filtered_entries = [e for e in filtered_entries
-                            if datetime.datetime.fromisoformat(e["timestamp"]) >= cutoff_date]
+    store, user_id = open_journal(tool_context)
+
+    # Filters are applied by the store's indexes
+    try:
+        since, until = parse_date_range(start_date, end_date, recent_days)
+        page, next_cursor = store.page_entries(
+            user_id, mood=filter_mood, tags=filter_tags, since=since, until=until,
+            limit=limit, cursor=cursor, query=filter_query
+        )
+    except ValueError as e:
+        return {"action": "view_entries", "error": str(e)}
 
     return {
         "action": "view_entries",
-        "entries": filtered_entries,
-        "count": len(filtered_entries),
-        "total_count": len(normalized_entries),
+        "entries": page,
+        "count": len(page),
+        "matching_count": store.count_entries(
+            user_id, mood=filter_mood, tags=filter_tags, since=since, until=until, query=filter_query
+        ),
+        "total_count": store.count(user_id),
+        "next_cursor": next_cursor,
         "filters_applied": {
             "mood": filter_mood,
             "tags": filter_tags,
-            "recent_days": recent_days
+            "query": filter_query,
+            "recent_days": recent_days,
+            "start_date": start_date,
+            "end_date": end_date
         }
     }
 
 
-def search_entries(query: str, tool_context: ToolContext) -> dict:
-    """Search entries by text content.
+def search_entries(query: str, tool_context: ToolContext, limit: Optional[int],
+                   start_date: Optional[str], end_date: Optional[str]) -> dict:
+    """Search entries by text content, best matches first.
 
     Args:
-        query: Search query to match against entry text
+        query: Search terms. Supports several words, prefixes like "run*",
+            quoted phrases like "morning coffee" and OR between terms
         tool_context: Context for accessing session state
+        limit: Optional maximum number of entries to return (default 20)
+        start_date: Optional first date to search (YYYY-MM-DD)
+        end_date: Optional last date to search (YYYY-MM-DD, inclusive)
 
     Returns:
-        Entries matching the search query
+        Entries matching the search query, ranked by relevance
     """
+    if limit is None:
+        limit = 20
+
     print(f"--- Tool: search_entries called for '{query}' ---")
 
-    # Get entries from state
-    all_entries = tool_context.state.get("entries", [])
-
-    # Normalize entries (handle legacy format)
-    normalized_entries = []
-    for i, entry in enumerate(all_entries):
-        if isinstance(entry, str):
-            normalized_entries.append({
-                "id": i + 1,
-                "text": entry,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "mood": None,
-                "tags": []
-            })
-        else:
-            normalized_entries.append(entry)
-
-    # Search in entry text (case-insensitive)
-    matching_entries = [
-        entry for entry in normalized_entries
-        if query.lower() in entry["text"].lower()
-    ]
+    store, user_id = open_journal(tool_context)
+
+    # Ranked lookup in the full-text index
+    try:
+        since, until = parse_date_range(start_date, end_date)
+    except ValueError as e:
+        return {"action": "search_entries", "error": str(e)}
+    matching_entries = store.search(user_id, query, limit=limit, since=since, until=until)
 
     return {
         "action": "search_entries",
         "query": query,
         "entries": matching_entries,
-        "count": len(matching_entries)
+        "count": len(matching_entries),
+        "limit": limit
+    }
+
+
+def semantic_search(query: str, tool_context: ToolContext, k: Optional[int]) -> dict:
+    """Find entries related in meaning to a query, even without shared keywords.
+
+    Args:
+        query: Free-text description of what to look for, e.g. "times I felt burned out"
+        tool_context: Context for accessing session state
+        k: Optional number of entries to return (default 10)
+
+    Returns:
+        The most similar entries with their similarity scores, best first
+    """
+    if k is None:
+        k = 10
+
+    print(f"--- Tool: semantic_search called for '{query}' ---")
+
+    store, user_id = open_journal(tool_context)
+
+    # Top-k cosine lookup in the local vector index; no model call involved
+    similar_entries = store.semantic_search(user_id, query, k=max(1, min(k, MAX_PAGE_SIZE)))
+
+    return {
+        "action": "semantic_search",
+        "query": query,
+        "entries": similar_entries,
+        "count": len(similar_entries),
     }
 
 
@@ -174,26 +198,31 @@ journal_agent = Agent(
     name="journal_agent",
     model="gemini-2.0-flash",
     description="A specialized agent for managing journal entries with rich metadata support",
-    instruction="""
+    instruction=journal_instruction("""
     You are the Journal Agent, responsible for all entry management tasks in the digital journal system.
     You handle adding, viewing, searching, and organizing journal entries.
 
     The user's information is stored in state:
     - User's name: {user_name}
-    - Entries: {entries} (with metadata: timestamp, mood, tags)
+    - Journal digest (counts, top moods and tags, latest entries):
+    {journal_digest}
+    The digest is only an overview. Use your tools to read full entries when you need them.
 
     AVAILABLE TOOLS:
     1. add_entry(entry, mood, tags) - Store new journal entries with optional metadata
-    2. view_entries(filter_mood, filter_tags, recent_days) - View/filter entries
-    3. search_entries(query) - Search entries by text content
+    2. view_entries(filter_mood, filter_tags, filter_query, recent_days, start_date, end_date, limit, cursor) -
+       View/filter entries, newest first, one page at a time
+    3. search_entries(query, limit, start_date, end_date) - Ranked full-text search over entry text
+    4. semantic_search(query, k) - Find the k entries closest in meaning to a description
 
     CORE RESPONSIBILITIES:
 
     **Adding Entries with Smart Metadata Detection:**
-    - Extract mood indicators from natural language: "I'm feeling great today" → mood="happy"
-    - Detect topic tags from content: "work meeting went well" → tags="work"
+    - Pass mood only when the user states or clearly expresses a feeling: "I'm feeling great today" → mood="happy"
+    - Pass tags only when the user names them or the topic is unmistakable: "work meeting went well" → tags="work"
+    - Otherwise pass None: add_entry suggests a mood and tags from the text with a local classifier
+      trained on the user's own entries, and the response lists what was suggested
     - Common moods: happy, sad, excited, stressed, anxious, grateful, frustrated, peaceful, energetic, tired
-    - Auto-suggest tags based on content: work, family, health, travel, food, friends, goals, etc.
     - Only remove explicit meta-commentary like "I want to add an entry about" or "Please record that"
     - Preserve all actual content and emotional expressions exactly as written
     - DO NOT add context or combine with previous entries
@@ -202,16 +231,31 @@ journal_agent = Agent(
     - "I'm so excited about my promotion!" → add_entry("Got a promotion!", "excited", "work,career")
     - "Had a stressful day dealing with the kids" → add_entry("Stressful day with the kids", "stressed", "family,parenting")
     - "Grateful for my morning coffee ritual" → add_entry("Morning coffee ritual", "grateful", "routine,self-care")
+    - "Finished the Classification by KNN course" → add_entry("Finished the Classification by KNN course", None, None)
 
     **Viewing and Filtering:**
-    - "Show me happy entries" → view_entries(None, "happy", None, None)
-    - "What did I write about work?" → view_entries(None, None, "work", None)
-    - "Show me this week's entries" → view_entries(None, None, None, 7)
-    - "Recent stressed entries" → view_entries(None, "stressed", None, 30)
+    - "Show me happy entries" → view_entries("happy", None, None, None, None, None, None, None)
+    - "What did I write about work?" → view_entries(None, "work", None, None, None, None, None, None)
+    - "Show me this week's entries" → view_entries(None, None, None, 7, None, None, None, None)
+    - "Recent stressed entries" → view_entries("stressed", None, None, 30, None, None, None, None)
+    - "Entries from March 2024" → view_entries(None, None, None, None, "2024-03-01", "2024-03-31", None, None)
+    - "Work entries where I wasn't stressed" → view_entries(None, None, "work AND NOT stressed", None, None, None, None, None)
+    - "Trips or time with friends that made me happy" →
+      view_entries(None, None, "(travel OR friends) AND mood:happy", None, None, None, None, None)
+    - filter_query combines tags and moods with AND, OR, NOT and parentheses; use "tag:" or
+      "mood:" before a name only when it could be either
+    - "Show me more" → call view_entries again with the same filters and cursor=next_cursor
+    - Tell the user how many entries matched (matching_count) when you only show one page
 
     **Searching:**
-    - "Find entries about coffee" → search_entries("coffee")
+    - "Find entries about coffee" → search_entries("coffee", None, None, None)
+    - "Anything about running?" → search_entries("run*", None, None, None) (prefix match)
+    - "Entries mentioning morning coffee" → search_entries("\"morning coffee\"", None, None, None) (phrase)
+    - "Coffee entries from 2024" → search_entries("coffee", None, "2024-01-01", "2024-12-31")
     - Use search for specific keywords when filters aren't enough
+    - "Times I felt overwhelmed" → semantic_search("overwhelmed stressed too much to do", None)
+    - Use semantic_search for themes and feelings that may be worded differently in each entry,
+      instead of reading the whole journal
 
     **Entry Display Format:**
     When showing entries, format like:
@@ -219,8 +263,7 @@ journal_agent = Agent(
     [Entry text]
 
     **Smart Content Processing:**
-    - Always look for emotional indicators in the text to suggest mood
-    - Identify key topics/themes for tagging
+    - Mention suggested mood and tags when confirming an entry, so the user knows they were guessed
     - Preserve authentic voice while removing meta-commentary
     - Handle temporal references appropriately
     
@@ -245,10 +288,11 @@ journal_agent = Agent(
     You are focused solely on entry management. For analysis, summaries, or insights,
     that would be handled by the Summarizer Agent. Stay focused on your core mission:
     making journal entry management intuitive and powerful.
-    """,
+    """),
     tools=[
         add_entry,
         view_entries,
         search_entries,
+        semantic_search,
     ],
 )
\ No newline at end of file
@@ -1,8 +1,12 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
-import datetime
 from typing import Optional
 
+from journal_store import open_journal
+from .period_summaries import PeriodSummarizer
+from .reports import ReportBuilder
+from .report_cache import cache_report, serve_cached_report
+
 
 def analyze_all_entries(tool_context: ToolContext) -> dict:
     """Retrieve all entries from the database for analysis.
@@ -15,32 +19,153 @@ def analyze_all_entries(tool_context: ToolContext) -> dict:
     """
     print("--- Tool: analyze_all_entries called ---")
 
-    # Get all entries from state
-    all_entries = tool_context.state.get("entries", [])
-
-    # Normalize entries (handle legacy format)
-    normalized_entries = []
-    for i, entry in enumerate(all_entries):
-        if isinstance(entry, str):
-            # Convert legacy string entries to new format
-            normalized_entries.append({
-                "id": i + 1,
-                "text": entry,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "mood": None,
-                "tags": []
-            })
-        else:
-            normalized_entries.append(entry)
+    store, user_id = open_journal(tool_context)
+
+    # Held as compact records; the readable dicts exist only in the response
+    records = store.load_records(user_id)
 
     return {
         "action": "analyze_all_entries",
-        "entries": normalized_entries,
-        "total_count": len(normalized_entries),
+        "entries": records.to_dicts(),
+        "total_count": len(records),
         "user_name": tool_context.state.get("user_name", "User")
     }
 
 
+def get_mood_trends(tool_context: ToolContext, granularity: Optional[str],
+                    start_date: Optional[str], end_date: Optional[str]) -> dict:
+    """Get entry counts and mood counts per day, week or month.
+
+    Args:
+        tool_context: Context for accessing session state
+        granularity: "day", "week" or "month" (default "month")
+        start_date: Optional first date to include (YYYY-MM-DD)
+        end_date: Optional last date to include (YYYY-MM-DD)
+
+    Returns:
+        One bucket per period with its entry count and mood counts
+    """
+    if granularity is None:
+        granularity = "month"
+
+    print(f"--- Tool: get_mood_trends called ({granularity}, {start_date} to {end_date}) ---")
+
+    store, user_id = open_journal(tool_context)
+
+    try:
+        periods = store.entry_trends(user_id, granularity, start_date, end_date)
+    except ValueError as e:
+        return {"action": "get_mood_trends", "error": str(e)}
+
+    return {
+        "action": "get_mood_trends",
+        "granularity": granularity,
+        "periods": periods,
+        "mood_totals": dict(store.mood_counts(user_id, start=start_date, end=end_date)),
+        "total_entries": sum(period["entries"] for period in periods),
+    }
+
+
+def get_tag_stats(tool_context: ToolContext, start_date: Optional[str],
+                  end_date: Optional[str], top_n: Optional[int]) -> dict:
+    """Get tag frequencies and the tags that most often appear together.
+
+    Args:
+        tool_context: Context for accessing session state
+        start_date: Optional first date to include (YYYY-MM-DD)
+        end_date: Optional last date to include (YYYY-MM-DD)
+        top_n: Optional number of tags and tag pairs to return (default 10)
+
+    Returns:
+        Most frequent tags and tag co-occurrence counts
+    """
+    if top_n is None:
+        top_n = 10
+
+    print(f"--- Tool: get_tag_stats called ({start_date} to {end_date}) ---")
+
+    store, user_id = open_journal(tool_context)
+
+    return {
+        "action": "get_tag_stats",
+        "tags": [
+            {"tag": tag, "count": count}
+            for tag, count in store.tag_counts(user_id, top_n, start_date, end_date)
+        ],
+        "co_occurrences": [
+            {"tags": [tag_a, tag_b], "count": count}
+            for tag_a, tag_b, count in store.tag_pair_counts(user_id, top_n, start_date, end_date)
+        ],
+    }
+
+
+async def summarize_period(period: str, tool_context: ToolContext) -> dict:
+    """Summarize a year, month or week of the journal from cached period summaries.
+
+    Args:
+        period: "YYYY" for a year, "YYYY-MM" for a month, "YYYY-MM-W1" to
+            "YYYY-MM-W5" for days 1-7, 8-14, 15-21, 22-28 and 29-end of a month,
+            or "this year", "last year", "this month", "last month"
+        tool_context: Context for accessing session state
+
+    Returns:
+        The period summary plus cache hit/miss counts for this request
+    """
+    print(f"--- Tool: summarize_period called for '{period}' ---")
+
+    store, user_id = open_journal(tool_context)
+
+    summarizer = PeriodSummarizer(store)
+    try:
+        result = await summarizer.summarize(user_id, period, tool_context.state.get("user_name", "the user"))
+    except ValueError as e:
+        return {"action": "summarize_period", "error": str(e)}
+
+    cache = result["cache"]
+    print(f"--- summarize_period: {cache['hits']} cache hits, {cache['misses']} misses, "
+          f"{cache['model_calls']} model calls ---")
+
+    return {
+        "action": "summarize_period",
+        **result,
+        "cache_totals": store.summary_cache_stats(user_id),
+    }
+
+
+async def generate_report(period: str, tool_context: ToolContext, by: Optional[str],
+                          focus: Optional[str]) -> dict:
+    """Write a full report of a period, such as a year-end review, from summaries built in parallel.
+
+    Args:
+        period: "YYYY" for a year, "YYYY-MM" for a month, or "this year", "last year",
+            "this month", "last month"
+        tool_context: Context for accessing session state
+        by: "time" for a section per month (per week for a month), or "theme" for a
+            section per main tag (default "time")
+        focus: Optional kind of report, e.g. "professional year-end" or "health and fitness"
+
+    Returns:
+        The finished report, its sections with entry counts, and the model calls it took
+    """
+    if by is None:
+        by = "time"
+
+    print(f"--- Tool: generate_report called for '{period}' by {by} ---")
+
+    store, user_id = open_journal(tool_context)
+
+    builder = ReportBuilder(store)
+    try:
+        result = await builder.build(user_id, period, by, tool_context.state.get("user_name", "the user"), focus)
+    except ValueError as e:
+        return {"action": "generate_report", "error": str(e)}
+
+    print(f"--- generate_report: {len(result['sections'])} sections, {result['model_calls']} model calls "
+          f"in {result['elapsed_seconds']}s ---")
+
+    return {"action": "generate_report", **result}
+
+
 # Create the summarizer/analysis sub-agent
 summarizer_agent = Agent(
     name="summarizer_agent",
@@ -92,13 +217,32 @@ summarizer_agent = Agent(
        - Creative projects and hobbies
        - Financial goals and progress
 
+    **AVAILABLE TOOLS:**
+    1. get_mood_trends(granularity, start_date, end_date) - Precomputed entry and mood counts
+       per day, week or month
+    2. get_tag_stats(start_date, end_date, top_n) - Precomputed tag frequencies and tag pairs
+    3. summarize_period(period) - Cached summary of a year ("2024"), month ("2024-03"),
+       week of a month ("2024-03-W2"), or "this year" / "last year" / "this month" / "last month"
+    4. generate_report(period, by, focus) - A finished long report (year-end review, thematic
+       report) of a year or month, built from per-month or per-theme summaries made in parallel
+    5. analyze_all_entries() - Every entry with its full text (large; use only when needed)
+
     **Analysis Process:**
-    1. First, call analyze_all_entries() to get the complete dataset
-    2. Analyze the entries based on the user's specific request
-    3. Identify relevant patterns, trends, and insights
-    4. Create a comprehensive, well-structured response
-    5. Include quantitative insights where possible (dates, frequency, trends)
-    6. Provide actionable recommendations when appropriate
+    1. For counts, frequencies and trends ("how often", "mood over time", "top themes"),
+       use get_mood_trends and get_tag_stats - they are exact and cheap
+    2. For "Summarize my year/month/week", call summarize_period
+       (use the month summaries of a year for more detail)
+    3. For year-end reviews and other long reports, call generate_report: by="time" for a
+       chronological review, by="theme" for a report organized by topic, with focus set to
+       the kind of report asked for (e.g. "professional year-end"). Present its report,
+       adjusting tone and format to the request
+    4. Call analyze_all_entries() only when you need the entry text itself and no
+       other tool covers the request
+    5. Analyze the entries based on the user's specific request
+    6. Identify relevant patterns, trends, and insights
+    7. Create a comprehensive, well-structured response
+    8. Include quantitative insights where possible (dates, frequency, trends)
+    9. Provide actionable recommendations when appropriate
 
     **Output Formatting:**
     - Use clear headers and sections
@@ -109,7 +253,7 @@ summarizer_agent = Agent(
     - Include a compelling executive summary for reports
 
     **Key Behaviors:**
-    - Always retrieve the full dataset first before analyzing
+    - Base every number you report on the aggregate tools rather than counting by hand
     - Look for patterns the user might not have noticed
     - Be encouraging and highlight positive growth
     - Provide constructive insights about challenges
@@ -123,6 +267,13 @@ summarizer_agent = Agent(
     BACK to the memory_agent. 
     """,
     tools=[
+        get_mood_trends,
+        get_tag_stats,
+        summarize_period,
+        generate_report,
         analyze_all_entries,
     ],
+    # Repeated requests are answered from the response cache until entries change
+    before_agent_callback=serve_cached_report,
+    after_agent_callback=cache_report,
 )
\ No newline at end of file
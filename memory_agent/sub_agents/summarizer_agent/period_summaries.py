@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import os
+from typing import Awaitable, Callable, Optional
+
+from journal_store import EntryStore
+from journal_store.summaries import Period, parse_period, resolve_period
+
+# Keep each model call small: long weeks are truncated rather than sent whole
+MAX_ENTRY_CHARS = 400
+MAX_WEEK_PROMPT_CHARS = 12000
+
+# Model calls one summarizer runs at once; child periods are summarized concurrently
+DEFAULT_CONCURRENCY = int(os.getenv("JOURNAL_SUMMARY_CONCURRENCY", "8"))
+
+WEEK_PROMPT = """Summarize these journal entries from {label} for {user_name}.
+Write one short paragraph (at most 120 words) covering the main events, moods and themes.
+Mention concrete details and dates. Do not invent anything that is not in the entries.
+
+Entries:
+{entries}
+"""
+
+ROLLUP_PROMPT = """Combine these {child_kind} summaries of {user_name}'s journal into a single
+summary of {label} (at most {words} words). Highlight the main themes, mood trends,
+achievements and challenges across the whole period. Use only the information given.
+
+{children}
+"""
+
+
+class PeriodSummarizer:
+    """Builds week, month and year summaries on top of a persistent cache.
+
+    Weeks are summarized from their entries; months from their week
+    summaries and years from their month summaries. Every summary is cached
+    per user and period, and adding an entry only invalidates the week, month
+    and year it falls in, so most of a year-end review is served from cache.
+
+    Uncached child periods are summarized concurrently, with at most
+    ``concurrency`` model calls in flight, so a cold year takes about as
+    long as its slowest month rather than the sum of its weeks.
+    """
+
+    def __init__(self, store: EntryStore, generate: Optional[Callable[[str], Awaitable[str]]] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        if generate is None:
+            from ...llm import generate_text as generate
+        self.store = store
+        self.generate = generate
+        self.hits = 0
+        self.misses = 0
+        self.model_calls = 0
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def call_model(self, prompt: str) -> str:
+        """Run one prompt through ``generate``, waiting for a free slot first."""
+        # Only the model call holds a slot: a parent waiting on its children never does
+        async with self._slots:
+            self.model_calls += 1
+            return await self.generate(prompt)
+
+    async def summarize(self, user_id: str, period: str, user_name: str = "the user") -> dict:
+        """Return the summary of ``period`` ("2024", "2024-03", "2024-03-W2", "last month", ...).
+
+        Raises:
+            ValueError: If ``period`` is not a valid period string
+        """
+        result = await self.summarize_period(user_id, parse_period(resolve_period(period)), user_name)
+        await self.in_thread(self.store.record_summary_stats, user_id, self.hits, self.misses, self.model_calls)
+        result["cache"] = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "model_calls": self.model_calls,
+        }
+        return result
+
+    async def summarize_period(self, user_id: str, period: Period, user_name: str) -> dict:
+        """Summary of one parsed period, from the cache or built from its children.
+
+        Unlike ``summarize``, cache statistics are not recorded.
+        """
+        entry_count = await self.in_thread(self.store.entry_total, user_id, period.start.isoformat(),
+                                           period.end.isoformat())
+        if not entry_count:
+            return {"period": period.key, "entry_count": 0, "summary": "No entries in this period."}
+
+        cached = await self.in_thread(self.store.get_period_summary, user_id, period.key)
+        # The count check also catches entries added while a summary was being built
+        if cached and cached["entry_count"] == entry_count:
+            self.hits += 1
+            return {"period": period.key, "entry_count": entry_count, "summary": cached["summary"]}
+        self.misses += 1
+
+        if period.kind == "week":
+            prompt = await self.in_thread(self._week_prompt, user_id, period, user_name)
+        else:
+            child_results = await asyncio.gather(
+                *(self.summarize_period(user_id, child, user_name) for child in period.children())
+            )
+            children = [result for result in child_results if result["entry_count"]]
+            prompt = self._rollup_prompt(period, children, user_name)
+
+        summary = await self.call_model(prompt)
+        await self.in_thread(self.store.save_period_summary, user_id, period, summary, entry_count)
+        return {"period": period.key, "entry_count": entry_count, "summary": summary}
+
+    @staticmethod
+    async def in_thread(func, *args):
+        """Run blocking store work in the default executor, so other turns keep running."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _week_prompt(self, user_id: str, period: Period, user_name: str) -> str:
+        until = (period.end + datetime.timedelta(days=1)).isoformat()
+        lines = []
+        size = 0
+        for entry in self.store.iter_entries(user_id, since=period.start.isoformat(), until=until):
+            line = entry_line(entry)
+            size += len(line)
+            if size > MAX_WEEK_PROMPT_CHARS:
+                lines.append("- (remaining entries omitted)")
+                break
+            lines.append(line)
+        return WEEK_PROMPT.format(label=period_label(period), user_name=user_name, entries="\n".join(lines))
+
+    def _rollup_prompt(self, period: Period, children: list, user_name: str) -> str:
+        child_kind = "weekly" if period.kind == "month" else "monthly"
+        sections = [
+            f"### {child['period']} ({child['entry_count']} entries)\n{child['summary']}"
+            for child in children
+        ]
+        return ROLLUP_PROMPT.format(
+            child_kind=child_kind,
+            user_name=user_name,
+            label=period_label(period),
+            words=200 if period.kind == "month" else 400,
+            children="\n\n".join(sections),
+        )
+
+
+def entry_line(entry: dict) -> str:
+    """One entry as a prompt line: date, mood and tags, then the (truncated) text."""
+    meta = [entry["timestamp"][:10]]
+    if entry["mood"]:
+        meta.append(entry["mood"])
+    if entry["tags"]:
+        meta.append(", ".join(entry["tags"]))
+    return f"- [{' | '.join(meta)}] {entry['text'][:MAX_ENTRY_CHARS]}"
+
+
+def period_label(period: Period) -> str:
+    if period.kind == "year":
+        return f"the year {period.key}"
+    if period.kind == "month":
+        return period.start.strftime("%B %Y")
+    return f"{period.start.strftime('%B %d')} to {period.end.strftime('%B %d, %Y')}"
@@ -0,0 +1,53 @@
+from typing import Optional
+
+from google.genai import types
+
+from journal_store import get_entry_store, journal_user_id
+from ...router import SUMMARIZER, classify
+
+
+def _request_text(callback_context) -> Optional[str]:
+    """The user's request, if it is an analysis request worth caching."""
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return None
+    text = " ".join(part.text for part in content.parts if part.text).strip()
+    # Small talk that reaches the summarizer is not cached
+    if not text or classify(text).target != SUMMARIZER:
+        return None
+    return text
+
+
+def serve_cached_report(callback_context) -> Optional[types.Content]:
+    """before_agent_callback: answer a repeated request from the response cache.
+
+    Returning content ends the summarizer's turn without any model or tool
+    call. Answers are only reused while the user's entries are unchanged.
+    """
+    request = _request_text(callback_context)
+    if not request:
+        return None
+    cached = get_entry_store().get_cached_response(journal_user_id(callback_context), request)
+    if cached is None:
+        return None
+    print(f"--- Response cache hit for '{request}' ---")
+    return types.Content(role="model", parts=[types.Part(text=cached)])
+
+
+def cache_report(callback_context) -> Optional[types.Content]:
+    """after_agent_callback: store the summarizer's final answer for this request."""
+    request = _request_text(callback_context)
+    if not request:
+        return None
+    context = callback_context._invocation_context
+    answer = None
+    for event in reversed(context.session.events):
+        if event.invocation_id != context.invocation_id:
+            break
+        if event.author == callback_context.agent_name and event.is_final_response():
+            if event.content and event.content.parts and event.content.parts[0].text:
+                answer = event.content.parts[0].text
+            break
+    if answer:
+        get_entry_store().cache_response(journal_user_id(callback_context), request, answer)
+    return None
@@ -0,0 +1,197 @@
+import asyncio
+import datetime
+import os
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from journal_store import EntryStore
+from journal_store.summaries import Period, parse_period, resolve_period
+from .period_summaries import (
+    DEFAULT_CONCURRENCY, MAX_WEEK_PROMPT_CHARS, PeriodSummarizer, entry_line, period_label,
+)
+
+# Tags that get their own section in a theme report; other entries share one
+DEFAULT_THEMES = int(os.getenv("JOURNAL_REPORT_THEMES", "6"))
+# Entry text per map call, and partial summaries per reduce call
+MAX_CHUNK_CHARS = MAX_WEEK_PROMPT_CHARS
+MAX_REDUCE_CHARS = 16000
+REDUCE_FANOUT = 8
+
+REPORT_KINDS = ("time", "theme")
+
+CHUNK_PROMPT = """Summarize these journal entries of {user_name} about {theme} from {label}.
+Write one short paragraph (at most 150 words) covering the main events, moods and changes over time.
+Mention concrete details and dates. Do not invent anything that is not in the entries.
+
+Entries:
+{entries}
+"""
+
+COMBINE_PROMPT = """Combine these partial summaries of {user_name}'s journal about {theme} from {label}
+into one summary (at most 250 words). Keep concrete details and dates. Use only the information given.
+
+{partials}
+"""
+
+REPORT_PROMPT = """Write a {focus}report of {user_name}'s journal for {label} from these
+{section_kind} summaries. Start with a short executive summary, then one section per {section},
+then highlights, challenges and what to focus on next. Keep dates and concrete details.
+Use only the information given.
+
+{sections}
+"""
+
+
+class ReportBuilder:
+    """Builds long reports (year-end reviews, theme reports) with map-reduce.
+
+    The period is split into chunks, either by time (the months of a year or
+    the weeks of a month, from the cached ``PeriodSummarizer`` hierarchy) or
+    by theme (the period's most frequent tags plus everything else, split
+    further to fit a prompt). Chunks are summarized concurrently, sharing
+    the summarizer's pool of ``concurrency`` model calls, and the partial
+    summaries are combined in rounds of ``REDUCE_FANOUT`` until they fit the
+    final report prompt. No prompt grows with the size of the journal, and
+    wall time grows with the number of chunks divided by the concurrency.
+    """
+
+    def __init__(self, store: EntryStore, generate: Optional[Callable[[str], Awaitable[str]]] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY, themes: int = DEFAULT_THEMES):
+        self.store = store
+        self.summarizer = PeriodSummarizer(store, generate, concurrency)
+        self.themes = themes
+
+    async def build(self, user_id: str, period: str, by: str = "time", user_name: str = "the user",
+                    focus: Optional[str] = None) -> dict:
+        """Return the report of ``period`` ("2024", "2024-03", "last year", ...).
+
+        Args:
+            user_id: Owner of the journal
+            period: Period string accepted by ``PeriodSummarizer.summarize``
+            by: "time" for a section per month (or week), "theme" for a section per top tag
+            user_name: Name used in the prompts
+            focus: Optional kind of report, e.g. "professional year-end"
+
+        Raises:
+            ValueError: If ``period`` or ``by`` is not valid
+        """
+        if by not in REPORT_KINDS:
+            raise ValueError(f"Unknown report kind '{by}'; use one of {', '.join(REPORT_KINDS)}")
+        parsed = parse_period(resolve_period(period))
+        started = time.perf_counter()
+        if by == "time":
+            sections = await self._time_sections(user_id, parsed, user_name)
+        else:
+            sections = await self._theme_sections(user_id, parsed, user_name)
+
+        report = "No entries in this period."
+        if sections:
+            report = await self._report(parsed, sections, by, user_name, focus)
+        summarizer = self.summarizer
+        await summarizer.in_thread(self.store.record_summary_stats, user_id, summarizer.hits, summarizer.misses,
+                                   summarizer.model_calls)
+        entry_count = await summarizer.in_thread(self.store.entry_total, user_id, parsed.start.isoformat(),
+                                                 parsed.end.isoformat())
+        return {
+            "period": parsed.key,
+            "by": by,
+            "report": report,
+            "sections": [{"section": section["section"], "entry_count": section["entry_count"]}
+                         for section in sections],
+            "entry_count": entry_count,
+            "model_calls": summarizer.model_calls,
+            "cache": {"hits": summarizer.hits, "misses": summarizer.misses},
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    # ----- Map -----
+
+    async def _time_sections(self, user_id: str, period: Period, user_name: str) -> List[dict]:
+        chunks = period.children() or [period]
+        results = await asyncio.gather(
+            *(self.summarizer.summarize_period(user_id, chunk, user_name) for chunk in chunks)
+        )
+        return [{"section": period_label(chunk), "entry_count": result["entry_count"], "summary": result["summary"]}
+                for chunk, result in zip(chunks, results) if result["entry_count"]]
+
+    async def _theme_sections(self, user_id: str, period: Period, user_name: str) -> List[dict]:
+        # Reading entry text is blocking SQLite work; keep it off the event loop
+        themes = await self.summarizer.in_thread(self._theme_chunks, user_id, period)
+        label = period_label(period)
+        summaries = await asyncio.gather(*(
+            self._summarize_theme(theme, chunks, label, user_name) for theme, _, chunks in themes
+        ))
+        return [{"section": theme, "entry_count": count, "summary": summary}
+                for (theme, count, _), summary in zip(themes, summaries)]
+
+    def _theme_chunks(self, user_id: str, period: Period) -> List[tuple]:
+        """(theme, entry count, chunks of entry lines) for the top tags and the remaining entries."""
+        since = period.start.isoformat()
+        until = (period.end + datetime.timedelta(days=1)).isoformat()
+        tags = [tag for tag, _ in self.store.tag_counts(user_id, self.themes, period.start.isoformat(),
+                                                        period.end.isoformat())]
+        filters = [(tag, {"tags": [tag]}) for tag in tags]
+        # Everything without a top tag, so no entry is left out of the report
+        rest = "NOT (" + " OR ".join('tag:"%s"' % tag.replace('"', "") for tag in tags) + ")" if tags else None
+        filters.append(("other topics" if tags else "all entries", {"query": rest}))
+        themes = []
+        for theme, options in filters:
+            count = 0
+            chunks: List[List[str]] = [[]]
+            size = 0
+            for entry in self.store.iter_entries(user_id, since=since, until=until, **options):
+                line = entry_line(entry)
+                if size + len(line) > MAX_CHUNK_CHARS and chunks[-1]:
+                    chunks.append([])
+                    size = 0
+                chunks[-1].append(line)
+                size += len(line)
+                count += 1
+            if count:
+                themes.append((theme, count, chunks))
+        return themes
+
+    async def _summarize_theme(self, theme: str, chunks: List[List[str]], label: str, user_name: str) -> str:
+        partials = await asyncio.gather(*(
+            self.summarizer.call_model(CHUNK_PROMPT.format(
+                user_name=user_name, theme=theme, label=label, entries="\n".join(lines)))
+            for lines in chunks
+        ))
+        return await self._combine(list(partials), theme, label, user_name, limit=0)
+
+    # ----- Reduce -----
+
+    async def _combine(self, partials: List[str], theme: str, label: str, user_name: str,
+                       limit: int = MAX_REDUCE_CHARS) -> str:
+        """Merge partial summaries in rounds until one remains or they fit in ``limit`` characters."""
+        while len(partials) > 1 and sum(len(partial) for partial in partials) > limit:
+            groups = [partials[start:start + REDUCE_FANOUT] for start in range(0, len(partials), REDUCE_FANOUT)]
+            partials = list(await asyncio.gather(*(
+                self.summarizer.call_model(COMBINE_PROMPT.format(
+                    user_name=user_name, theme=theme, label=label, partials="\n\n".join(group)))
+                if len(group) > 1 else _done(group[0])
+                for group in groups
+            )))
+        return "\n\n".join(partials)
+
+    async def _report(self, period: Period, sections: List[dict], by: str, user_name: str,
+                      focus: Optional[str]) -> str:
+        label = period_label(period)
+        texts = [f"### {section['section']} ({section['entry_count']} entries)\n{section['summary']}"
+                 for section in sections]
+        if sum(len(text) for text in texts) > MAX_REDUCE_CHARS:
+            # Too many sections for one prompt: merge neighbours first
+            texts = [await self._combine(texts, "everything", label, user_name)]
+        return await self.summarizer.call_model(REPORT_PROMPT.format(
+            focus=f"{focus} " if focus else "",
+            user_name=user_name,
+            label=label,
+            section_kind="period" if by == "time" else "theme",
+            section="period" if by == "time" else "theme",
+            sections="\n\n".join(texts),
+        ))
+
+
+async def _done(value: str) -> str:
+    return value
+
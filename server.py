@@ -0,0 +1,319 @@
+"""Multi-user HTTP server for the journal agents.
+
+One ``Runner``, session service and entry store are shared by every user and
+session. Turns go through a ``TurnScheduler`` (memory_agent/scheduler.py):
+turns of the same user run one at a time in arrival order, turns of
+different users run concurrently, identical read-only requests in flight
+share one run, and failed model calls are retried with backoff. At most
+``--max-model-calls`` model requests are in flight at once. When more than
+``--max-pending`` turns are admitted (or ``--max-session-queue`` for one
+session), new turns are rejected with 429 and ``Retry-After`` instead of
+queueing without bound. A client that resends a turn with the same
+``request_id`` does not add its entries twice.
+
+    python server.py --port 8080
+    curl -s localhost:8080/turn -d '{"user_id": "rz", "message": "Show me my entries"}'
+
+Endpoints:
+    POST /turn      {"user_id", "message", "session_id"?, "request_id"?}
+                    -> {"response", "session_id", "elapsed_ms"}; 404 for an unknown session,
+                    503 when the model still fails after retries, 500 for other errors
+    POST /sessions  {"user_id"} -> {"session_id"} (a new session)
+    GET  /health    server counters
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from journal_store import configure_entry_store, get_entry_store, migrate_session_entries
+from journal_store.compaction import archive_dir, compact_user_sessions
+
+APP_NAME = "Journal Manager System"
+DEFAULT_DB_PATH = "./my_daily_journal_data.db"
+MAX_BODY_BYTES = 64 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class JournalServer:
+    def __init__(self, runner, session_service, router=None, tracer=None,
+                 max_pending: int = 256, max_session_queue: int = 8,
+                 initial_state: Optional[dict] = None, model_scheduler=None):
+        from memory_agent.scheduler import TurnScheduler
+
+        self.runner = runner
+        self.session_service = session_service
+        self.router = router
+        self.tracer = tracer
+        self.turns = TurnScheduler(runner, router=router, tracer=tracer)
+        self.model_scheduler = model_scheduler
+        self.max_pending = max_pending
+        self.max_session_queue = max_session_queue
+        self.initial_state = initial_state or {"user_name": "", "entries_version": 0}
+        # Turns queued or running per session, for --max-session-queue
+        self._sessions: Dict[str, int] = {}
+        self._user_locks: Dict[str, asyncio.Lock] = {}
+        self._migrated = set()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    # ----- Turns -----
+
+    async def run_turn(self, user_id: str, message: str, session_id: Optional[str] = None,
+                       request_id: Optional[str] = None) -> dict:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPError(429, "server busy", {"Retry-After": "1"})
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            if session_id is None:
+                session_id = await self._default_session(user_id)
+            elif await self.session_service.get_session_async(
+                    app_name=APP_NAME, user_id=user_id, session_id=session_id) is None:
+                raise HTTPError(404, f"unknown session {session_id}")
+            waiting = self._sessions.get(session_id, 0)
+            if waiting >= self.max_session_queue:
+                self.rejected += 1
+                raise HTTPError(429, "too many turns queued for this session", {"Retry-After": "1"})
+            self._sessions[session_id] = waiting + 1
+            try:
+                # Request ids are per user, so a resent turn finds the entries it wrote
+                response = await self.turns.run_turn(
+                    user_id, session_id, message, display=False, raise_errors=True,
+                    turn_key=f"request:{request_id}" if request_id else None,
+                )
+            except Exception as e:
+                from memory_agent.scheduler import is_transient
+
+                if not is_transient(e):
+                    raise
+                # Still failing after the retries: the client can try again later
+                self.failed += 1
+                raise HTTPError(503, "the model is unavailable, try again later", {"Retry-After": "5"})
+            finally:
+                self._sessions[session_id] -= 1
+                if not self._sessions[session_id]:
+                    self._sessions.pop(session_id, None)
+            self.completed += 1
+            return {
+                "response": response,
+                "session_id": session_id,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        finally:
+            self.pending -= 1
+
+    async def create_session(self, user_id: str) -> str:
+        session = await self.session_service.create_session_async(
+            app_name=APP_NAME, user_id=user_id, state=dict(self.initial_state),
+        )
+        return session.id
+
+    async def _default_session(self, user_id: str) -> str:
+        """The user's most recent session, created on first use (as in main.py)."""
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            if user_id not in self._migrated:
+                await asyncio.get_running_loop().run_in_executor(None, self._prepare_user, user_id)
+                self._migrated.add(user_id)
+            existing = await self.session_service.list_sessions_async(app_name=APP_NAME, user_id=user_id)
+            if existing and existing.sessions:
+                return existing.sessions[0].id
+            return await self.create_session(user_id)
+
+    def _prepare_user(self, user_id: str):
+        """Migrate legacy entries and compact the user's sessions, once per server run."""
+        store = get_entry_store()
+        migrate_session_entries(self.session_service, store, APP_NAME, user_id, log=print)
+        compact_user_sessions(self.session_service, store, APP_NAME, user_id,
+                              archive_path=archive_dir(store.db_path))
+
+    def health(self) -> dict:
+        models = self.model_scheduler.stats() if self.model_scheduler else None
+        return {
+            "pending_turns": self.pending,
+            "active_sessions": len(self._sessions),
+            "completed_turns": self.completed,
+            "rejected_turns": self.rejected,
+            "failed_turns": self.failed,
+            "free_model_slots": models["max_concurrent"] - models["active"] if models else None,
+            "model_calls": models,
+            "turns": self.turns.stats(),
+            "session_writer": self.session_service.stats() if hasattr(self.session_service, "stats") else None,
+            "router": self.router.stats() if self.router else None,
+        }
+
+    # ----- HTTP -----
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload, extra = 200, await self.dispatch(method, path, body), {}
+                except HTTPError as e:
+                    status, payload, extra = e.status, {"error": str(e)}, e.headers
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Error handling {method} {path}: {e!r}")
+                    status, payload, extra = 500, {"error": str(e)}, {}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            _write_response(writer, e.status, {"error": str(e)}, e.headers, False)
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> dict:
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return self.health()
+        if path not in ("/turn", "/sessions"):
+            raise HTTPError(404, f"unknown path {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        user_id = data.get("user_id")
+        if not isinstance(user_id, str) or not user_id:
+            raise HTTPError(400, "user_id is required")
+        if path == "/sessions":
+            return {"session_id": await self.create_session(user_id)}
+        message = data.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "message is required")
+        request_id = data.get("request_id")
+        if request_id is not None and (not isinstance(request_id, str) or not request_id):
+            raise HTTPError(400, "request_id must be a non-empty string")
+        return await self.run_turn(user_id, message, data.get("session_id"), request_id)
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _write_response(writer, status: int, payload: dict, headers: dict, keep_alive: bool):
+    body = json.dumps(payload).encode()
+    lines = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ] + [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+
+async def serve(args):
+    from google.adk.runners import Runner
+
+    from journal_store.session_service import JournalSessionService
+    from memory_agent.agent import memory_agent
+    from memory_agent.llm import schedule_model_calls
+    from memory_agent.scheduler import MAX_MODEL_CALLS, ModelScheduler
+    from memory_agent.router import IntentRouter
+    from tracing import Tracer
+
+    max_model_calls = args.max_model_calls or MAX_MODEL_CALLS
+    configure_entry_store(args.db, log=print)
+    session_service = JournalSessionService(db_url=f"sqlite:///{args.db}")
+    if args.fake_model is not None:
+        # Offline load testing: deterministic local model with the given latency
+        from benchmarks.fakes import use_fake_models
+        use_fake_models(memory_agent, args.fake_model)
+    tracer = Tracer.from_env()
+    if tracer:
+        tracer.instrument_session_service(session_service)
+        tracer.instrument_agent(memory_agent)
+
+    server = JournalServer(
+        Runner(agent=memory_agent, app_name=APP_NAME, session_service=session_service),
+        session_service,
+        router=None if args.no_router else IntentRouter(session_service, APP_NAME, log=lambda message: None),
+        tracer=tracer,
+        max_pending=args.max_pending,
+        max_session_queue=args.max_session_queue,
+        model_scheduler=schedule_model_calls(memory_agent, ModelScheduler(max_concurrent=max_model_calls)),
+    )
+    listener = await asyncio.start_server(server.handle_connection, args.host, args.port, backlog=1024)
+    print(f"Journal server listening on http://{args.host}:{args.port} "
+          f"(max {max_model_calls} model calls, {args.max_pending} pending turns)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if tracer:
+            print(tracer.format_summary())
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the journal agents over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    parser.add_argument("--max-model-calls", type=int, help="concurrent model requests (default: $JOURNAL_MAX_MODEL_CALLS or 8)")
+    parser.add_argument("--max-pending", type=int, default=256, help="admitted turns before rejecting with 429")
+    parser.add_argument("--max-session-queue", type=int, default=8, help="queued turns per session")
+    parser.add_argument("--no-router", action="store_true", help="send every turn through the manager agent")
+    parser.add_argument("--fake-model", type=float, metavar="SECONDS",
+                        help="use the local fake model with this latency (load testing only)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's packages (and benchmarks.fakes) from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal_store import configure_entry_store  # noqa: E402
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Shared entry store on a fresh database, as the tools see it."""
+    store = configure_entry_store(str(tmp_path / "journal.db"))
+    yield store
+    configure_entry_store(":memory:")
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from journal_store.importer import InvalidRecord, import_entries, normalize_record
+
+USER = "test-user"
+
+
+def write_jsonl(path, records) -> str:
+    path.write_text("\n".join(record if isinstance(record, str) else json.dumps(record) for record in records))
+    return str(path)
+
+
+def test_records_are_normalized():
+    entry = normalize_record({"entry": " Ran 5 km ", "date": "2024-01-02T07:30:00", "mood": "Happy",
+                              "tags": "Health; exercise"})
+    assert entry == {"text": "Ran 5 km", "timestamp": "2024-01-02T07:30:00", "mood": "happy",
+                     "tags": ["health", "exercise"]}
+
+
+@pytest.mark.parametrize("record", [
+    {"timestamp": "2024-01-02"},
+    {"text": "no date"},
+    {"text": "bad date", "timestamp": "yesterday"},
+    {"text": "bad tags", "timestamp": "2024-01-02", "tags": [1, None]},
+    {"text": "bad tags", "timestamp": "2024-01-02", "tags": ["work", {"name": "home"}]},
+    ["not", "an", "object"],
+])
+def test_invalid_records_are_rejected(record):
+    with pytest.raises(InvalidRecord):
+        normalize_record(record)
+
+
+def test_bad_records_are_skipped_and_reported(tmp_path, journal):
+    path = write_jsonl(tmp_path / "journal.jsonl", [
+        {"text": "First entry", "timestamp": "2024-01-01", "tags": ["work"]},
+        {"text": "bad tags", "timestamp": "2024-01-02", "tags": [1, None]},
+        "{not json",
+        {"text": "Last entry", "timestamp": "2024-01-03"},
+    ])
+    result = import_entries(journal, USER, path, log=lambda message: None)
+
+    assert result["imported"] == 2 and result["skipped"] == 2
+    assert result["errors"][0] == "record 2: invalid tags: [1, None]"
+    assert [entry["text"] for entry in journal.iter_entries(USER)] == ["First entry", "Last entry"]
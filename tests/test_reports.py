@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+import pytest
+
+from benchmarks.fakes import FakeTextModel
+from memory_agent.sub_agents.summarizer_agent import reports
+from memory_agent.sub_agents.summarizer_agent.reports import ReportBuilder
+
+USER = "test-user"
+
+ENTRIES = [
+    ("2024-01-08T09:00:00", "Long meeting about the billing roadmap.", "stressed", ["work"]),
+    ("2024-01-15T18:30:00", "Shipped the billing release today.", "happy", ["work"]),
+    ("2024-01-22T20:00:00", "Dinner with mom and dad.", "grateful", ["family"]),
+    ("2024-03-05T07:15:00", "Ran 8 km along the river.", "energetic", ["health", "exercise"]),
+    ("2024-03-19T12:00:00", "One-on-one with my manager went well.", "calm", ["work"]),
+    ("2024-07-04T16:00:00", "Quiet day at home.", None, []),
+    # Outside the report's year
+    ("2023-12-30T10:00:00", "Walked around the old town in Lisbon.", "excited", ["travel"]),
+]
+
+
+@pytest.fixture
+def store(journal):
+    journal.add_entries(USER, [{"timestamp": timestamp, "text": text, "mood": mood, "tags": tags}
+                               for timestamp, text, mood, tags in ENTRIES])
+    return journal
+
+
+def build(store, model: FakeTextModel, by: str, **kwargs) -> dict:
+    builder = ReportBuilder(store, generate=model, concurrency=4, **kwargs)
+    return asyncio.run(builder.build(USER, "2024", by=by, user_name="Test User"))
+
+
+def test_time_report_has_a_section_per_month_with_entries(store):
+    model = FakeTextModel()
+    result = build(store, model, "time")
+
+    assert result["period"] == "2024" and result["by"] == "time"
+    assert [section["entry_count"] for section in result["sections"]] == [3, 2, 1]
+    assert result["entry_count"] == 6
+    assert result["report"].startswith(f"Summary {model.calls} of: Write a report")
+    assert result["model_calls"] == model.calls
+    assert result["cache"]["misses"] > 0
+
+
+def test_time_report_reuses_cached_period_summaries(store):
+    cold = build(store, FakeTextModel(), "time")
+    model = FakeTextModel()
+    warm = build(store, model, "time")
+
+    assert warm["sections"] == cold["sections"]
+    # Only the final report prompt is sent again
+    assert model.calls == 1
+    assert warm["cache"]["misses"] == 0 and warm["cache"]["hits"] == len(warm["sections"])
+
+
+def test_theme_report_covers_top_tags_and_the_rest(store):
+    model = FakeTextModel()
+    result = build(store, model, "theme", themes=1)
+
+    sections = {section["section"]: section["entry_count"] for section in result["sections"]}
+    assert sections == {"work": 3, "other topics": 3}
+    assert result["entry_count"] == 6
+    # One map call per theme plus the report
+    assert model.calls == len(sections) + 1
+
+
+def test_theme_chunks_are_split_and_reduced(store, monkeypatch):
+    # Entry lines are longer than 30 characters, so no two share a map call
+    monkeypatch.setattr(reports, "MAX_CHUNK_CHARS", 60)
+    monkeypatch.setattr(reports, "REDUCE_FANOUT", 2)
+    model = FakeTextModel()
+    result = build(store, model, "theme", themes=1)
+
+    assert [section["section"] for section in result["sections"]] == ["work", "other topics"]
+    # work: 3 chunks, combined in two rounds of 2; other topics: 3 chunks, likewise; then the report
+    assert model.calls == (3 + 2) * 2 + 1
+    assert result["model_calls"] == model.calls
+
+
+def test_map_calls_run_concurrently_up_to_the_limit(store):
+    model = FakeTextModel(latency=0.01)
+    build(store, model, "theme", themes=3)
+    assert 1 < model.peak_concurrency <= 4
+
+
+def test_empty_period_and_unknown_kind(store):
+    builder = ReportBuilder(store, generate=FakeTextModel())
+    result = asyncio.run(builder.build(USER, "2022", by="time"))
+    assert result["report"] == "No entries in this period." and result["sections"] == []
+
+    with pytest.raises(ValueError):
+        asyncio.run(builder.build(USER, "2024", by="mood"))
+
+
+@pytest.mark.parametrize("by", ["time", "theme"])
+def test_store_reads_stay_off_the_event_loop(store, monkeypatch, by):
+    threads = set()
+    for name in ("entry_total", "get_period_summary", "save_period_summary", "iter_entries", "tag_counts",
+                 "record_summary_stats"):
+        method = getattr(store, name)
+
+        def recorded(*args, _method=method, **kwargs):
+            threads.add(threading.get_ident())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(store, name, recorded)
+    build(store, FakeTextModel(), by)
+
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,36 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from journal_store import response_cache
+from journal_store.response_cache import query_key
+
+USER = "test-user"
+DAY = datetime.date(2024, 3, 10)
+
+
+def test_the_same_request_gets_the_same_key_on_the_same_day():
+    assert query_key("Summarize my week!", DAY) == query_key("summarize  my week", DAY)
+
+
+@pytest.mark.parametrize("query", ["summarize my week", "how was my year", "how was March", "show me a summary"])
+def test_keys_change_when_the_day_rolls_over(query):
+    assert query_key(query, DAY) != query_key(query, DAY + datetime.timedelta(days=1))
+
+
+def test_cached_answers_are_reused_until_the_day_or_the_entries_change(journal, monkeypatch):
+    journal.add_entry(USER, "Ran 5 km by the river", timestamp="2024-03-09T07:00:00")
+    journal.cache_response(USER, "Summarize my week", "A week of running.")
+    assert journal.get_cached_response(USER, "summarize my week") == "A week of running."
+
+    journal.add_entry(USER, "Dinner with mom and dad", timestamp="2024-03-09T19:00:00")
+    assert journal.get_cached_response(USER, "summarize my week") is None
+
+    journal.cache_response(USER, "Summarize my week", "Running and family.")
+
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    clock = SimpleNamespace(date=SimpleNamespace(today=lambda: tomorrow), datetime=datetime.datetime,
+                            timedelta=datetime.timedelta)
+    monkeypatch.setattr(response_cache, "datetime", clock)
+    assert journal.get_cached_response(USER, "summarize my week") is None
@@ -0,0 +1,63 @@
+import pytest
+
+from memory_agent.router import (
+    DEFAULT_MIN_CONFIDENCE, JOURNAL, MANAGER, SUMMARIZER, UPDATE_USER_NAME, classify,
+)
+
+
+def fast_path(message: str):
+    """(target, intent) of a route confident enough to skip the manager, else None."""
+    route = classify(message)
+    if route.target == MANAGER or route.confidence < DEFAULT_MIN_CONFIDENCE:
+        return None
+    return route.target, route.intent
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Call me Sam", (UPDATE_USER_NAME, "set_name")),
+    ("Add an entry: I had a long walk by the river", (JOURNAL, "add_entry")),
+    ("Journal that I fixed the bike", (JOURNAL, "add_entry")),
+    ("Log: finished the billing release", (JOURNAL, "add_entry")),
+    ("Show me my entries from last week", (JOURNAL, "view_entries")),
+    ("Find entries about Lisbon", (JOURNAL, "search_entries")),
+    ("Summarize my March", (SUMMARIZER, "analysis")),
+])
+def test_unambiguous_requests_take_the_fast_path(message, expected):
+    assert fast_path(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    # Not names
+    "My name is not important",
+    "Call me later",
+    # Reads, undos and analysis phrased in the first person
+    "I'd like to see my entries from today",
+    "Undo the last entry I added",
+    "Today I want you to summarize my year",
+    "I want to delete what I wrote yesterday",
+    # Questions and requests about entries after a "journal" / "log" opening
+    "Journal entries this month?",
+    "Log entries from yesterday",
+    "Journal: can you show what I wrote on Monday",
+    # Plain first-person statements are likely entries but go through the manager
+    "I had my review today",
+    "We went hiking this morning",
+])
+def test_near_misses_go_to_the_manager(message):
+    assert fast_path(message) is None
+
+
+@pytest.mark.parametrize("message", [
+    "I'd like to see my entries from today",
+    "Undo the last entry I added",
+    "Today I want you to summarize my year",
+    "Journal entries this month?",
+])
+def test_requests_about_the_journal_are_never_entries(message):
+    assert classify(message).intent != "add_entry"
+
+
+def test_first_person_statements_are_still_guessed_as_entries():
+    route = classify("I had a long walk by the river this morning")
+    assert route.target == JOURNAL and route.intent == "add_entry"
+    assert route.confidence < DEFAULT_MIN_CONFIDENCE
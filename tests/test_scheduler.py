@@ -0,0 +1,279 @@
+import asyncio
+import threading
+
+import pytest
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import errors, types
+
+import utils
+from benchmarks.fakes import StubToolContext
+from journal_store import turn_scope
+from memory_agent.scheduler import ModelScheduler, RetryPolicy, TurnScheduler
+from memory_agent.sub_agents.journal_agent.agent import add_entry
+
+APP_NAME = "Journal Tests"
+USER = "test-user"
+
+
+def server_error(code: int = 503) -> errors.APIError:
+    error_type = errors.ServerError if code >= 500 else errors.ClientError
+    return error_type(code, {"error": {"code": code, "message": "Injected failure.", "status": "UNAVAILABLE"}})
+
+
+class MaxDelay:
+    """Random generator whose jitter always picks the longest wait."""
+
+    def uniform(self, low, high):
+        return high
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff waits instead of sleeping."""
+    waits = []
+    sleep = asyncio.sleep
+
+    async def record(delay, *args, **kwargs):
+        waits.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", record)
+    return waits
+
+
+def failing(errors_first: list, result="ok"):
+    """Model request raising ``errors_first`` in turn, then returning ``result``."""
+    calls = []
+
+    async def request():
+        calls.append(len(calls))
+        if len(calls) <= len(errors_first):
+            raise errors_first[len(calls) - 1]
+        return result
+
+    return request, calls
+
+
+# ----- ModelScheduler -----
+
+@pytest.mark.parametrize("code", [429, 500, 503])
+def test_transient_errors_are_retried_with_backoff(sleeps, code):
+    scheduler = ModelScheduler(retry=RetryPolicy(retries=3, base_delay=0.5, max_delay=1.5, rng=MaxDelay()))
+    request, calls = failing([server_error(code)] * 3)
+
+    assert asyncio.run(scheduler.call(request, tokens=10)) == "ok"
+    assert len(calls) == 4
+    assert scheduler.retries == 3 and scheduler.failures == 0
+    # Exponential, capped at max_delay
+    assert sleeps == [0.5, 1.0, 1.5]
+
+
+def test_permanent_errors_are_not_retried(sleeps):
+    scheduler = ModelScheduler(retry=RetryPolicy(retries=3, base_delay=0.5))
+    request, calls = failing([server_error(400)])
+
+    with pytest.raises(errors.ClientError):
+        asyncio.run(scheduler.call(request, tokens=10))
+    assert len(calls) == 1
+    assert scheduler.retries == 0 and scheduler.failures == 1
+    assert sleeps == []
+
+
+def test_retries_give_up_after_the_limit(sleeps):
+    scheduler = ModelScheduler(retry=RetryPolicy(retries=2, base_delay=0.5))
+    request, calls = failing([server_error(503)] * 5)
+
+    with pytest.raises(errors.ServerError):
+        asyncio.run(scheduler.call(request, tokens=10))
+    assert len(calls) == 3
+    assert scheduler.retries == 2 and scheduler.failures == 1
+
+
+def test_jitter_stays_within_the_backoff_window():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt in range(6):
+        assert all(0 <= policy.delay(attempt) <= min(4.0, 0.5 * 2 ** attempt) for _ in range(50))
+
+
+def test_concurrent_calls_are_limited():
+    scheduler = ModelScheduler(max_concurrent=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        peak = max(peak, scheduler.active)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(*(scheduler.call(request, tokens=1) for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert peak == 2
+
+
+def test_scheduler_can_be_built_outside_the_event_loop():
+    # main.py builds it in a startup thread that has no event loop
+    built = []
+    thread = threading.Thread(target=lambda: built.append(ModelScheduler(max_concurrent=2, tokens_per_minute=600)))
+    thread.start()
+    thread.join()
+    scheduler = built[0]
+    request, calls = failing([])
+
+    assert asyncio.run(scheduler.call(request, tokens=10)) == "ok"
+    assert len(calls) == 1
+
+
+# ----- TurnScheduler -----
+
+class Turns:
+    """``call_agent_async`` stand-in that records its calls and runs ``step`` for each."""
+
+    def __init__(self, step=None, delay: float = 0.01):
+        self.calls = []
+        self.step = step
+        self.delay = delay
+
+    async def __call__(self, runner, user_id, session_id, query, resume=False, **kwargs):
+        self.calls.append({"session_id": session_id, "query": query, "resume": resume})
+        await asyncio.sleep(self.delay)
+        if self.step is not None:
+            return self.step(runner, session_id, query, len(self.calls))
+        return f"answer to {query}"
+
+
+def make_scheduler(monkeypatch, turns: Turns, **kwargs) -> TurnScheduler:
+    monkeypatch.setattr(utils, "call_agent_async", turns)
+    runner = type("Runner", (), {"app_name": APP_NAME, "session_service": InMemorySessionService()})()
+    return TurnScheduler(runner, retry=RetryPolicy(base_delay=0), log=lambda message: None, **kwargs)
+
+
+def new_session(scheduler: TurnScheduler) -> str:
+    return scheduler.runner.session_service.create_session(app_name=APP_NAME, user_id=USER).id
+
+
+def test_identical_read_only_turns_share_one_run(monkeypatch):
+    turns = Turns()
+    scheduler = make_scheduler(monkeypatch, turns)
+    session_id = new_session(scheduler)
+
+    async def run():
+        return await asyncio.gather(
+            scheduler.run_turn(USER, session_id, "Show me my entries", display=False),
+            scheduler.run_turn(USER, session_id, "show me  my entries", display=False),
+        )
+
+    first, second = asyncio.run(run())
+    assert first == second == "answer to Show me my entries"
+    assert len(turns.calls) == 1
+    assert scheduler.coalesced == 1
+
+
+def test_writes_and_other_sessions_are_not_coalesced(monkeypatch):
+    turns = Turns()
+    scheduler = make_scheduler(monkeypatch, turns)
+    sessions = [new_session(scheduler), new_session(scheduler)]
+
+    async def run():
+        return await asyncio.gather(
+            scheduler.run_turn(USER, sessions[0], "I went for a run this morning", display=False),
+            scheduler.run_turn(USER, sessions[0], "I went for a run this morning", display=False),
+            scheduler.run_turn(USER, sessions[0], "Show me my entries", display=False),
+            scheduler.run_turn(USER, sessions[1], "Show me my entries", display=False),
+        )
+
+    asyncio.run(run())
+    assert len(turns.calls) == 4
+    assert scheduler.coalesced == 0
+
+
+def test_permanent_turn_failures_are_raised_and_counted(monkeypatch):
+    def step(runner, session_id, query, call):
+        raise server_error(400)
+
+    turns = Turns(step)
+    scheduler = make_scheduler(monkeypatch, turns)
+    session_id = new_session(scheduler)
+
+    with pytest.raises(errors.ClientError):
+        asyncio.run(scheduler.run_turn(USER, session_id, "I went for a run", display=False, raise_errors=True))
+    assert asyncio.run(scheduler.run_turn(USER, session_id, "I went for a run", display=False)) is None
+    assert len(turns.calls) == 2
+    assert scheduler.retried == 0 and scheduler.failed == 2
+
+
+# ----- Idempotent writes across a retried turn -----
+
+def add_user_message(runner, session_id: str, query: str):
+    service = runner.session_service
+    session = service.get_session(app_name=APP_NAME, user_id=USER, session_id=session_id)
+    service.append_event(session, Event(author="user", content=types.Content(role="user",
+                                                                              parts=[types.Part(text=query)])))
+
+
+def retried_turn(monkeypatch, first_attempt: list, retry: list):
+    """Run a turn that writes ``first_attempt``, fails, and writes ``retry`` when run again."""
+    context = StubToolContext(USER)
+
+    def step(runner, session_id, query, call):
+        if call == 1:
+            add_user_message(runner, session_id, query)
+        for text in first_attempt if call == 1 else retry:
+            add_entry(text, context, None, None)
+        if call == 1:
+            raise server_error(503)
+        return "Logged."
+
+    turns = Turns(step)
+    scheduler = make_scheduler(monkeypatch, turns)
+    session_id = new_session(scheduler)
+    result = asyncio.run(scheduler.run_turn(USER, session_id, "Log my day", turn_key="turn-1", display=False))
+    return result, turns, scheduler
+
+
+def test_retried_turn_does_not_add_an_entry_twice(monkeypatch, journal):
+    result, turns, scheduler = retried_turn(monkeypatch, ["Ran 5 km by the river"], ["Ran 5 km by the river"])
+
+    assert result == "Logged."
+    assert [entry["text"] for entry in journal.iter_entries(USER)] == ["Ran 5 km by the river"]
+    assert scheduler.retried == 1
+
+
+def test_retried_turn_resumes_without_adding_the_message_again(monkeypatch, journal):
+    _, turns, scheduler = retried_turn(monkeypatch, ["Ran 5 km by the river"], [])
+
+    assert [call["resume"] for call in turns.calls] == [False, True]
+
+
+def test_retry_writing_only_the_second_entry_keeps_both(monkeypatch, journal):
+    # The first attempt stored the run and failed; the retry only logs the dinner
+    retried_turn(monkeypatch, ["Ran 5 km by the river"], ["Dinner with mom and dad"])
+
+    texts = sorted(entry["text"] for entry in journal.iter_entries(USER))
+    assert texts == ["Dinner with mom and dad", "Ran 5 km by the river"]
+
+
+def test_retry_writing_both_entries_in_another_order_stores_each_once(monkeypatch, journal):
+    retried_turn(monkeypatch, ["Ran 5 km by the river"], ["Dinner with mom and dad", "Ran  5 km by the river"])
+
+    texts = sorted(entry["text"] for entry in journal.iter_entries(USER))
+    assert texts == ["Dinner with mom and dad", "Ran 5 km by the river"]
+
+
+def test_the_same_entry_twice_in_one_turn_is_stored_twice(journal):
+    context = StubToolContext(USER)
+    for _ in range(2):
+        with turn_scope("turn-2"):
+            first = add_entry("Coffee with Sam", context, None, None)["entry"]
+            second = add_entry("Coffee with Sam", context, None, None)["entry"]
+        assert first["id"] != second["id"]
+    assert journal.count(USER) == 2
+
+
+def test_writes_outside_a_turn_are_not_deduplicated(journal):
+    context = StubToolContext(USER)
+    add_entry("Coffee with Sam", context, None, None)
+    add_entry("Coffee with Sam", context, None, None)
+    assert journal.count(USER) == 2
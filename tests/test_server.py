@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from server import HTTPError, JournalServer, _read_request
+
+
+class Writer:
+    """``StreamWriter`` stand-in collecting what the server writes."""
+
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def reader_for(raw: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(raw)
+    reader.feed_eof()
+    return reader
+
+
+def exchange(raw: bytes) -> tuple:
+    """Send ``raw`` on a connection; returns (status, JSON body) of the first response."""
+    async def run():
+        writer = Writer()
+        await JournalServer(runner=None, session_service=None).handle_connection(reader_for(raw), writer)
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.closed
+    head, _, body = writer.data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_requests_are_parsed():
+    async def run():
+        return await _read_request(reader_for(
+            b"POST /turn?x=1 HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}"))
+
+    assert asyncio.run(run()) == ("POST", "/turn", {"content-length": "2", "connection": "close"}, b"{}")
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1.5"])
+def test_invalid_content_length_is_rejected(length):
+    async def run():
+        return await _read_request(reader_for(b"POST /turn HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"))
+
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(run())
+    assert error.value.status == 400
+
+
+def test_invalid_content_length_gets_a_400_response():
+    status, body = exchange(b"POST /turn HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}")
+    assert status == 400 and body == {"error": "invalid Content-Length"}
+
+
+def test_oversized_body_gets_a_413_response():
+    status, _ = exchange(b"POST /turn HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n{}")
+    assert status == 413
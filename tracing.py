@@ -0,0 +1,312 @@
+"""Per-turn tracing of model calls, tool calls, session DB access and agent hand-offs.
+
+A ``Tracer`` hooks into the agents through their model and tool callbacks
+and into the session service by wrapping its methods, and groups the
+resulting spans by conversation turn. Finished turns can be appended to a
+JSONL file and the running percentiles written as a Prometheus text file.
+
+    tracer = Tracer.from_env()          # JOURNAL_TRACE_DIR=./traces enables it
+    tracer.instrument_agent(memory_agent)
+    tracer.instrument_session_service(session_service)
+    await call_agent_async(runner, user_id, session_id, query, tracer=tracer)
+"""
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+from journal_store.digest import estimate_tokens
+
+# Session service methods timed as "session_db" spans
+SESSION_METHODS = ("create_session", "get_session", "list_sessions", "append_event", "delete_session")
+
+_current_turn = contextvars.ContextVar("journal_trace_turn", default=None)
+
+
+class Tracer:
+    """Collects spans per turn and summarizes their durations.
+
+    Every span is a dict with ``turn``, ``kind`` ("turn", "model", "tool",
+    "session_db", "handoff" or "latency"), ``name``, ``start`` (Unix time),
+    ``duration_ms`` and kind-specific fields such as token counts or the
+    size of a state delta.
+    """
+
+    def __init__(self, jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None,
+                 max_spans: int = 10000):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self._turn_ids = itertools.count(1)
+        self._open = {}
+        # Recent spans for percentiles; totals cover every span ever recorded
+        self._recent = defaultdict(lambda: deque(maxlen=max_spans))
+        self._totals = defaultdict(lambda: [0, 0.0])
+        self._tokens = defaultdict(int)
+        self._state_delta_bytes = defaultdict(int)
+
+    @classmethod
+    def from_env(cls) -> Optional["Tracer"]:
+        """Tracer writing to $JOURNAL_TRACE_DIR, or None when tracing is off."""
+        directory = os.getenv("JOURNAL_TRACE_DIR")
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, "spans.jsonl"), os.path.join(directory, "metrics.prom"))
+
+    # ----- Turns and spans -----
+
+    @contextlib.contextmanager
+    def turn(self, user_id: str, session_id: str, query: str):
+        """Group every span recorded inside the block under one turn."""
+        turn = {"id": next(self._turn_ids), "spans": [], "handoff": None, "author": None}
+        token = _current_turn.set(turn)
+        started, wall = time.perf_counter(), time.time()
+        try:
+            yield turn
+        finally:
+            _current_turn.reset(token)
+            self._record(turn, "turn", "call_agent_async", wall, time.perf_counter() - started,
+                         user_id=user_id, session_id=session_id, query_chars=len(query))
+            self._flush(turn)
+
+    @contextlib.contextmanager
+    def span(self, kind: str, name: str, **fields):
+        started, wall = time.perf_counter(), time.time()
+        try:
+            yield fields
+        except Exception as e:
+            fields["error"] = type(e).__name__
+            raise
+        finally:
+            self._record(_current_turn.get(), kind, name, wall, time.perf_counter() - started, **fields)
+
+    def start(self, key, kind: str, name: str, **fields):
+        """Open a span finished later by ``finish`` (for before/after callback pairs)."""
+        self._open[key] = (_current_turn.get(), kind, name, time.time(), time.perf_counter(), fields)
+
+    def finish(self, key, **fields):
+        opened = self._open.pop(key, None)
+        if opened is None:
+            return
+        turn, kind, name, wall, started, start_fields = opened
+        self._record(turn, kind, name, wall, time.perf_counter() - started, **{**start_fields, **fields})
+
+    def record_duration(self, kind: str, name: str, seconds: float, **fields):
+        """Record an interval measured elsewhere (e.g. time to first text) in the current turn."""
+        self._record(_current_turn.get(), kind, name, time.time() - seconds, seconds, **fields)
+
+    def _record(self, turn, kind, name, wall, seconds, **fields):
+        span = {
+            "turn": turn["id"] if turn else None,
+            "kind": kind,
+            "name": name,
+            "start": round(wall, 6),
+            "duration_ms": round(seconds * 1000, 3),
+            **fields,
+        }
+        if turn is not None:
+            turn["spans"].append(span)
+        self._recent[(kind, name)].append(seconds)
+        totals = self._totals[(kind, name)]
+        totals[0] += 1
+        totals[1] += seconds
+
+    # ----- Instrumentation -----
+
+    def instrument_agent(self, agent):
+        """Add model and tool spans to ``agent`` and its sub-agents, keeping existing callbacks."""
+        if hasattr(agent, "before_model_callback"):
+            agent.before_model_callback = _chain(self._before_model, agent.before_model_callback)
+            agent.after_model_callback = _chain(self._after_model, agent.after_model_callback)
+            agent.before_tool_callback = _chain(self._before_tool, agent.before_tool_callback)
+            agent.after_tool_callback = _chain(self._after_tool, agent.after_tool_callback)
+        for sub_agent in agent.sub_agents:
+            self.instrument_agent(sub_agent)
+
+    def instrument_session_service(self, session_service):
+        """Time the session service's database calls as "session_db" spans."""
+        for method_name in SESSION_METHODS:
+            method = getattr(session_service, method_name, None)
+            if method is not None:
+                setattr(session_service, method_name, self._timed(method_name, method))
+        return session_service
+
+    def _timed(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            with self.span("session_db", name) as fields:
+                result = method(*args, **kwargs)
+                event = kwargs.get("event") or (args[1] if name == "append_event" and len(args) > 1 else None)
+                if event is not None and event.actions and event.actions.state_delta:
+                    fields["state_delta_bytes"] = _json_size(event.actions.state_delta)
+                return result
+        return timed
+
+    def _before_model(self, callback_context, llm_request):
+        self.start(("model", callback_context.invocation_id, callback_context.agent_name),
+                   "model", callback_context.agent_name,
+                   input_tokens=request_tokens(llm_request))
+
+    def _after_model(self, callback_context, llm_response):
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        opened = self._open.get(key)
+        if llm_response.partial or opened is None:
+            return
+        # Token counts come from the model when it reports usage, otherwise they are estimated
+        usage = getattr(llm_response, "usage_metadata", None)
+        if usage is not None:
+            input_tokens, output_tokens = usage.prompt_token_count or 0, usage.candidates_token_count or 0
+        else:
+            input_tokens, output_tokens = opened[5]["input_tokens"], _response_tokens(llm_response)
+        self._tokens[(callback_context.agent_name, "input")] += input_tokens
+        self._tokens[(callback_context.agent_name, "output")] += output_tokens
+        self.finish(key, input_tokens=input_tokens, output_tokens=output_tokens,
+                    tokens_estimated=usage is None)
+
+    def _before_tool(self, tool, args, tool_context):
+        self.start(("tool", tool_context.function_call_id), "tool", tool.name,
+                   agent=tool_context.agent_name)
+
+    def _after_tool(self, tool, args, tool_context, tool_response):
+        delta = tool_context.actions.state_delta
+        size = _json_size(delta) if delta else 0
+        self._state_delta_bytes[tool.name] += size
+        self.finish(("tool", tool_context.function_call_id), state_delta_bytes=size,
+                    response_bytes=_json_size(tool_response),
+                    error=tool_response.get("error") if isinstance(tool_response, dict) else None)
+
+    def observe_event(self, event):
+        """Record agent hand-offs from the event stream of a turn.
+
+        A hand-off span runs from the ``transfer_to_agent`` call to the first
+        event of the agent it transferred to.
+        """
+        turn = _current_turn.get()
+        if turn is None or event.author == "user":
+            return
+        if turn["handoff"] and event.author != turn["author"]:
+            source, wall, started = turn["handoff"]
+            self._record(turn, "handoff", f"{source}->{event.author}", wall, time.perf_counter() - started)
+            turn["handoff"] = None
+        turn["author"] = event.author
+        for call in event.get_function_calls():
+            if call.name == "transfer_to_agent":
+                turn["handoff"] = (event.author, time.time(), time.perf_counter())
+
+    # ----- Reporting -----
+
+    def summary(self) -> dict:
+        """Count, p50 and p95 (ms) per span kind and name."""
+        result = {}
+        for (kind, name), durations in sorted(self._recent.items()):
+            ordered = sorted(durations)
+            result[f"{kind}:{name}"] = {
+                "count": self._totals[(kind, name)][0],
+                "p50_ms": round(_percentile(ordered, 0.5) * 1000, 2),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+            }
+        return result
+
+    def format_summary(self) -> str:
+        lines = [f"{'span':<44} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<44} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}")
+        for (agent, direction), count in sorted(self._tokens.items()):
+            lines.append(f"tokens {agent} {direction}: {count}")
+        return "\n".join(lines)
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP journal_span_duration_seconds Duration of traced spans.",
+            "# TYPE journal_span_duration_seconds summary",
+        ]
+        for (kind, name), durations in sorted(self._recent.items()):
+            labels = f'kind="{kind}",name="{_escape(name)}"'
+            ordered = sorted(durations)
+            for quantile in (0.5, 0.95):
+                lines.append(f'journal_span_duration_seconds{{{labels},quantile="{quantile}"}} '
+                             f"{_percentile(ordered, quantile):.6f}")
+            count, total = self._totals[(kind, name)]
+            lines.append(f"journal_span_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"journal_span_duration_seconds_count{{{labels}}} {count}")
+        lines += [
+            "# HELP journal_model_tokens_total Model tokens by agent (estimated when the model reports none).",
+            "# TYPE journal_model_tokens_total counter",
+        ]
+        for (agent, direction), count in sorted(self._tokens.items()):
+            lines.append(f'journal_model_tokens_total{{agent="{agent}",direction="{direction}"}} {count}')
+        lines += [
+            "# HELP journal_state_delta_bytes_total Session state written by tools.",
+            "# TYPE journal_state_delta_bytes_total counter",
+        ]
+        for tool, size in sorted(self._state_delta_bytes.items()):
+            lines.append(f'journal_state_delta_bytes_total{{tool="{tool}"}} {size}')
+        return "\n".join(lines) + "\n"
+
+    def _flush(self, turn):
+        if self.jsonl_path:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                for span in turn["spans"]:
+                    f.write(json.dumps(span, default=str) + "\n")
+        if self.prometheus_path:
+            temporary = self.prometheus_path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            # Scrapers never see a half-written file
+            os.replace(temporary, self.prometheus_path)
+
+
+def _chain(tracing_callback, existing):
+    """Run the tracing callback, then the agent's own callback (whose result wins)."""
+    if existing is None:
+        def callback(**kwargs):
+            tracing_callback(**kwargs)
+            return None
+    else:
+        def callback(**kwargs):
+            tracing_callback(**kwargs)
+            return existing(**kwargs)
+    return callback
+
+
+def _percentile(ordered, quantile: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * quantile))]
+
+
+def request_tokens(llm_request) -> int:
+    """Estimated prompt tokens of a model request: instruction, text and tool results."""
+    size = 0
+    if llm_request.config and llm_request.config.system_instruction:
+        size += estimate_tokens(str(llm_request.config.system_instruction))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            size += estimate_tokens(part.text or "")
+            if part.function_response:
+                size += estimate_tokens(json.dumps(part.function_response.response, default=str))
+    return size
+
+
+def _response_tokens(llm_response) -> int:
+    if not llm_response.content:
+        return 0
+    size = 0
+    for part in llm_response.content.parts or []:
+        size += estimate_tokens(part.text or "")
+        if part.function_call:
+            size += estimate_tokens(json.dumps(part.function_call.args or {}, default=str))
+    return size
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, default=str).encode())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
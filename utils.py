@@ -1,3 +1,7 @@
+import time
+from typing import List, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai import types
 
 
@@ -5,6 +9,7 @@ from google.genai import types
 class Colors:
     RESET = "\033[0m"
     BOLD = "\033[1m"
+    DIM = "\033[2m"
     UNDERLINE = "\033[4m"
 
     # Foreground colors
@@ -28,7 +33,7 @@ class Colors:
     BG_WHITE = "\033[47m"
 
 
-async def process_agent_response(event):
+async def process_agent_response(event, display=True):
     """Process and display agent response events."""
 
     # Check for final response
@@ -42,14 +47,9 @@ async def process_agent_response(event):
         ):
             final_response = event.content.parts[0].text.strip()
             # Use colors and formatting to make the final response stand out
-            print(
-                f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╔══ AGENT RESPONSE ═════════════════════════════════════════{Colors.RESET}"
-            )
-            print(f"{Colors.CYAN}{Colors.BOLD}{final_response}{Colors.RESET}")
-            print(
-                f"{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╚═════════════════════════════════════════════════════════════{Colors.RESET}\n"
-            )
-        else:
+            if display:
+                print_final_response(final_response)
+        elif display:
             print(
                 f"\n{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}==> Final Agent Response: [No text content in final event]{Colors.RESET}\n"
             )
@@ -57,23 +57,194 @@ async def process_agent_response(event):
     return final_response
 
 
-async def call_agent_async(runner, user_id, session_id, query):
-    """Call the agent asynchronously with the user's query."""
-    content = types.Content(role="user", parts=[types.Part(text=query)])
+def print_final_response(text):
+    """Display a response produced without going through an agent."""
+    print(
+        f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╔══ AGENT RESPONSE ═════════════════════════════════════════{Colors.RESET}"
+    )
+    print(f"{Colors.CYAN}{Colors.BOLD}{text}{Colors.RESET}")
     print(
-        f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {query} ---{Colors.RESET}"
+        f"{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╚═════════════════════════════════════════════════════════════{Colors.RESET}\n"
     )
+
+
+async def call_agent_async(runner, user_id, session_id, query, router=None, tracer=None, display=True,
+                           stream=False, latency=None, raise_errors=False, resume=False):
+    """Call the agent asynchronously with the user's query.
+
+    With an ``IntentRouter``, unambiguous requests skip the manager agent and
+    go straight to the sub-agent (or tool) that handles them. With a
+    ``Tracer``, the turn's model, tool, session DB and hand-off spans are
+    recorded. ``display=False`` runs the turn without console output (server mode).
+    With ``stream=True`` the model streams its answer, which is printed as it
+    arrives along with tool progress. Time to first text and total time are
+    printed and, given a ``LatencyStats``, collected across turns. Errors are
+    printed and end the turn, unless ``raise_errors`` is set (``TurnScheduler``
+    retries them). ``resume=True`` continues a failed turn whose ``query`` is
+    already in the session instead of adding it again.
+    """
+    if tracer is None:
+        return await _run_turn(runner, user_id, session_id, query, router, None, display, stream, latency,
+                               raise_errors, resume)
+    with tracer.turn(user_id, session_id, query):
+        return await _run_turn(runner, user_id, session_id, query, router, tracer, display, stream, latency,
+                               raise_errors, resume)
+
+
+class LatencyStats:
+    """Time to first text and total time of the turns of a conversation, in seconds."""
+
+    def __init__(self):
+        self.first_text: List[float] = []
+        self.total: List[float] = []
+
+    def record(self, first_text: Optional[float], total: float):
+        if first_text is not None:
+            self.first_text.append(first_text)
+        self.total.append(total)
+
+    def summary_line(self) -> str:
+        if not self.total:
+            return "no turns yet"
+        return (f"first text p50 {_median(self.first_text):.2f}s, total p50 {_median(self.total):.2f}s "
+                f"over {len(self.total)} turns")
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0.0
+
+
+class _TurnProgress:
+    """Prints a turn's events as they arrive and times its first visible text."""
+
+    def __init__(self, started: float, display: bool):
+        self.started = started
+        self.display = display
+        self.first_text = None
+        self._streaming_author = None
+        self._tool_started = {}
+
+    def mark_text(self):
+        if self.first_text is None:
+            self.first_text = time.perf_counter() - self.started
+
+    def render(self, event) -> Optional[str]:
+        """Show one streamed event; returns the text of a final response."""
+        parts = event.content.parts if event.content and event.content.parts else []
+        text = "".join(part.text for part in parts if part.text)
+        if event.partial:
+            if text:
+                self.mark_text()
+                if self.display:
+                    if self._streaming_author != event.author:
+                        print(f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}==> {event.author}:{Colors.RESET} ", end="")
+                        self._streaming_author = event.author
+                    print(f"{Colors.CYAN}{text}{Colors.RESET}", end="", flush=True)
+            return None
+
+        for call in event.get_function_calls():
+            self._tool_started[call.id] = time.perf_counter()
+            if self.display:
+                print(f"{Colors.YELLOW}... {event.author}: {_describe_call(call)}{Colors.RESET}")
+        for response in event.get_function_responses():
+            started = self._tool_started.pop(response.id, None)
+            if self.display and response.name != "transfer_to_agent":
+                took = f" in {time.perf_counter() - started:.2f}s" if started else ""
+                print(f"{Colors.YELLOW}... {response.name} finished{took}{Colors.RESET}")
+
+        if not event.is_final_response():
+            return None
+        if not text:
+            return None
+        self.mark_text()
+        if self.display:
+            if self._streaming_author == event.author:
+                # The text was already printed chunk by chunk
+                print("\n")
+            else:
+                print_final_response(text.strip())
+        self._streaming_author = None
+        return text.strip()
+
+    def finish(self, latency, tracer):
+        total = time.perf_counter() - self.started
+        if latency is not None:
+            latency.record(self.first_text, total)
+        if tracer and self.first_text is not None:
+            tracer.record_duration("latency", "first_text", self.first_text)
+        if self.display:
+            first = f"first text {self.first_text:.2f}s, " if self.first_text is not None else ""
+            print(f"{Colors.DIM}({first}total {total:.2f}s){Colors.RESET}")
+
+
+def _describe_call(call) -> str:
+    args = call.args or {}
+    if call.name == "transfer_to_agent":
+        return f"handing off to {args.get('agent_name')}"
+    shown = ", ".join(f"{name}={value!r}" for name, value in args.items() if value is not None)
+    if len(shown) > 80:
+        shown = shown[:77] + "..."
+    return f"running {call.name}({shown})"
+
+
+async def _run_turn(runner, user_id, session_id, query, router, tracer, display, stream, latency, raise_errors,
+                    resume):
+    # The Runner only appends a new message; a resumed turn carries on from the session as it is
+    content = None if resume else types.Content(role="user", parts=[types.Part(text=query)])
+    if display:
+        print(
+            f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {query} ---{Colors.RESET}"
+        )
     final_response_text = None
+    started = time.perf_counter()
+    handoff_seconds = None
+    progress = _TurnProgress(started, display)
+    # Partial text events are only produced in SSE streaming mode
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE) if stream else RunConfig()
 
+    route = router.route(query) if router else None
     try:
+        prefetch = getattr(runner.session_service, "get_session_async", None)
+        if prefetch is not None:
+            # Load the session off the event loop so the Runner's own lookup is a cache hit
+            await prefetch(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+        if route and route.target == "update_user_name":
+            final_response_text = router.update_user_name(user_id, session_id, query, route.argument)
+            progress.mark_text()
+            if display:
+                print_final_response(final_response_text)
+            router.record_fast_turn(route, started)
+            progress.finish(latency, tracer)
+            return final_response_text
+        if route and route.target != "memory_agent":
+            runner = router.runner_for(route.target)
+
         async for event in runner.run_async(
-                user_id=user_id, session_id=session_id, new_message=content
+                user_id=user_id, session_id=session_id, new_message=content, run_config=run_config
         ):
-            # Process each event and get the final response if available
-            response = await process_agent_response(event)
+            if handoff_seconds is None and event.author not in ("user", runner.agent.name):
+                handoff_seconds = time.perf_counter() - started
+            if tracer and not event.partial:
+                tracer.observe_event(event)
+            if stream:
+                response = progress.render(event)
+            else:
+                # Process each event and get the final response if available
+                response = await process_agent_response(event, display)
+                if response:
+                    progress.mark_text()
             if response:
                 final_response_text = response
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error during agent call: {e}")
+        return final_response_text
 
-    return final_response_text
\ No newline at end of file
+    if route and route.target != "memory_agent":
+        router.record_fast_turn(route, started)
+    elif router:
+        router.record_manager_turn(handoff_seconds, time.perf_counter() - started)
+    progress.finish(latency, tracer)
+    return final_response_text